@@ -13,4 +13,13 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from gateway.http import lifespan  # noqa: E402  (necesita los settings ya cargados)
+
+
+async def application(scope, receive, send):
+    # El lifespan abre y cierra el cliente httpx del worker (gateway/http.py)
+    if scope["type"] == "lifespan":
+        return await lifespan(receive, send)
+    return await django_application(scope, receive, send)
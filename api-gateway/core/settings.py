@@ -14,6 +14,9 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = os.getenv("SECRET_KEY")
 RESERVATION_TOKEN = os.getenv("RESERVATION_TOKEN")
 HOTEL_SERVICE_TOKEN = os.getenv("HOTEL_SERVICE_TOKEN")
+CHATBOT_TOKEN = os.getenv("CHATBOT_TOKEN")
+# Con este token el auth-service avisa los logout (auth/revoke/)
+AUTH_SERVICE_TOKEN = os.getenv("AUTH_SERVICE_TOKEN")
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True if os.getenv("DEBUG", "False") == "True" else False
 ALLOWED_HOSTS = ["*"]
@@ -28,6 +31,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'rest_framework',
+    'hotelia_common',
     'gateway',
     'drf_spectacular',
     'drf_spectacular_sidecar',
@@ -127,6 +131,24 @@ DATABASES = {
     }
 }
 
+# Marcas de revocación de token (hotelia_common.revocation). Las leen todos los workers, así que
+# van en una caché compartida: por defecto una tabla en la base (la crea `migrate`) o Redis con
+# REVOCATION_CACHE_BACKEND=django.core.cache.backends.redis.RedisCache. Con LocMemCache solo
+# funciona con un worker: el aviso del auth-service llega a un único proceso.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "revocations": {
+        "BACKEND": os.getenv("REVOCATION_CACHE_BACKEND", "django.core.cache.backends.db.DatabaseCache"),
+        "LOCATION": os.getenv("REVOCATION_CACHE_LOCATION", "hotelia_revocations"),
+    },
+}
+
+# Cada worker guarda las marcas leídas hasta AUTH_REVOCATION_LOCAL_TTL segundos: ahorra la consulta
+# a CACHES["revocations"] en cada petición a costa de ver las revocaciones de otros workers con ese retraso
+AUTH_REVOCATION_LOCAL_TTL = float(os.getenv("AUTH_REVOCATION_LOCAL_TTL", 2.0))
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -142,6 +164,15 @@ HOTELS_SERVICE_URL = os.getenv("HOTELS_SERVICE_URL")
 RESERVATIONS_SERVICE_URL = os.getenv("RESERVATIONS_SERVICE_URL")
 CHATBOT_SERVICE_URL = os.getenv("CHATBOT_SERVICE_URL")
 
+# Cliente httpx asíncrono del gateway (ver gateway/views.py)
+GATEWAY_HTTP_TIMEOUT = float(os.getenv("GATEWAY_HTTP_TIMEOUT", 15))
+GATEWAY_HTTP_MAX_CONNECTIONS = int(os.getenv("GATEWAY_HTTP_MAX_CONNECTIONS", 1000))
+GATEWAY_HTTP_MAX_KEEPALIVE = int(os.getenv("GATEWAY_HTTP_MAX_KEEPALIVE", 100))
+
+# Identidad firmada que el gateway reenvía a los servicios (ver gateway/identity.py)
+GATEWAY_IDENTITY_TTL = int(os.getenv("GATEWAY_IDENTITY_TTL", 60))
+GATEWAY_PROFILE_CACHE_TTL = int(os.getenv("GATEWAY_PROFILE_CACHE_TTL", 300))
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'gateway.auth_schemes.ExternalServiceAuthentication',
@@ -162,6 +193,8 @@ SPECTACULAR_SETTINGS = {
     'DESCRIPTION': 'Gateway API',
     'VERSION': '1.0.1',
     'SERVE_INCLUDE_SCHEMA': False,
+    # La autenticación del gateway es asíncrona (adrf); las vistas del esquema son DRF síncrono
+    'SERVE_AUTHENTICATION': [],
     'SWAGGER_UI_DIST': 'SIDECAR',
     'SWAGGER_UI_FAVICON_HREF': 'SIDECAR',
     'REDOC_DIST': 'SIDECAR',
@@ -2,10 +2,11 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
+from hotelia_common.views import TokenRevocationView
 
 from gateway.views import (
     AuthLoginView, UserRefreshTokenView,UserView,AuthProfileView,AuthRegisterView, UserLogoutTokenView,
-    HotelView, ReservationView,ReviewView, RoomView, PaymentView, ChatBotView, GeminiChatBotView, OllamaChatBotView
+    AvailabilityView, HotelView, ReservationView,ReviewView, RoomView, PaymentView, ChatBotView, GeminiChatBotView, OllamaChatBotView
 )
 
 router = DefaultRouter()
@@ -18,6 +19,7 @@ router.register(r'users', UserView, basename="users")
 router.register(r'hotels', HotelView, basename="hotels")
 router.register(r'reviews', ReviewView, basename="reviews")
 router.register(r'rooms', RoomView, basename="rooms")
+router.register(r'availability', AvailabilityView, basename="availability")
 router.register(r'reservations', ReservationView, basename="reservation")
 router.register(r'payments', PaymentView, basename="payment")
 router.register(r'chatbot', ChatBotView, basename="chatbot")
@@ -26,6 +28,8 @@ router.register(r'gemini', GeminiChatBotView, basename="chatbot-gemini")
 
 urlpatterns = [
     #path('admin/', admin.site.urls),
+    # Antes del router: si no, auth/<pk>/ de AuthProfileView captura esta ruta
+    path('auth/revoke/', TokenRevocationView.as_view(), name='token-revoke'),
     path('', include(router.urls)),
     path('api_authorization/', include('rest_framework.urls')),
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
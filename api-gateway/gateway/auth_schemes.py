@@ -1,17 +1,78 @@
+import logging
+import time
+
+import httpx
+import jwt
+from django.conf import settings
 from rest_framework.authentication import BaseAuthentication
 from drf_spectacular.extensions import OpenApiAuthenticationExtension
 
+from hotelia_common.revocation import ais_revoked
+
+from .http import http_client
+from .identity import GatewayUser, profiles
+
+logger = logging.getLogger("gateway")
+
+# Los access token de SimpleJWT se firman con el SECRET_KEY compartido del auth-service
+JWT_SIGNING_KEY = getattr(settings, "JWT_SIGNING_KEY", settings.SECRET_KEY)
+JWT_ALGORITHM = getattr(settings, "JWT_ALGORITHM", "HS256")
+
+
+async def fetch_profile(auth_header):
+    try:
+        async with http_client() as client:
+            response = await client.post(f"{settings.USERS_SERVICE_URL}auth/me/",
+                                         headers={"Authorization": auth_header})
+        if response.status_code != 200:
+            return None
+        profile = response.json()
+    except (httpx.HTTPError, ValueError) as e:
+        logger.warning(f"No se pudo obtener el perfil del auth-service: {e}")
+        return None
+    return profile if isinstance(profile, dict) and profile.get("id") else None
+
+
 class ExternalServiceAuthentication(BaseAuthentication):
-    def authenticate(self, request):
-        return None 
+    # Autentica una vez en el gateway: valida el JWT localmente y pide el perfil al auth-service
+    # una sola vez por token. Los servicios reciben la identidad firmada (gateway/identity.py).
+    # Si no se puede autenticar no se rechaza: la petición sigue con Authorization y el
+    # servicio decide como siempre.
+    # Es una corrutina: adrf la espera en el event loop del worker, así la consulta al
+    # auth-service usa el cliente compartido del gateway (gateway/http.py) sin bloquear un hilo.
+    async def authenticate(self, request):
+        auth = request.headers.get("Authorization") or ""
+        parts = auth.split()
+        if len(parts) != 2 or parts[0] != "Bearer":
+            return None
+        try:
+            claims = jwt.decode(parts[1], JWT_SIGNING_KEY, algorithms=[JWT_ALGORITHM],
+                                options={"require": ["exp", "jti"]})
+        except jwt.InvalidTokenError:
+            return None
+        if claims.get("token_type", "access") != "access":
+            return None
+        # Revocado (logout): sin identidad firmada, el servicio rechaza el token por su cuenta
+        if await ais_revoked(claims.get("user_id"), claims.get("sid"), claims.get("iat")):
+            return None
+
+        profile = profiles.get(claims["jti"])
+        if profile is None:
+            profile = await fetch_profile(auth)
+            if profile is None:
+                return None
+            profiles.set(claims["jti"], profile, claims["exp"] - time.time())
+        if not profile.get("is_active", False):
+            return None
+        return (GatewayUser(profile, claims), None)
 
 class BearerAuthExternalServiceScheme(OpenApiAuthenticationExtension):
     target_class = 'gateway.auth_schemes.ExternalServiceAuthentication'
-    name = 'ExternalBearerAuth' 
-    
+    name = 'ExternalBearerAuth'
+
     def get_security_definition(self, auto_schema):
         return {
             'type': 'http',
             'scheme': 'bearer',
-            'bearerFormat': 'JWT' 
-        }
\ No newline at end of file
+            'bearerFormat': 'JWT'
+        }
@@ -0,0 +1,63 @@
+from contextlib import asynccontextmanager
+
+import httpx
+from django.conf import settings
+
+HTTP_TIMEOUT = getattr(settings, "GATEWAY_HTTP_TIMEOUT", 15)
+HTTP_MAX_CONNECTIONS = getattr(settings, "GATEWAY_HTTP_MAX_CONNECTIONS", 1000)
+HTTP_MAX_KEEPALIVE = getattr(settings, "GATEWAY_HTTP_MAX_KEEPALIVE", 100)
+
+# Cliente del worker. Las conexiones de httpx quedan ligadas al event loop que las abrió, así que
+# se crea en el arranque del lifespan de ASGI (el mismo loop que atiende las peticiones) y se
+# cierra en su apagado. Ver core/asgi.py.
+_client = None
+
+
+def build_http_client():
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(HTTP_TIMEOUT),
+        limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS,
+                            max_keepalive_connections=HTTP_MAX_KEEPALIVE),
+    )
+
+
+def shared_http_client():
+    # None fuera de un servidor ASGI con lifespan (runserver, WSGI, tests)
+    return _client
+
+
+@asynccontextmanager
+async def http_client():
+    # Sin cliente del worker cada petición corre en su propio event loop: se usa un cliente
+    # propio que se cierra al salir, en vez de dejar uno abierto por loop.
+    if _client is not None:
+        yield _client
+    else:
+        async with build_http_client() as client:
+            yield client
+
+
+async def startup():
+    global _client
+    if _client is None:
+        _client = build_http_client()
+
+
+async def shutdown():
+    global _client
+    client, _client = _client, None
+    if client is not None:
+        await client.aclose()
+
+
+async def lifespan(receive, send):
+    # Protocolo lifespan de ASGI; el ASGIHandler de Django solo atiende peticiones HTTP
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await startup()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await shutdown()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
@@ -0,0 +1,63 @@
+import base64
+import hashlib
+import hmac
+import json
+import time
+
+from django.conf import settings
+
+from hotelia_common.cache import TTLCache
+
+# Encabezado con la identidad ya verificada por el gateway; lo firma con el token compartido
+# del servicio destino (X-Hotel-Gateway-Token, X-Reservation-Gateway-Token...)
+IDENTITY_HEADER = "X-Gateway-Identity"
+# Segundos de validez de cada sobre: solo tiene que sobrevivir al salto gateway -> servicio
+IDENTITY_TTL = getattr(settings, "GATEWAY_IDENTITY_TTL", 60)
+PROFILE_CACHE_TTL = getattr(settings, "GATEWAY_PROFILE_CACHE_TTL", 300)
+PROFILE_CACHE_SIZE = getattr(settings, "GATEWAY_PROFILE_CACHE_SIZE", 10000)
+
+profiles = TTLCache(PROFILE_CACHE_SIZE, PROFILE_CACHE_TTL)
+
+
+class GatewayUser:
+    # Usuario autenticado en el gateway con el perfil del auth-service y los datos del token
+    is_active = True
+    is_anonymous = False
+    is_authenticated = True
+
+    def __init__(self, profile, claims):
+        self.id = self.pk = profile.get("id")
+        self.email = self.username = profile.get("email")
+        self.groups = profile.get("groups") or []
+        self.is_staff = profile.get("is_staff", False)
+        self.is_superuser = profile.get("is_superuser", False)
+        self.is_active = profile.get("is_active", False)
+        self.claims = claims
+
+    def __str__(self):
+        return f"{self.email}"
+
+    def identity(self):
+        # Campos que viajan en el sobre; iat y sid permiten a los servicios aplicar sus revocaciones
+        return {
+            "id": self.id,
+            "email": self.email,
+            "groups": self.groups if isinstance(self.groups, list) else [],
+            "is_staff": self.is_staff,
+            "is_superuser": self.is_superuser,
+            "is_active": self.is_active,
+            "iat": self.claims.get("iat"),
+            "sid": self.claims.get("sid"),
+            "exp": min(int(time.time()) + IDENTITY_TTL, self.claims.get("exp", 0)),
+        }
+
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def sign_identity(identity, key):
+    """Devuelve "<payload>.<firma>" en base64url, con HMAC-SHA256 sobre el payload JSON."""
+    payload = _b64(json.dumps(identity, separators=(",", ":"), sort_keys=True).encode())
+    signature = hmac.new(key.encode(), payload.encode(), hashlib.sha256).digest()
+    return f"{payload}.{_b64(signature)}"
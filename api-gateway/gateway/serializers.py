@@ -209,4 +209,7 @@ class ChatResponseSerializer(serializers.Serializer):
 
 class ChatRequestSerializer(serializers.Serializer):
     query = serializers.CharField(
-        required=True, help_text="Texto o pregunta del usuario para el asistente de reservas.")
\ No newline at end of file
+        required=True, help_text="Texto o pregunta del usuario para el asistente de reservas.")
+    stream = serializers.BooleanField(
+        required=False, default=False,
+        help_text="Si es true la respuesta llega en JSON por línea (application/x-ndjson) a medida que se genera.")
\ No newline at end of file
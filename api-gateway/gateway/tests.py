@@ -1,3 +1,132 @@
-from django.test import TestCase
+import asyncio
+import time
+import uuid
+from contextlib import asynccontextmanager
+from unittest import mock
 
-# Create your tests here.
+import httpx
+import jwt
+from asgiref.sync import sync_to_async
+from django.test import RequestFactory, TestCase
+from rest_framework.exceptions import AuthenticationFailed
+
+from hotelia_common.authentication import verify_identity
+from hotelia_common.revocation import local_markers, revoke_session, revoke_user_tokens
+
+from . import auth_schemes, http
+from .auth_schemes import JWT_ALGORITHM, JWT_SIGNING_KEY, ExternalServiceAuthentication
+from .identity import IDENTITY_HEADER, GatewayUser, profiles, sign_identity
+from .views import BaseViewSet
+
+PROFILE = {"id": 7, "email": "cliente@example.com", "groups": ["cliente"], "is_active": True}
+
+
+def access_token(**claims):
+    now = int(time.time())
+    claims = {"user_id": 7, "jti": uuid.uuid4().hex, "sid": "s1", "iat": now, "exp": now + 300,
+              "token_type": "access", **claims}
+    return jwt.encode(claims, JWT_SIGNING_KEY, algorithm=JWT_ALGORITHM)
+
+
+class IdentityEnvelopeTests(TestCase):
+    def setUp(self):
+        local_markers.clear()
+        self.user = GatewayUser(PROFILE, {"iat": int(time.time()), "sid": "s1", "exp": int(time.time()) + 300})
+
+    def test_services_accept_the_envelope_signed_with_their_token(self):
+        identity = verify_identity(sign_identity(self.user.identity(), "rt"), "rt")
+        self.assertEqual((identity["id"], identity["groups"], identity["sid"]), (7, ["cliente"], "s1"))
+
+    def test_rejects_other_keys_and_tampered_payloads(self):
+        envelope = sign_identity(self.user.identity(), "rt")
+        self.assertIsNone(verify_identity(envelope, "ht"))
+        forged = sign_identity({**self.user.identity(), "is_staff": True}, "otra")
+        self.assertIsNone(verify_identity(f"{forged.split('.')[0]}.{envelope.split('.')[1]}", "rt"))
+
+    def test_never_outlives_the_access_token(self):
+        user = GatewayUser(PROFILE, {"exp": int(time.time()) - 1})
+        self.assertIsNone(verify_identity(sign_identity(user.identity(), "rt"), "rt"))
+
+    def test_revoked_sessions_are_refused_by_the_service(self):
+        envelope = sign_identity(self.user.identity(), "rt")
+        revoke_session("s1")
+        with self.assertRaises(AuthenticationFailed):
+            verify_identity(envelope, "rt")
+
+    def test_views_forward_the_signed_identity(self):
+        request = RequestFactory().get("/api/reservations/")
+        request.user = self.user
+        view = BaseViewSet()
+        view.SERVICE_TOKEN_HEADER = ("X-Reservation-Gateway-Token", "rt")
+
+        headers = view.get_headers(request)
+        self.assertEqual(headers["X-Reservation-Gateway-Token"], "rt")
+        self.assertEqual(verify_identity(headers[IDENTITY_HEADER], "rt")["email"], "cliente@example.com")
+
+
+class ExternalServiceAuthenticationTests(TestCase):
+    def setUp(self):
+        profiles.clear()
+        local_markers.clear()
+        self.calls = 0
+        patcher = mock.patch.object(auth_schemes, "http_client", self.client_for_tests)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @asynccontextmanager
+    async def client_for_tests(self):
+        def handle(request):
+            self.calls += 1
+            return httpx.Response(200, json=PROFILE)
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handle)) as client:
+            yield client
+
+    async def authenticate(self, token):
+        request = RequestFactory().get("/", headers={"Authorization": f"Bearer {token}"})
+        return await ExternalServiceAuthentication().authenticate(request)
+
+    async def test_fetches_the_profile_once_per_token(self):
+        token = access_token()
+        user, _ = await self.authenticate(token)
+        await self.authenticate(token)
+
+        self.assertEqual((user.id, user.groups), (7, ["cliente"]))
+        self.assertEqual(self.calls, 1)
+
+    async def test_leaves_revoked_tokens_to_the_service(self):
+        await sync_to_async(revoke_session)("s1")
+        self.assertIsNone(await self.authenticate(access_token()))
+        self.assertEqual(self.calls, 0)
+
+    async def test_tokens_issued_after_a_user_revocation_still_pass(self):
+        await sync_to_async(revoke_user_tokens)(7, time.time() - 10)
+        self.assertIsNone(await self.authenticate(access_token(iat=int(time.time()) - 20)))
+        self.assertIsNotNone(await self.authenticate(access_token()))
+
+    async def test_ignores_refresh_and_invalid_tokens(self):
+        self.assertIsNone(await self.authenticate(access_token(token_type="refresh")))
+        self.assertIsNone(await self.authenticate("no-es-un-jwt"))
+        self.assertEqual(self.calls, 0)
+
+
+class LifespanTests(TestCase):
+    async def test_opens_the_worker_client_on_startup_and_closes_it_on_shutdown(self):
+        received, sent = asyncio.Queue(), []
+        for message in ("lifespan.startup", "lifespan.shutdown"):
+            received.put_nowait({"type": message})
+
+        async def send(message):
+            sent.append(message["type"])
+            if message["type"] == "lifespan.startup.complete":
+                self.client = http.shared_http_client()
+
+        await http.lifespan(received.get, send)
+        self.assertEqual(sent, ["lifespan.startup.complete", "lifespan.shutdown.complete"])
+        self.assertTrue(self.client.is_closed)
+        self.assertIsNone(http.shared_http_client())
+
+    async def test_without_lifespan_each_request_gets_its_own_client(self):
+        async with http.http_client() as client:
+            pass
+        self.assertTrue(client.is_closed)
@@ -3,12 +3,14 @@ from json import JSONDecodeError
 
 import httpx
 from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
 from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.parsers import FileUploadParser, MultiPartParser
 # from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from rest_framework.viewsets import ViewSet
+from adrf.viewsets import ViewSet
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes
 
 from .serializers import (
@@ -33,6 +35,8 @@ from .serializers import (
 )
 
 from .auth_schemes import ExternalServiceAuthentication
+from .http import http_client, shared_http_client
+from .identity import IDENTITY_HEADER, GatewayUser, sign_identity
 
 # Asegúrate de que 'ExternalBearerAuth' es el 'name' definido en tu OpenApiAuthenticationExtension
 SECURITY_SCHEME_NAME = 'ExternalBearerAuth'
@@ -43,16 +47,22 @@ logger = logging.getLogger("gateway")
 if not logging.getLogger().handlers:
     logging.basicConfig(level=logging.INFO)
 
-HTTP_TIMEOUT = getattr(settings, "GATEWAY_HTTP_TIMEOUT", 15)
-HTTP_MAX_CONNECTIONS = getattr(settings, "GATEWAY_HTTP_MAX_CONNECTIONS", 50)
-HTTP_MAX_KEEPALIVE = getattr(settings, "GATEWAY_HTTP_MAX_KEEPALIVE", 10)
+# Encabezados del servicio que se copian al transmitir la respuesta sin re-serializarla
+PASSTHROUGH_HEADERS = ("Content-Type", "Content-Length", "Content-Encoding", "ETag", "Cache-Control",
+                       "X-Accel-Buffering", "Retry-After")
 
-# Un cliente global que reutiliza conexiones
-CLIENT = httpx.Client(
-    timeout=httpx.Timeout(HTTP_TIMEOUT),
-    limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS,
-                        max_keepalive_connections=HTTP_MAX_KEEPALIVE),
-)
+
+# Parámetros comunes de los listados paginados por cursor y de selección de campos
+FIELDS_PARAMETER = OpenApiParameter(
+    name='fields', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY, required=False,
+    description='Campos a devolver separados por coma (p. ej. id,name). Por defecto todos.')
+PAGINATION_PARAMETERS = [
+    OpenApiParameter(name='cursor', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY, required=False,
+                     description='Cursor opaco devuelto en "next"/"previous" de la página anterior.'),
+    OpenApiParameter(name='page_size', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY, required=False,
+                     description='Cantidad de elementos por página (máximo 100).'),
+    FIELDS_PARAMETER,
+]
 
 
 USERS_SERVICE_URL = settings.USERS_SERVICE_URL
@@ -60,20 +70,25 @@ HOTELS_SERVICE_URL = settings.HOTELS_SERVICE_URL
 RESERVATIONS_SERVICE_URL = settings.RESERVATIONS_SERVICE_URL
 CHAT_SERVICE_URL = getattr(settings, "CHATBOT_SERVICE_URL", None)
 
+# Token compartido con cada servicio; también firma la identidad que se le reenvía
+HOTEL_TOKEN_HEADER = ("X-Hotel-Gateway-Token", getattr(settings, "HOTEL_SERVICE_TOKEN", ""))
+RESERVATION_TOKEN_HEADER = ("X-Reservation-Gateway-Token", getattr(settings, "RESERVATION_TOKEN", ""))
+CHATBOT_TOKEN_HEADER = ("X-Chatbot-Gateway-Token", getattr(settings, "CHATBOT_TOKEN", ""))
+
 
 def get_auth_header_from_request(request):
     auth = request.headers.get("Authorization")
     return {"Authorization": auth} if auth else {}
 
-http_client = httpx.Client(
-    timeout=settings.HTTP_TIMEOUT if hasattr(settings, "HTTP_TIMEOUT") else 15,
-    limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
-)
-
 
 class BaseViewSet(ViewSet):
-    # Base reutilizable para todos los microservicios del Gateway. Usa sesión httpx global con keepalive y logging.
+    # Base reutilizable para todos los microservicios del Gateway. Usa un cliente httpx asíncrono
+    # con keepalive, así un worker puede mantener miles de peticiones en vuelo sin bloquearse.
+    # Por defecto las respuestas se transmiten tal cual (STREAM_RESPONSES); las vistas que
+    # necesiten inspeccionar el cuerpo pueden pasar stream=False a _request.
     SERVICE_URL = None
+    SERVICE_TOKEN_HEADER = None
+    STREAM_RESPONSES = True
 
     def get_headers(self, request):
         auth = request.headers.get("Authorization")
@@ -85,27 +100,95 @@ class BaseViewSet(ViewSet):
                 logger.warning(f"Encabezado Authorization inválido: '{auth}'")
             headers["Authorization"] = auth
 
+        # Identidad ya verificada por ExternalServiceAuthentication, firmada con el token del
+        # servicio: así el servicio no vuelve a consultar al auth-service
+        if self.SERVICE_TOKEN_HEADER and self.SERVICE_TOKEN_HEADER[1]:
+            name, token = self.SERVICE_TOKEN_HEADER
+            headers[name] = token
+            user = getattr(request, "user", None)
+            if isinstance(user, GatewayUser):
+                headers[IDENTITY_HEADER] = sign_identity(user.identity(), token)
+
+        # Lecturas condicionales: el servicio responde 304 si el contenido no cambió
+        if request.method in ("GET", "HEAD") and request.headers.get("If-None-Match"):
+            headers["If-None-Match"] = request.headers["If-None-Match"]
+
         return headers
 
-    def _request(self, method, endpoint, request=None, **kwargs):
+    def can_stream(self, request):
+        # El paso directo de bytes solo es seguro bajo ASGI: con WSGI Django consumiría el
+        # iterador asíncrono en otro event loop distinto al que abrió la conexión upstream.
+        return self.STREAM_RESPONSES and request is not None and isinstance(
+            getattr(request, "_request", request), ASGIRequest)
+
+    def stream_response(self, response):
+        async def body():
+            try:
+                async for chunk in response.aiter_raw():
+                    yield chunk
+            except httpx.HTTPError as e:
+                logger.error(f"Error de red transmitiendo {response.url}: {e}")
+            finally:
+                await response.aclose()
+
+        proxied = StreamingHttpResponse(body(), status=response.status_code)
+        for header in PASSTHROUGH_HEADERS:
+            if header in response.headers:
+                proxied[header] = response.headers[header]
+        return proxied
+
+    def not_modified_response(self, response):
+        proxied = HttpResponseNotModified()
+        for header in ("ETag", "Cache-Control"):
+            if header in response.headers:
+                proxied[header] = response.headers[header]
+        return proxied
+
+    async def _request(self, method, endpoint, request=None, stream=None, **kwargs):
         url = f"{self.SERVICE_URL.rstrip('/')}/{endpoint.lstrip('/')}"
         headers = kwargs.pop("headers", {})
+        stream = self.can_stream(request) if stream is None else stream
+        # La respuesta transmitida sobrevive a la vista: solo con el cliente del worker
+        stream = stream and shared_http_client() is not None
 
         if request:
             headers.update(self.get_headers(request))
 
         try:
             logger.info(f"{method.upper()} {url}")
-            response = http_client.request(
-                method, url, headers=headers, **kwargs)
+            async with http_client() as client:
+                response = await client.send(
+                    client.build_request(method, url, headers=headers, **kwargs), stream=stream)
             logger.info(f"{response.status_code} {url}")
 
+            if response.status_code == status.HTTP_304_NOT_MODIFIED:
+                if stream:
+                    await response.aclose()
+                return self.not_modified_response(response)
+
+            if stream:
+                content_type = response.headers.get("Content-Type", "")
+                if response.status_code < 400 or "json" in content_type:
+                    return self.stream_response(response)
+                # Errores no-JSON (p. ej. una página HTML de Django) se normalizan igual que antes
+                await response.aread()
+                await response.aclose()
+
+            if response.headers.get("Content-Type", "").startswith("application/x-ndjson"):
+                # Respuestas por línea (chatbot con stream) sin transmisión: se entregan completas
+                return HttpResponse(response.content, status=response.status_code,
+                                    content_type=response.headers["Content-Type"])
+
             try:
                 data = response.json()
             except ValueError:
                 data = {"detail": response.text}
 
-            return Response(data, status=response.status_code)
+            proxied = Response(data, status=response.status_code)
+            for header in ("ETag", "Cache-Control", "Retry-After"):
+                if header in response.headers:
+                    proxied[header] = response.headers[header]
+            return proxied
 
         except httpx.RequestError as e:
             logger.error(f"Error de red al contactar {url}: {e}")
@@ -131,10 +214,10 @@ class AuthLoginView(BaseViewSet):
     serializer_class = UserLoginSerializer
 
     @extend_schema(summary="Inicio de sesión de usuario")
-    def create(self, request, *args, **kwargs):
+    async def create(self, request, *args, **kwargs):
         serializer = self.serializer_class(data=request.data)
         serializer.is_valid(raise_exception=True)
-        return self._request("POST", "auth/login/", request=request, json=serializer.validated_data)
+        return await self._request("POST", "auth/login/", request=request, json=serializer.validated_data)
 
 
 class AuthRegisterView(BaseViewSet):
@@ -142,10 +225,10 @@ class AuthRegisterView(BaseViewSet):
     serializer_class = UserRegisterSerializer
 
     @extend_schema(summary="Registro de usuarios")
-    def create(self, request, *args, **kwargs):
+    async def create(self, request, *args, **kwargs):
         serializer = self.serializer_class(data=request.data)
         serializer.is_valid(raise_exception=True)
-        return self._request("POST", "auth/register/", request=request, json=serializer.validated_data)
+        return await self._request("POST", "auth/register/", request=request, json=serializer.validated_data)
 
 
 class AuthProfileView(BaseViewSet):
@@ -155,8 +238,8 @@ class AuthProfileView(BaseViewSet):
         responses=UserProfileResponseSerializer,
         summary="Obtiene el perfil del usuario autenticado")
     @action(detail=False, methods=["post"])
-    def profile(self, request):
-        return self._request("post", "auth/me/", request=request)
+    async def profile(self, request):
+        return await self._request("post", "auth/me/", request=request)
 
 
 class UserRefreshTokenView(BaseViewSet):
@@ -164,53 +247,54 @@ class UserRefreshTokenView(BaseViewSet):
     serializer_class = UserRefreshSerializer
 
     @extend_schema(summary="Renovación del token de acceso")
-    def create(self, request, *args, **kwargs):
+    async def create(self, request, *args, **kwargs):
         serializer = self.serializer_class(data=request.data)
         serializer.is_valid(raise_exception=True)
-        return self._request("POST", "auth/refresh/", request=request, json=serializer.validated_data)
+        return await self._request("POST", "auth/refresh/", request=request, json=serializer.validated_data)
 
 class UserLogoutTokenView(BaseViewSet):
     SERVICE_URL = USERS_SERVICE_URL
     serializer_class = UserLogoutSerializer
 
     @extend_schema(summary="Cerrar sesión del usuario")
-    def create(self, request, *args, **kwargs):
+    async def create(self, request, *args, **kwargs):
         serializer = self.serializer_class(data=request.data)
         serializer.is_valid(raise_exception=True)
-        return self._request("POST", "auth/logout/", request=request, json=serializer.validated_data)
+        return await self._request("POST", "auth/logout/", request=request, json=serializer.validated_data)
 
 
 class UserView(BaseViewSet):
     SERVICE_URL = USERS_SERVICE_URL
     serializer_class = UserSerializer
 
-    @extend_schema(summary="Obtiene los detalles de un usuario")
-    def retrieve(self, request, pk=None, *args, **kwargs):
-        return self._request("GET", f"auth/{pk}/", request=request)
+    @extend_schema(parameters=[FIELDS_PARAMETER], summary="Obtiene los detalles de un usuario")
+    async def retrieve(self, request, pk=None, *args, **kwargs):
+        return await self._request("GET", f"auth/{pk}/", request=request, params=request.query_params)
 
-    @extend_schema(summary="Obtiene la lista de usuarios")
-    def list(self, request, *args, **kwargs):
-        return self._request("GET", "auth/", request=request)
+    @extend_schema(parameters=PAGINATION_PARAMETERS, summary="Obtiene la lista de usuarios")
+    async def list(self, request, *args, **kwargs):
+        return await self._request("GET", "auth/", request=request, params=request.query_params)
 
     @extend_schema(summary="Actualiza los detalles de un usuario")
-    def update(self, request, pk=None, *args, **kwargs):
+    async def update(self, request, pk=None, *args, **kwargs):
         serializer = UpdateUserSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        return self._request("PUT", f"auth/{pk}/", request=request, json=serializer.validated_data)
+        return await self._request("PUT", f"auth/{pk}/", request=request, json=serializer.validated_data)
 
     @extend_schema(summary="Actualiza la contraseña de un usuario")
-    def partial_update(self, request, pk=None, *args, **kwargs):
+    async def partial_update(self, request, pk=None, *args, **kwargs):
         serializer = UpdateUserPasswordSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        return self._request("POST", f"auth/{pk}/password", request=request, json=serializer.validated_data)
+        return await self._request("POST", f"auth/{pk}/password", request=request, json=serializer.validated_data)
 
     @extend_schema(summary="Elimina un usuario")
-    def destroy(self, request, pk=None, *args, **kwargs):
-        return self._request("DELETE", f"auth/{pk}/", request=request)
+    async def destroy(self, request, pk=None, *args, **kwargs):
+        return await self._request("DELETE", f"auth/{pk}/", request=request)
 
 
 class HotelView(BaseViewSet):
     SERVICE_URL = HOTELS_SERVICE_URL
+    SERVICE_TOKEN_HEADER = HOTEL_TOKEN_HEADER
     parser_classes = [MultiPartParser, FileUploadParser]
     serializer_class = HotelSerializer
 
@@ -228,30 +312,31 @@ class HotelView(BaseViewSet):
                 description='Introduce una ciudad para filtrar los hoteles',
                 required=False,
             ),
+            *PAGINATION_PARAMETERS,
         ],
         summary="Obtiene la lista de hoteles"
     )
-    def list(self, request, *args, **kwargs):
-        return self._request("GET", "hotels/", request=request, params=request.query_params)
+    async def list(self, request, *args, **kwargs):
+        return await self._request("GET", "hotels/", request=request, params=request.query_params)
 
     @extend_schema(summary="Crea un hotel")
-    def create(self, request, *args, **kwargs):
+    async def create(self, request, *args, **kwargs):
         headers = {}
         data = {k: v for k, v in request.data.items() if k != "image"}
         files = None
         if "image" in request.FILES:
             image = request.FILES["image"]
             files = {"image": (image.name, image.file, image.content_type)}
-            return self._request("POST", "hotels/", request=request, files=files, data=data, headers=headers, timeout=30)
+            return await self._request("POST", "hotels/", request=request, files=files, data=data, headers=headers, timeout=30)
 
-        return self._request("POST", "hotels/", request=request, json=request.data)
+        return await self._request("POST", "hotels/", request=request, json=request.data)
 
-    @extend_schema(summary="Obtiene los detalles de un hotel")
-    def retrieve(self, request, pk=None, *args, **kwargs):
-        return self._request("GET", f"hotels/{pk}/", request=request)
+    @extend_schema(parameters=[FIELDS_PARAMETER], summary="Obtiene los detalles de un hotel")
+    async def retrieve(self, request, pk=None, *args, **kwargs):
+        return await self._request("GET", f"hotels/{pk}/", request=request, params=request.query_params)
 
     @extend_schema(summary="Actualiza los detalles de un hotel")
-    def update(self, request, pk=None, *args, **kwargs):
+    async def update(self, request, pk=None, *args, **kwargs):
         headers = {}
         data = {k: v for k, v in request.data.items() if k != "image"}
         files = None
@@ -260,11 +345,11 @@ class HotelView(BaseViewSet):
 
             files = {"image": (image.name, image.file, image.content_type)}
 
-            return self._request("PUT", f"hotels/{pk}/", request=request, files=files, data=data, headers=headers, timeout=30)
+            return await self._request("PUT", f"hotels/{pk}/", request=request, files=files, data=data, headers=headers, timeout=30)
 
     @extend_schema(summary="Elimina un hotel")
-    def destroy(self, request, pk=None, *args, **kwargs):
-        return self._request("DELETE", f"hotels/{pk}/", request=request)
+    async def destroy(self, request, pk=None, *args, **kwargs):
+        return await self._request("DELETE", f"hotels/{pk}/", request=request)
 
     @extend_schema(
         parameters=[
@@ -279,40 +364,39 @@ class HotelView(BaseViewSet):
         summary="Obtiene el top de hoteles"
     )
     @action(detail=False, methods=["GET"])
-    def top(self, request):
-        return self._request("GET", "hotels/top/", request=request, params=request.query_params)
+    async def top(self, request):
+        return await self._request("GET", "hotels/top/", request=request, params=request.query_params)
 
 
 class ReviewView(BaseViewSet):
     SERVICE_URL = HOTELS_SERVICE_URL
+    SERVICE_TOKEN_HEADER = HOTEL_TOKEN_HEADER
     serializer_class = ReviewSerializer
 
-    @extend_schema(summary="Obtiene la lista de reseñas")
-    def list(self, request, *args, **kwargs):
-        return self._request("GET", "reviews/", request=request, params=request.query_params)
+    @extend_schema(parameters=PAGINATION_PARAMETERS, summary="Obtiene la lista de reseñas")
+    async def list(self, request, *args, **kwargs):
+        return await self._request("GET", "reviews/", request=request, params=request.query_params)
 
     @extend_schema(summary="Crea una reseña")
-    def create(self, request, *args, **kwargs):
-
-        self.SERVICE_TOKEN_HEADER = (
-            "X-Hotel-Gateway-Token", getattr(settings, "HOTEL_SERVICE_TOKEN", ""))
-        return self._request("POST", "reviews/", request=request, json=request.data)
+    async def create(self, request, *args, **kwargs):
+        return await self._request("POST", "reviews/", request=request, json=request.data)
 
-    @extend_schema(summary="Obtiene los detalles de una reseña")
-    def retrieve(self, request, pk=None, *args, **kwargs):
-        return self._request("GET", f"reviews/{pk}/", request=request)
+    @extend_schema(parameters=[FIELDS_PARAMETER], summary="Obtiene los detalles de una reseña")
+    async def retrieve(self, request, pk=None, *args, **kwargs):
+        return await self._request("GET", f"reviews/{pk}/", request=request, params=request.query_params)
 
     @extend_schema(summary="Actualiza los detalles de una reseña")
-    def update(self, request, pk=None, *args, **kwargs):
-        return self._request("PUT", f"reviews/{pk}/", request=request, json=request.data)
+    async def update(self, request, pk=None, *args, **kwargs):
+        return await self._request("PUT", f"reviews/{pk}/", request=request, json=request.data)
 
     @extend_schema(summary="Elimina una reseña")
-    def destroy(self, request, pk=None, *args, **kwargs):
-        return self._request("DELETE", f"reviews/{pk}/", request=request)
+    async def destroy(self, request, pk=None, *args, **kwargs):
+        return await self._request("DELETE", f"reviews/{pk}/", request=request)
 
 
 class RoomView(BaseViewSet):
     SERVICE_URL = HOTELS_SERVICE_URL
+    SERVICE_TOKEN_HEADER = HOTEL_TOKEN_HEADER
     serializer_class = RoomSerializer
 
     def get_serializer_class(self):
@@ -335,34 +419,61 @@ class RoomView(BaseViewSet):
         summary="Obtiene el top de habitaciones"
     )
     @action(detail=False, methods=["GET"])
-    def top_rooms(self, request):
-        return self._request("GET", "rooms/top_rooms/", request=request, params=request.query_params)
+    async def top_rooms(self, request):
+        return await self._request("GET", "rooms/top_rooms/", request=request, params=request.query_params)
 
-    @extend_schema(summary="Obtiene la lista de habitaciones")
-    def list(self, request, *args, **kwargs):
-        return self._request("GET", "rooms/", request=request, params=request.query_params)
+    @extend_schema(parameters=PAGINATION_PARAMETERS, summary="Obtiene la lista de habitaciones")
+    async def list(self, request, *args, **kwargs):
+        return await self._request("GET", "rooms/", request=request, params=request.query_params)
 
     @extend_schema(summary="Crea una habitación")
-    def create(self, request, *args, **kwargs):
-        return self._request("POST", "rooms/", request=request, json=request.data)
+    async def create(self, request, *args, **kwargs):
+        return await self._request("POST", "rooms/", request=request, json=request.data)
 
-    @extend_schema(summary="Obtiene los detalles de una habitación")
-    def retrieve(self, request, pk=None, *args, **kwargs):
-        return self._request("GET", f"rooms/{pk}/", request=request)
+    @extend_schema(parameters=[FIELDS_PARAMETER], summary="Obtiene los detalles de una habitación")
+    async def retrieve(self, request, pk=None, *args, **kwargs):
+        return await self._request("GET", f"rooms/{pk}/", request=request, params=request.query_params)
 
     @extend_schema(summary="Actualiza los detalles de una habitación")
-    def update(self, request, pk=None, *args, **kwargs):
-        return self._request("PUT", f"rooms/{pk}/", request=request, json=request.data)
+    async def update(self, request, pk=None, *args, **kwargs):
+        return await self._request("PUT", f"rooms/{pk}/", request=request, json=request.data)
 
     @extend_schema(summary="Elimina una habitación")
-    def destroy(self, request, pk=None, *args, **kwargs):
-        return self._request("DELETE", f"rooms/{pk}/", request=request)
+    async def destroy(self, request, pk=None, *args, **kwargs):
+        return await self._request("DELETE", f"rooms/{pk}/", request=request)
+
+
+class AvailabilityView(BaseViewSet):
+    SERVICE_URL = HOTELS_SERVICE_URL
+    SERVICE_TOKEN_HEADER = HOTEL_TOKEN_HEADER
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(name='start_date', type=OpenApiTypes.DATE, location=OpenApiParameter.QUERY,
+                             description='Fecha de entrada (YYYY-MM-DD)', required=True),
+            OpenApiParameter(name='end_date', type=OpenApiTypes.DATE, location=OpenApiParameter.QUERY,
+                             description='Fecha de salida (YYYY-MM-DD)', required=True),
+            OpenApiParameter(name='city', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY,
+                             description='Ciudad del hotel', required=False),
+            OpenApiParameter(name='capacity', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY,
+                             description='Capacidad mínima de la habitación', required=False),
+            OpenApiParameter(name='room_type', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY,
+                             description='Tipo de habitación', required=False),
+            OpenApiParameter(name='max_price', type=OpenApiTypes.NUMBER, location=OpenApiParameter.QUERY,
+                             description='Precio máximo por noche', required=False),
+            OpenApiParameter(name='cursor', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY,
+                             description='Valor de "next" de la página anterior', required=False),
+        ],
+        summary="Busca habitaciones disponibles en un rango de fechas"
+    )
+    @action(detail=False, methods=["GET"])
+    async def search(self, request):
+        return await self._request("GET", "availability/search/", request=request, params=request.query_params)
 
 
 class ReservationView(BaseViewSet):
     SERVICE_URL = RESERVATIONS_SERVICE_URL
-    SERVICE_TOKEN_HEADER = ("X-Reservation-Gateway-Token",
-                            getattr(settings, "RESERVATION_TOKEN", ""))
+    SERVICE_TOKEN_HEADER = RESERVATION_TOKEN_HEADER
 
     def get_serializer_class(self):
         if self.action == "create":
@@ -373,93 +484,94 @@ class ReservationView(BaseViewSet):
             return ExtendReservationSerializer
         return None
 
-    @extend_schema(summary="Obtiene la lista de reservas")
-    def list(self, request, *args, **kwargs):
-        return self._request("GET", "reservations/", request=request, params=request.query_params)
+    @extend_schema(parameters=PAGINATION_PARAMETERS, summary="Obtiene la lista de reservas")
+    async def list(self, request, *args, **kwargs):
+        return await self._request("GET", "reservations/", request=request, params=request.query_params)
 
     @extend_schema(summary="Crea una reserva")
-    def create(self, request, *args, **kwargs):
+    async def create(self, request, *args, **kwargs):
         serializer = CreateReservationSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        return self._request("POST", "reservations/", request=request, json=serializer.data, timeout=30)
+        return await self._request("POST", "reservations/", request=request, json=serializer.data, timeout=30)
 
-    @extend_schema(summary="Obtiene los detalles de una reserva")
-    def retrieve(self, request, pk=None, *args, **kwargs):
-        return self._request("GET", f"reservations/{pk}/", request=request)
+    @extend_schema(parameters=[FIELDS_PARAMETER], summary="Obtiene los detalles de una reserva")
+    async def retrieve(self, request, pk=None, *args, **kwargs):
+        return await self._request("GET", f"reservations/{pk}/", request=request, params=request.query_params)
 
     @extend_schema(summary="Actualiza los detalles de una reserva")
-    def update(self, request, pk=None, *args, **kwargs):
-        return self._request("PUT", f"reservations/{pk}/", request=request, json=request.data)
+    async def update(self, request, pk=None, *args, **kwargs):
+        return await self._request("PUT", f"reservations/{pk}/", request=request, json=request.data)
 
-    @extend_schema(summary="Obtiene la lista de pagos de una reservación")
+    @extend_schema(parameters=PAGINATION_PARAMETERS[:2], summary="Obtiene la lista de pagos de una reservación")
     @action(detail=True, methods=["get"])
-    def payments(self, request, pk=None):
-        return self._request("GET", f"reservations/{pk}/payments/", request=request)
+    async def payments(self, request, pk=None):
+        return await self._request("GET", f"reservations/{pk}/payments/", request=request,
+                                   params=request.query_params)
 
     @extend_schema(summary="Elimina una reservación")
-    def destroy(self, request, pk=None, *args, **kwargs):
-        return self._request("DELETE", f"reservations/{pk}/", request=request)
+    async def destroy(self, request, pk=None, *args, **kwargs):
+        return await self._request("DELETE", f"reservations/{pk}/", request=request)
 
-    @extend_schema(summary="Obtiene la lista de reservas del usuario logeado")
+    @extend_schema(parameters=PAGINATION_PARAMETERS, summary="Obtiene la lista de reservas del usuario logeado")
     @action(detail=False, methods=["GET"])
-    def user(self, request):
-        return self._request("GET", f"reservations/user/", request=request)
+    async def user(self, request):
+        return await self._request("GET", f"reservations/user/", request=request, params=request.query_params)
     
     @extend_schema(summary="Modifica el estado de la reservación")
-    def partial_update(self, request, pk=None, *args, **kwargs):
-        return self._request("PATCH", f"reservations/{pk}/", request=request, json=request.data)
+    async def partial_update(self, request, pk=None, *args, **kwargs):
+        return await self._request("PATCH", f"reservations/{pk}/", request=request, json=request.data)
 
     @extend_schema(summary="Elimina una reservación")
-    def destroy(self, request, pk=None, *args, **kwargs):
-        return self._request("DELETE", f"reservations/{pk}/", request=request)
+    async def destroy(self, request, pk=None, *args, **kwargs):
+        return await self._request("DELETE", f"reservations/{pk}/", request=request)
 
     @extend_schema(summary="Cancela una reservación")
     @action(detail=True, methods=["post"])
-    def cancel(self, request, pk=None):
-        return self._request("POST", f"reservations/{pk}/cancel/", request=request)
+    async def cancel(self, request, pk=None):
+        return await self._request("POST", f"reservations/{pk}/cancel/", request=request)
 
     @extend_schema(summary="Extiende la fecha de salida de una reservación")
     @action(detail=True, methods=["post"])
-    def extend(self, request, pk=None):
+    async def extend(self, request, pk=None):
         serializer = ExtendReservationSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        return self._request("POST", f"reservations/{pk}/extend_reservation/", request=request, json=serializer.data)
+        return await self._request("POST", f"reservations/{pk}/extend_reservation/", request=request, json=serializer.data)
 
 
 class PaymentView(BaseViewSet):
     SERVICE_URL = RESERVATIONS_SERVICE_URL
     serializer_class = PaymentSerializer
-    SERVICE_TOKEN_HEADER = ("X-Reservation-Gateway-Token",
-                            getattr(settings, "RESERVATION_TOKEN", ""))
+    SERVICE_TOKEN_HEADER = RESERVATION_TOKEN_HEADER
 
     @extend_schema(summary="Estadísticas de pagos")
     @action(detail=False, methods=["get"])
-    def stats(self, request):
-        return self._request("GET", "payments/stats/", request=request)
+    async def stats(self, request):
+        return await self._request("GET", "payments/stats/", request=request)
 
-    @extend_schema(summary="Obtiene la lista de pagos")
-    def list(self, request, *args, **kwargs):
-        return self._request("GET", "payments/", request=request, params=request.query_params)
+    @extend_schema(parameters=PAGINATION_PARAMETERS, summary="Obtiene la lista de pagos")
+    async def list(self, request, *args, **kwargs):
+        return await self._request("GET", "payments/", request=request, params=request.query_params)
 
     @extend_schema(summary="Crea un pago")
-    def create(self, request, *args, **kwargs):
-        return self._request("POST", "payments/", request=request, json=request.data)
+    async def create(self, request, *args, **kwargs):
+        return await self._request("POST", "payments/", request=request, json=request.data)
 
-    @extend_schema(summary="Obtiene los detalles de un pago")
-    def retrieve(self, request, pk=None, *args, **kwargs):
-        return self._request("GET", f"payments/{pk}/", request=request)
+    @extend_schema(parameters=[FIELDS_PARAMETER], summary="Obtiene los detalles de un pago")
+    async def retrieve(self, request, pk=None, *args, **kwargs):
+        return await self._request("GET", f"payments/{pk}/", request=request, params=request.query_params)
 
     @extend_schema(summary="Actualiza los detalles de un pago")
-    def update(self, request, pk=None, *args, **kwargs):
-        return self._request("PUT", f"payments/{pk}/", request=request, json=request.data)
+    async def update(self, request, pk=None, *args, **kwargs):
+        return await self._request("PUT", f"payments/{pk}/", request=request, json=request.data)
 
     @extend_schema(summary="Elimina un pago")
-    def destroy(self, request, pk=None, *args, **kwargs):
-        return self._request("DELETE", f"payments/{pk}/", request=request)
+    async def destroy(self, request, pk=None, *args, **kwargs):
+        return await self._request("DELETE", f"payments/{pk}/", request=request)
 
 
 class ChatBotView(BaseViewSet):
     SERVICE_URL = CHAT_SERVICE_URL
+    SERVICE_TOKEN_HEADER = CHATBOT_TOKEN_HEADER
     serializer_class = ChatRequestSerializer
 
     def get_serializer_class(self):
@@ -467,9 +579,10 @@ class ChatBotView(BaseViewSet):
             return ChatRequestSerializer
         return None
 
-    @extend_schema(summary="Realiza una petición a un LLM/SLM local usando llama.cpp")
-    def create(self, request, *args, **kwargs):
-        return self._request("POST", "llamacpp/", request=request, json=request.data, timeout=1010)
+    @extend_schema(summary="Realiza una petición a un LLM/SLM local usando llama.cpp. "
+                           "Con stream=true la respuesta se transmite por línea mientras se genera.")
+    async def create(self, request, *args, **kwargs):
+        return await self._request("POST", "llamacpp/", request=request, json=request.data, timeout=1010)
 
     @extend_schema(
         # parameters=[
@@ -484,12 +597,13 @@ class ChatBotView(BaseViewSet):
         summary="Obtiene las peticiones y las respuestas del usuario con llama.cpp"
     )
     @action(detail=False, methods=["GET"])
-    def history(self, request):
-        return self._request("GET", "llamacpp/", request=request, timeout=12, params=request.query_params)
+    async def history(self, request):
+        return await self._request("GET", "llamacpp/", request=request, timeout=12, params=request.query_params)
 
 
 class GeminiChatBotView(BaseViewSet):
     SERVICE_URL = CHAT_SERVICE_URL
+    SERVICE_TOKEN_HEADER = CHATBOT_TOKEN_HEADER
     serializer_class = ChatRequestSerializer
 
     def get_serializer_class(self):
@@ -510,20 +624,21 @@ class GeminiChatBotView(BaseViewSet):
         summary="Obtiene las peticiones y las respuestas del usuario"
     )
     @action(detail=False, methods=["GET"])
-    def history(self, request):
-        return self._request("GET", "gemini/", request=request, timeout=12, params=request.query_params)
+    async def history(self, request):
+        return await self._request("GET", "gemini/", request=request, timeout=12, params=request.query_params)
 
     @extend_schema(
         summary="Realiza una petición al chatbot usando Gemini Flash",
     )
-    def create(self, request):
+    async def create(self, request):
         serializer = ChatRequestSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        return self._request("POST", "gemini/", request=request, json=serializer.validated_data, timeout=60)
+        return await self._request("POST", "gemini/", request=request, json=serializer.validated_data, timeout=60)
 
 
 class OllamaChatBotView(BaseViewSet):
     SERVICE_URL = CHAT_SERVICE_URL
+    SERVICE_TOKEN_HEADER = CHATBOT_TOKEN_HEADER
     serializer_class = ChatRequestSerializer
 
     def get_serializer_class(self):
@@ -531,9 +646,10 @@ class OllamaChatBotView(BaseViewSet):
             return ChatRequestSerializer
         return None
 
-    @extend_schema(summary="Realiza una petición a un LLM/SLM local usando Ollama")
-    def create(self, request, *args, **kwargs):
-        return self._request("POST", "ollama/", request=request, json=request.data, timeout=1010)
+    @extend_schema(summary="Realiza una petición a un LLM/SLM local usando Ollama. "
+                           "Con stream=true la respuesta se transmite por línea mientras se genera.")
+    async def create(self, request, *args, **kwargs):
+        return await self._request("POST", "ollama/", request=request, json=request.data, timeout=1010)
 
     @extend_schema(
         # parameters=[
@@ -548,5 +664,5 @@ class OllamaChatBotView(BaseViewSet):
         summary="Obtiene las peticiones y las respuestas del usuario"
     )
     @action(detail=False, methods=["GET"])
-    def history(self, request):
-        return self._request("GET", "ollama/", request=request, timeout=12, params=request.query_params)
+    async def history(self, request):
+        return await self._request("GET", "ollama/", request=request, timeout=12, params=request.query_params)
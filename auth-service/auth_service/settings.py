@@ -14,7 +14,29 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = os.getenv("SECRET_KEY")
 NOTIFICATION_TOKEN = os.getenv("NOTIFICATION_TOKEN")
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
 NOTIFICATIONS_SERVICE_URL = os.getenv("NOTIFICATIONS_SERVICE_URL")
+AUTH_SERVICE_TOKEN = os.getenv("AUTH_SERVICE_TOKEN")
+# Servicios que cachean perfiles por token y deben enterarse de cada logout
+TOKEN_REVOCATION_SUBSCRIBERS = [
+    url for url in (
+        os.getenv("HOTELS_SERVICE_URL"),
+        os.getenv("RESERVATIONS_SERVICE_URL"),
+        os.getenv("CHATBOT_SERVICE_URL"),
+        # El gateway también cachea perfiles por token (gateway/identity.py)
+        os.getenv("GATEWAY_SERVICE_URL"),
+    ) if url
+]
+
+# Clientes HTTP hacia otros servicios (hotelia_common.clients); HTTP_CLIENTS sobrescribe cualquier clave
+HTTP_UPSTREAMS = {
+    "notifications": {"timeout": 60.0, "max_connections": 5, "max_keepalive": 2},
+    # Servicios suscritos a la revocación de token (TOKEN_REVOCATION_SUBSCRIBERS)
+    "subscribers": {"timeout": 3.0, "connect_timeout": 2.0},
+}
+# Reintentos del aviso de revocación; se envía en segundo plano y no demora el logout
+TOKEN_REVOCATION_RETRIES = int(os.getenv("TOKEN_REVOCATION_RETRIES", 3))
+
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True if os.getenv("DEBUG", "False") == "True" else False
 
@@ -34,6 +56,7 @@ INSTALLED_APPS = [
     'rest_framework_simplejwt',
     "rest_framework_simplejwt.token_blacklist",
     'users',
+    'hotelia_common',
 ]
 
 MIDDLEWARE = [
@@ -78,6 +101,60 @@ DATABASES = {
 
 AUTH_USER_MODEL = "users.User"
 
+# "profiles" y "revocations" las comparten todos los workers: en la primera van los perfiles de
+# auth/me/ (users/profiles.py), que se invalidan al cambiar el usuario o sus grupos, y en la
+# segunda la versión de la lista negra de refresh token (users/blacklist.py). Por defecto son
+# tablas en la base (las crea `migrate`) o Redis con PROFILE_CACHE_BACKEND / REVOCATION_CACHE_BACKEND
+# =django.core.cache.backends.redis.RedisCache.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", "auth-default"),
+    },
+    "profiles": {
+        "BACKEND": os.getenv("PROFILE_CACHE_BACKEND", "django.core.cache.backends.db.DatabaseCache"),
+        "LOCATION": os.getenv("PROFILE_CACHE_LOCATION", "hotelia_profiles"),
+    },
+    "revocations": {
+        "BACKEND": os.getenv("REVOCATION_CACHE_BACKEND", "django.core.cache.backends.db.DatabaseCache"),
+        "LOCATION": os.getenv("REVOCATION_CACHE_LOCATION", "hotelia_revocations"),
+    },
+}
+
+# Cada worker guarda las marcas leídas hasta AUTH_REVOCATION_LOCAL_TTL segundos: ahorra la consulta
+# a CACHES["revocations"] en cada petición a costa de ver las revocaciones de otros workers con ese retraso
+AUTH_REVOCATION_LOCAL_TTL = float(os.getenv("AUTH_REVOCATION_LOCAL_TTL", 2.0))
+
+PROFILE_CACHE_TTL = int(os.getenv("PROFILE_CACHE_TTL", 300))
+# Máximo de ids por consulta a auth/batch/
+USER_BATCH_MAX_IDS = int(os.getenv("USER_BATCH_MAX_IDS", 500))
+
+
+# Hash de contraseñas: "pbkdf2" (por defecto), "scrypt" o "argon2" (requiere argon2-cffi).
+# Los hashes de los demás algoritmos siguen validando y se rehacen con este al iniciar sesión.
+PASSWORD_HASHER = os.getenv("PASSWORD_HASHER", "pbkdf2")
+_PASSWORD_HASHERS = {
+    "pbkdf2": "users.hashers.PBKDF2PasswordHasher",
+    "scrypt": "users.hashers.ScryptPasswordHasher",
+    "argon2": "users.hashers.Argon2PasswordHasher",
+}
+PASSWORD_HASHERS = [
+    _PASSWORD_HASHERS[PASSWORD_HASHER],
+    *(path for name, path in _PASSWORD_HASHERS.items() if name != PASSWORD_HASHER),
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+]
+PASSWORD_PBKDF2_ITERATIONS = int(os.getenv("PASSWORD_PBKDF2_ITERATIONS", 1000000))
+PASSWORD_SCRYPT_WORK_FACTOR = int(os.getenv("PASSWORD_SCRYPT_WORK_FACTOR", 2 ** 14))
+PASSWORD_SCRYPT_BLOCK_SIZE = int(os.getenv("PASSWORD_SCRYPT_BLOCK_SIZE", 8))
+PASSWORD_SCRYPT_PARALLELISM = int(os.getenv("PASSWORD_SCRYPT_PARALLELISM", 1))
+PASSWORD_ARGON2_TIME_COST = int(os.getenv("PASSWORD_ARGON2_TIME_COST", 2))
+PASSWORD_ARGON2_MEMORY_COST = int(os.getenv("PASSWORD_ARGON2_MEMORY_COST", 102400))
+PASSWORD_ARGON2_PARALLELISM = int(os.getenv("PASSWORD_ARGON2_PARALLELISM", 8))
+# Pool de procesos para los hashes; 0 los calcula en el hilo del request
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 0))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 32))
+PASSWORD_HASH_QUEUE_TIMEOUT = float(os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT", 5.0))
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -97,11 +174,15 @@ AUTH_PASSWORD_VALIDATORS = [
     # },
 ]
 
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", 100))
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
     'DATETIME_FORMAT': "%Y-%m-%d %I:%M %p",
+    'DEFAULT_PAGINATION_CLASS': 'hotelia_common.pagination.KeysetPagination',
+    'PAGE_SIZE': int(os.getenv("PAGE_SIZE", 20)),
 }
 
 SIMPLE_JWT = {
@@ -110,8 +191,20 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=10),
     "AUTH_HEADER_TYPES": ("Bearer",),
     "AUTH_HEADER_NAME": "HTTP_AUTHORIZATION",
+    "TOKEN_REFRESH_SERIALIZER": "users.serializers.UserTokenRefreshSerializer",
 }
 
+# Lista negra de refresh token en memoria (users/blacklist.py) y purga de los token expirados
+TOKEN_BLACKLIST_CAPACITY = int(os.getenv("TOKEN_BLACKLIST_CAPACITY", 100000))
+TOKEN_BLACKLIST_ERROR_RATE = float(os.getenv("TOKEN_BLACKLIST_ERROR_RATE", 0.001))
+# Los logout llegan a los demás workers por la versión en CACHES["revocations"], que cada worker
+# lee como mucho cada TOKEN_BLACKLIST_VERSION_INTERVAL segundos; el de sincronización solo cubre
+# las filas creadas por fuera de FilteredRefreshToken (admin, scripts)
+TOKEN_BLACKLIST_VERSION_INTERVAL = float(os.getenv("TOKEN_BLACKLIST_VERSION_INTERVAL", 2.0))
+TOKEN_BLACKLIST_SYNC_INTERVAL = float(os.getenv("TOKEN_BLACKLIST_SYNC_INTERVAL", 30.0))
+TOKEN_PURGE_AUTOSTART = os.getenv("TOKEN_PURGE_AUTOSTART", "True") == "True"
+TOKEN_PURGE_INTERVAL = int(os.getenv("TOKEN_PURGE_INTERVAL", 60 * 60))
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -133,3 +226,10 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Outbox de notificaciones: los correos se guardan en la base y se envían en segundo plano
+OUTBOX_MODEL = "users.NotificationOutbox"
+OUTBOX_AUTOSTART = os.getenv("OUTBOX_AUTOSTART", "True") == "True"
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", 50))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 8))
+OUTBOX_POLL_INTERVAL = int(os.getenv("OUTBOX_POLL_INTERVAL", 30))
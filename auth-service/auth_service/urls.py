@@ -6,6 +6,7 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView,
 )
 
+from hotelia_common.views import HttpClientMetricsView
 from users import views
 
 router = DefaultRouter()
@@ -14,5 +15,6 @@ router.register(r"auth", views.UserViewSet, basename="users")
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include(router.urls)),
+    path('api/metrics/http/', HttpClientMetricsView.as_view(), name='http-client-metrics'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
 ]
\ No newline at end of file
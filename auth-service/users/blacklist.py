@@ -0,0 +1,204 @@
+import hashlib
+import math
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+# Token en lista negra que se esperan como máximo antes de reconstruir el filtro más grande
+TOKEN_BLACKLIST_CAPACITY = getattr(settings, "TOKEN_BLACKLIST_CAPACITY", 100000)
+TOKEN_BLACKLIST_ERROR_RATE = getattr(settings, "TOKEN_BLACKLIST_ERROR_RATE", 0.001)
+# Caché compartida por los workers donde cada logout deja una versión nueva de la lista negra
+TOKEN_BLACKLIST_CACHE = getattr(settings, "TOKEN_BLACKLIST_CACHE",
+                                "revocations" if "revocations" in settings.CACHES else "default")
+# Cada cuántos segundos un worker lee la versión de la caché compartida para enterarse de los
+# logout de los demás. Entre lecturas `contains` no hace ninguna consulta.
+TOKEN_BLACKLIST_VERSION_INTERVAL = getattr(settings, "TOKEN_BLACKLIST_VERSION_INTERVAL", 2.0)
+# Respaldo para filas que no pasan por FilteredRefreshToken (admin, otros scripts): cada cuántos
+# segundos se leen las filas nuevas de BlacklistedToken aunque la versión no haya cambiado
+TOKEN_BLACKLIST_SYNC_INTERVAL = getattr(settings, "TOKEN_BLACKLIST_SYNC_INTERVAL", 30.0)
+TOKEN_PURGE_AUTOSTART = getattr(settings, "TOKEN_PURGE_AUTOSTART", True)
+TOKEN_PURGE_INTERVAL = getattr(settings, "TOKEN_PURGE_INTERVAL", 60 * 60)
+TOKEN_PURGE_BATCH_SIZE = getattr(settings, "TOKEN_PURGE_BATCH_SIZE", 5000)
+
+
+class BloomFilter:
+    """Conjunto probabilístico: `in` puede dar falsos positivos, nunca falsos negativos."""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = max(capacity, 1)
+        self.size = math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        # Doble hashing (Kirsch-Mitzenmacher) sobre un solo blake2b de 128 bits
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+BLACKLIST_VERSION_KEY = "auth:blacklist:version"
+
+
+class TokenBlacklist:
+    """
+    Filtro de Bloom con los jti de los refresh token en lista negra que todavía no expiraron.
+    Si el jti no está en el filtro el token no está en la lista negra y no se consulta la base;
+    solo los positivos (logout reales o falsos positivos) se confirman con una consulta.
+    Cada logout cambia la versión en la caché compartida; los demás procesos la leen como mucho
+    cada `version_interval` segundos (la lectura va fuera del lock) y, si cambió, leen las filas
+    nuevas de BlacklistedToken. Un logout tarda hasta ese intervalo en valer en otro worker; el
+    access token de la sesión lo revoca aparte hotelia_common.revocation (hasta
+    AUTH_REVOCATION_LOCAL_TTL segundos en los demás workers de cada servicio).
+    Con una caché por proceso (LocMemCache) eso solo vale con un worker.
+    """
+
+    def __init__(self, capacity, error_rate, sync_interval, version_interval=TOKEN_BLACKLIST_VERSION_INTERVAL):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.version_interval = version_interval
+        self.lock = threading.Lock()
+        self.filter = None
+        self.last_id = 0
+        self.synced_at = 0.0
+        self.checked_at = 0.0
+        self.version = None
+
+    def _cache(self):
+        return caches[TOKEN_BLACKLIST_CACHE]
+
+    def rebuild(self):
+        with self.lock:
+            self._rebuild()
+
+    def _rebuild(self):
+        last_id = BlacklistedToken.objects.aggregate(last=Max("id"))["last"] or 0
+        rows = BlacklistedToken.objects.filter(id__lte=last_id, token__expires_at__gt=timezone.now())
+        bloom = BloomFilter(max(self.capacity, rows.count() * 2), self.error_rate)
+        for jti in rows.values_list("token__jti", flat=True).iterator(chunk_size=5000):
+            bloom.add(jti)
+        self.filter, self.last_id, self.synced_at = bloom, last_id, time.monotonic()
+
+    def _sync(self):
+        if self.filter is not None and time.monotonic() - self.checked_at < self.version_interval:
+            return
+        # La versión se lee antes que las filas: un logout posterior deja otra versión
+        version = self._cache().get(BLACKLIST_VERSION_KEY)
+        with self.lock:
+            self.checked_at = time.monotonic()
+            if self.filter is None:
+                self._rebuild()
+                self.version = version
+                return
+            if version == self.version and self.checked_at - self.synced_at < self.sync_interval:
+                return
+            self.version = version
+            rows = BlacklistedToken.objects.filter(id__gt=self.last_id).order_by("id").values_list("id", "token__jti")
+            for row_id, jti in rows:
+                self.filter.add(jti)
+                self.last_id = row_id
+            self.synced_at = time.monotonic()
+            if self.filter.count > self.filter.capacity:
+                self._rebuild()
+
+    def add(self, jti):
+        self._sync()
+        with self.lock:
+            self.filter.add(jti)
+        # Después del commit, para que los otros procesos ya encuentren la fila al sincronizar
+        transaction.on_commit(self._bump_version)
+
+    def _bump_version(self):
+        # Valor nuevo y no un contador: si la clave se pierde de la caché no se repite una versión vieja
+        self._cache().set(BLACKLIST_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+
+    def contains(self, jti):
+        self._sync()
+        # El filtro se reemplaza entero al reconstruirlo, así que leerlo sin el lock es seguro
+        if jti not in self.filter:
+            return False
+        return BlacklistedToken.objects.filter(token__jti=jti).exists()
+
+
+token_blacklist = TokenBlacklist(TOKEN_BLACKLIST_CAPACITY, TOKEN_BLACKLIST_ERROR_RATE, TOKEN_BLACKLIST_SYNC_INTERVAL)
+
+
+class FilteredRefreshToken(RefreshToken):
+    # RefreshToken que revisa la lista negra en el filtro antes de ir a la base
+
+    def check_blacklist(self):
+        if token_blacklist.contains(self.payload[jwt_settings.JTI_CLAIM]):
+            raise TokenError("El token está en la lista negra")
+
+    def blacklist(self):
+        result = super().blacklist()
+        token_blacklist.add(self.payload[jwt_settings.JTI_CLAIM])
+        return result
+
+
+def purge_expired_tokens():
+    """Borra los token expirados (y su entrada en la lista negra) en lotes; devuelve cuántos."""
+    deleted = 0
+    while True:
+        ids = list(OutstandingToken.objects.filter(expires_at__lte=timezone.now())
+                   .values_list("id", flat=True)[:TOKEN_PURGE_BATCH_SIZE])
+        if not ids:
+            break
+        OutstandingToken.objects.filter(id__in=ids).delete()
+        deleted += len(ids)
+    if deleted and token_blacklist.filter is not None:
+        # Los jti expirados no se pueden quitar de un filtro de Bloom: se reconstruye sin ellos
+        token_blacklist.rebuild()
+    return deleted
+
+
+class TokenPurger(threading.Thread):
+    # Hilo del proceso que purga los token expirados cada TOKEN_PURGE_INTERVAL.
+    def __init__(self):
+        super().__init__(name="token-purger", daemon=True)
+
+    def run(self):
+        while True:
+            try:
+                purge_expired_tokens()
+            except Exception as e:
+                print(f"Error al purgar los token expirados: {e}")
+            finally:
+                close_old_connections()
+            time.sleep(TOKEN_PURGE_INTERVAL)
+
+
+_purger = None
+_purger_lock = threading.Lock()
+
+
+def ensure_purger():
+    # Desde UsersConfig.ready(), solo en los procesos que atienden peticiones
+    global _purger
+    if not TOKEN_PURGE_AUTOSTART:
+        return
+    with _purger_lock:
+        if _purger is None or not _purger.is_alive():
+            _purger = TokenPurger()
+            _purger.start()
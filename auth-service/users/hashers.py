@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.contrib.auth import hashers
+
+# Mismos algoritmos que Django con el costo configurable desde settings. Al cambiar el costo,
+# los hashes viejos siguen validando y se rehacen con el nuevo en el siguiente inicio de sesión.
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    iterations = getattr(settings, "PASSWORD_PBKDF2_ITERATIONS", hashers.PBKDF2PasswordHasher.iterations)
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    work_factor = getattr(settings, "PASSWORD_SCRYPT_WORK_FACTOR", hashers.ScryptPasswordHasher.work_factor)
+    block_size = getattr(settings, "PASSWORD_SCRYPT_BLOCK_SIZE", hashers.ScryptPasswordHasher.block_size)
+    parallelism = getattr(settings, "PASSWORD_SCRYPT_PARALLELISM", hashers.ScryptPasswordHasher.parallelism)
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    # Requiere el paquete argon2-cffi
+    time_cost = getattr(settings, "PASSWORD_ARGON2_TIME_COST", hashers.Argon2PasswordHasher.time_cost)
+    memory_cost = getattr(settings, "PASSWORD_ARGON2_MEMORY_COST", hashers.Argon2PasswordHasher.memory_cost)
+    parallelism = getattr(settings, "PASSWORD_ARGON2_PARALLELISM", hashers.Argon2PasswordHasher.parallelism)
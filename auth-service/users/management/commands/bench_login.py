@@ -0,0 +1,92 @@
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from users import passwords
+from users.models import User
+
+PASSWORD = "clave-de-prueba"
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide inicios de sesión por segundo (verificación de la contraseña incluida) con el hasher "
+        "configurado (PASSWORD_HASHER), calculando los hashes en el hilo del request y en el pool "
+        "de procesos. Se ejecuta sobre una base de datos de prueba temporal, nunca sobre la real."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=200, help="Cantidad de usuarios.")
+        parser.add_argument("--logins", type=int, default=200, help="Inicios de sesión por escenario.")
+        parser.add_argument("--concurrency", type=int, default=8, help="Hilos enviando inicios de sesión.")
+        parser.add_argument("--workers", type=str, default="",
+                            help="Tamaños del pool a medir, separados por coma (por defecto 1 y todos los núcleos).")
+
+    def handle(self, *args, **options):
+        cores = os.cpu_count() or 1
+        sizes = [int(size) for size in options["workers"].split(",") if size] or sorted({1, cores})
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self.stdout.write(f"Base de prueba: {connection.settings_dict['NAME']}")
+            self.stdout.write(f"Hasher: {settings.PASSWORD_HASHERS[0]} | núcleos: {cores} | "
+                              f"concurrencia: {options['concurrency']}")
+            emails = self._insert(options["users"])
+            default_pool = passwords.pool
+            try:
+                for workers in [0, *sizes]:
+                    pool = passwords.HashPool(workers, options["concurrency"], passwords.PASSWORD_HASH_QUEUE_TIMEOUT)
+                    pool.start()
+                    passwords.pool = pool
+                    try:
+                        elapsed = self._run(emails, options["logins"], options["concurrency"])
+                    finally:
+                        pool.shutdown()
+                    used = min(workers or options["concurrency"], cores)
+                    rate = options["logins"] / elapsed
+                    label = "en el request" if workers == 0 else f"pool de {workers}"
+                    self.stdout.write(f"{label:<16} {rate:8.1f} logins/s  {rate / used:7.1f} por núcleo ({used} núcleos)")
+            finally:
+                passwords.pool = default_pool
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def _insert(self, count):
+        # Todos comparten el mismo hash: crearlos no debe costar un hash por usuario
+        encoded = make_password(PASSWORD)
+        User.objects.bulk_create(
+            [User(email=f"bench{i}@hotelia.test", dni=f"{i:010d}", phone=f"+58{i:010d}",
+                  password=encoded, is_active=True) for i in range(count)],
+            batch_size=5000)
+        return [f"bench{i}@hotelia.test" for i in range(count)]
+
+    def _run(self, emails, logins, concurrency):
+        pending = iter(range(logins))
+        lock = threading.Lock()
+        failures = []
+
+        def worker():
+            try:
+                while True:
+                    with lock:
+                        i = next(pending, None)
+                    if i is None:
+                        return
+                    if passwords.authenticate_credentials(emails[i % len(emails)], PASSWORD) is None:
+                        failures.append(i)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if failures:
+            self.stderr.write(f"{len(failures)} inicios de sesión fallidos")
+        return time.perf_counter() - started
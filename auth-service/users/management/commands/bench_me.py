@@ -0,0 +1,88 @@
+import random
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import Group
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.models import User
+from users.profiles import PROFILE_CACHE, get_profile
+from users.serializers import UserModelSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide la latencia de POST /api/auth/me/ (autenticación JWT incluida) con el perfil en caché "
+        "y sin él, y la compara con serializar el modelo como antes. Se ejecuta sobre una base de "
+        "datos de prueba temporal, nunca sobre la real."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10000, help="Cantidad de usuarios.")
+        parser.add_argument("--groups", type=int, default=3, help="Grupos por usuario.")
+        parser.add_argument("--requests", type=int, default=2000, help="Peticiones por escenario.")
+
+    def handle(self, *args, **options):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            if "testserver" not in settings.ALLOWED_HOSTS:
+                settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, "testserver"]
+            self.stdout.write(f"Base de prueba: {connection.settings_dict['NAME']}")
+            ids = self._insert(options["users"], options["groups"])
+            rng = random.Random(42)
+            # Un token por usuario muestreado; AccessToken no se registra en la lista de salientes
+            tokens = {user_id: f"Bearer {AccessToken.for_user(User(id=user_id))}"
+                      for user_id in rng.sample(ids, min(len(ids), 200))}
+            client = Client()
+
+            def me():
+                user_id = rng.choice(list(tokens))
+                response = client.post("/api/auth/me/", HTTP_AUTHORIZATION=tokens[user_id])
+                assert response.status_code == 200, response.content
+
+            def cold():
+                caches[PROFILE_CACHE].clear()
+                me()
+
+            def model():
+                # Lo que hacía me/ antes: leer el usuario y serializarlo (grupos en otra consulta)
+                UserModelSerializer(User.objects.get(id=rng.choice(list(tokens)))).data
+
+            def profile():
+                get_profile(rng.choice(list(tokens)))
+
+            for _ in range(len(tokens)):
+                me()
+            for label, fn in (("POST me/ (perfil en caché)", me), ("POST me/ (caché vacía)", cold),
+                              ("perfil con UserModelSerializer", model), ("perfil con get_profile", profile)):
+                p50, p99 = self._time(options["requests"], fn)
+                self.stdout.write(f"{label:<31} p50 {p50:7.3f} ms  p99 {p99:7.3f} ms")
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def _insert(self, count, groups_per_user):
+        groups = [Group.objects.create(name=f"grupo-{i}") for i in range(max(groups_per_user, 1) * 2)]
+        User.objects.bulk_create(
+            [User(email=f"bench{i}@hotelia.test", dni=f"{i:010d}", phone=f"+58{i:010d}",
+                  first_name="Bench", last_name=str(i), password="!") for i in range(count)],
+            batch_size=5000)
+        ids = list(User.objects.values_list("id", flat=True))
+        rng = random.Random(7)
+        memberships = [User.groups.through(user_id=user_id, group_id=group.id)
+                       for user_id in ids for group in rng.sample(groups, groups_per_user)]
+        User.groups.through.objects.bulk_create(memberships, batch_size=5000)
+        return ids
+
+    def _time(self, runs, fn):
+        samples = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - started) * 1000)
+        samples.sort()
+        return statistics.median(samples), samples[int(len(samples) * 0.99) - 1]
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.blacklist import TOKEN_PURGE_INTERVAL, purge_expired_tokens
+
+
+class Command(BaseCommand):
+    help = (
+        "Borra los token expirados de la lista de token emitidos y de la lista negra. "
+        "Útil para correr la purga como proceso aparte (con TOKEN_PURGE_AUTOSTART=False)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true",
+                            help="Purga una vez y termina.")
+        parser.add_argument("--interval", type=int, default=TOKEN_PURGE_INTERVAL,
+                            help="Segundos entre purgas.")
+
+    def handle(self, *args, **options):
+        while True:
+            deleted = purge_expired_tokens()
+            if deleted:
+                self.stdout.write(f"Token expirados borrados: {deleted}")
+            if options["once"]:
+                return
+            time.sleep(options["interval"])
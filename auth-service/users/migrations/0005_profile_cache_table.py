@@ -0,0 +1,20 @@
+from django.core.management import call_command
+from django.db import migrations
+
+
+def create_cache_tables(apps, schema_editor):
+    # Tabla de CACHES["profiles"] en las bases que ya aplicaron hotelia_common.0001_cache_tables;
+    # createcachetable no hace nada si ya existe o si el backend es otro (Redis).
+    call_command("createcachetable", database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_user_date_joined_id_idx'),
+        ('hotelia_common', '0001_cache_tables'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_cache_tables, migrations.RunPython.noop),
+    ]
@@ -2,6 +2,8 @@ from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
 from django.core.validators import RegexValidator
+
+from hotelia_common.models import NotificationOutboxBase
 from .managers import UserManager
 
 phone_regex = RegexValidator(
@@ -36,5 +38,20 @@ class User(AbstractUser):
     class Meta:
         verbose_name_plural = "Usuarios"
         verbose_name = "Usuario"
-    
-    
+        indexes = [
+            # Paginación por cursor del listado de usuarios
+            models.Index(fields=["-date_joined", "-id"], name="user_date_joined_idx"),
+        ]
+
+
+class NotificationOutbox(NotificationOutboxBase):
+    # Correos pendientes de entregar al notifications-service (ver hotelia_common/outbox.py)
+    class Meta:
+        verbose_name_plural = "Correos pendientes"
+        verbose_name = "Correo pendiente"
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"], name="outbox_pending_idx"),
+        ]
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
@@ -0,0 +1,7 @@
+from hotelia_common.pagination import KeysetPagination
+
+
+class UserPagination(KeysetPagination):
+    # Los usuarios se listan del más reciente al más antiguo (índice user_date_joined_idx).
+    # date_joined puede repetirse: el id desempata para que el orden entre páginas sea estable.
+    ordering = ("-date_joined", "-id")
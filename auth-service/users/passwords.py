@@ -0,0 +1,112 @@
+import math
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, make_password
+
+# Procesos dedicados a calcular hashes; con 0 se calculan en el hilo del request como antes
+PASSWORD_HASH_WORKERS = getattr(settings, "PASSWORD_HASH_WORKERS", 0)
+# Hashes admitidos a la vez (en curso + en espera); el resto espera hasta el timeout y se rechaza
+PASSWORD_HASH_MAX_PENDING = getattr(settings, "PASSWORD_HASH_MAX_PENDING", 32)
+PASSWORD_HASH_QUEUE_TIMEOUT = getattr(settings, "PASSWORD_HASH_QUEUE_TIMEOUT", 5.0)
+
+
+class PasswordHashBusy(Exception):
+    """Hay demasiados hashes de contraseña pendientes; reintentar en `retry_after` s."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Hay demasiados inicios de sesión en curso, intenta de nuevo en {retry_after} s")
+        self.retry_after = retry_after
+
+
+def _check(password, encoded):
+    # Se ejecuta en el proceso del pool: devuelve si coincide y si hay que rehacer el hash
+    outdated = []
+    return check_password(password, encoded, setter=outdated.append), bool(outdated)
+
+
+class HashPool:
+    """
+    Calcula hashes de contraseña en un pool de procesos acotado, para que una ráfaga de inicios
+    de sesión no ocupe todos los workers del servidor. Admite como máximo `max_pending` hashes
+    a la vez; los demás esperan hasta `queue_timeout` y luego se rechazan con PasswordHashBusy.
+    """
+
+    def __init__(self, workers, max_pending, queue_timeout):
+        self.workers = workers
+        self.max_pending = max(max_pending, workers, 1)
+        self.queue_timeout = queue_timeout
+        self.slots = threading.BoundedSemaphore(self.max_pending)
+        self.lock = threading.Lock()
+        self.executor = None
+        # Duraciones recientes, para estimar Retry-After
+        self.durations = deque(maxlen=100)
+
+    def _executor(self):
+        with self.lock:
+            if self.executor is None:
+                # spawn: no se hereda el estado del proceso (hilos del outbox, conexiones abiertas)
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self.executor
+
+    def retry_after(self):
+        average = sum(self.durations) / len(self.durations) if self.durations else 0.5
+        return max(1, math.ceil(average * self.max_pending / max(self.workers, 1)))
+
+    def run(self, fn, *args):
+        if self.workers <= 0:
+            return fn(*args)
+        if not self.slots.acquire(timeout=self.queue_timeout):
+            raise PasswordHashBusy(self.retry_after())
+        try:
+            started = time.monotonic()
+            result = self._executor().submit(fn, *args).result()
+            self.durations.append(time.monotonic() - started)
+            return result
+        finally:
+            self.slots.release()
+
+    def start(self):
+        # Levanta los procesos antes de la primera ráfaga
+        if self.workers > 0:
+            for future in [self._executor().submit(make_password, None) for _ in range(self.workers)]:
+                future.result()
+
+    def shutdown(self):
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown()
+                self.executor = None
+
+
+pool = HashPool(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING, PASSWORD_HASH_QUEUE_TIMEOUT)
+
+
+def hash_password(password):
+    return pool.run(make_password, password)
+
+
+def authenticate_credentials(email, password):
+    """
+    Equivalente a `authenticate(email=..., password=...)` con ModelBackend, con los hashes en el
+    pool. Si el hash guardado usa otro algoritmo o costo que el configurado se rehace aquí.
+    """
+    User = get_user_model()
+    user = User._default_manager.filter(**{User.USERNAME_FIELD: email}).first()
+    if user is None:
+        # Igual que ModelBackend: se calcula un hash para no revelar por tiempo si el correo existe
+        pool.run(make_password, password)
+        return None
+    valid, outdated = pool.run(_check, password, user.password)
+    if not valid or not user.is_active:
+        return None
+    if outdated:
+        user.password = pool.run(make_password, password)
+        user.save(update_fields=["password"])
+    return user
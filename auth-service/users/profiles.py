@@ -0,0 +1,49 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+
+from .serializers import UserProfileSerializer
+
+User = get_user_model()
+
+PROFILE_CACHE_TTL = getattr(settings, "PROFILE_CACHE_TTL", 300)
+# La invalidación de users/signals.py tiene que llegar a todos los workers (el refresh lee
+# is_active del perfil y el gateway los grupos), así que va en una caché compartida
+PROFILE_CACHE = getattr(settings, "PROFILE_CACHE", "profiles" if "profiles" in settings.CACHES else "default")
+PROFILE_CACHE_KEY = "users:profile:{}"
+# Columnas que lee UserProfileSerializer
+PROFILE_FIELDS = ("id", "last_login", "is_superuser", "first_name", "last_name",
+                  "is_staff", "is_active", "email", "dni", "phone")
+
+
+def attach_groups(rows):
+    # Nombres de los grupos de todos los usuarios de la página en una sola consulta
+    groups = defaultdict(list)
+    if rows:
+        memberships = User.groups.through.objects.filter(
+            user_id__in=[row["id"] for row in rows]).order_by("id").values_list("user_id", "group__name")
+        for user_id, name in memberships:
+            groups[user_id].append(name)
+    for row in rows:
+        row["groups"] = groups[row["id"]]
+    return rows
+
+
+def get_profile(user_id):
+    """Perfil serializado de auth/me/, cacheado por usuario hasta que cambie (users/signals.py)."""
+    key = PROFILE_CACHE_KEY.format(user_id)
+    cache = caches[PROFILE_CACHE]
+    profile = cache.get(key)
+    if profile is None:
+        rows = attach_groups(list(User.objects.filter(id=user_id).values(*PROFILE_FIELDS)))
+        if not rows:
+            return None
+        profile = dict(UserProfileSerializer(rows[0]).data)
+        cache.set(key, profile, PROFILE_CACHE_TTL)
+    return profile
+
+
+def invalidate_profiles(user_ids):
+    caches[PROFILE_CACHE].delete_many([PROFILE_CACHE_KEY.format(user_id) for user_id in user_ids])
@@ -0,0 +1,41 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+from django.conf import settings
+
+from hotelia_common.clients import get_client
+
+TOKEN_REVOCATION_SUBSCRIBERS = getattr(settings, "TOKEN_REVOCATION_SUBSCRIBERS", [])
+TOKEN_REVOCATION_RETRIES = getattr(settings, "TOKEN_REVOCATION_RETRIES", 3)
+
+# Los avisos salen en segundo plano: el logout no espera a que respondan los suscriptores
+_executor = ThreadPoolExecutor(max_workers=max(len(TOKEN_REVOCATION_SUBSCRIBERS), 1),
+                               thread_name_prefix="token-revocation")
+
+
+def _notify(service_url, payload):
+    headers = {"X-Auth-Service-Token": settings.AUTH_SERVICE_TOKEN or ""}
+    for attempt in range(TOKEN_REVOCATION_RETRIES + 1):
+        try:
+            response = get_client("subscribers").post(
+                f"{service_url}auth/revoke/", json=payload, headers=headers)
+            response.raise_for_status()
+            return True
+        except httpx.HTTPError as e:
+            error = e
+            if attempt < TOKEN_REVOCATION_RETRIES:
+                time.sleep(0.5 * 2 ** attempt)
+    print(f"No se pudo notificar la revocación a {service_url}: {error}")
+    return False
+
+
+def notify_token_revocation(user_id, session_id=None):
+    # Avisa a los servicios que validan el JWT localmente. Con la sesión ("sid" del token) solo
+    # se revoca esa sesión; los token anteriores a ese claim revocan todo lo emitido hasta ahora.
+    if user_id is None:
+        return []
+    payload = {"user_id": user_id, "issued_before": int(time.time())}
+    if session_id:
+        payload["session"] = session_id
+    return [_executor.submit(_notify, service_url, payload) for service_url in TOKEN_REVOCATION_SUBSCRIBERS]
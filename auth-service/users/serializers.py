@@ -1,16 +1,22 @@
-from django.contrib.auth import password_validation, authenticate
+from django.contrib.auth import password_validation
 from django.contrib.auth.models import Group, Permission
-from django.contrib.auth.hashers import make_password
 from django.contrib.auth import get_user_model
 from django.conf import settings
 # Django REST Framework
 from rest_framework import serializers
 from rest_framework.authtoken.models import Token
 from rest_framework.validators import UniqueValidator
+from hotelia_common.pagination import SparseFieldsMixin
 
 # JWT
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.exceptions import AuthenticationFailed, TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .blacklist import FilteredRefreshToken
+from .passwords import authenticate_credentials, hash_password
+from .revocation import notify_token_revocation
 
 import httpx
 # Models
@@ -26,7 +32,7 @@ class GroupModelSerializer(serializers.ModelSerializer):
         fields = ["name"]
 
 
-class UserModelSerializer(serializers.ModelSerializer):
+class UserModelSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     groups = serializers.SerializerMethodField()
     password_confirmation = serializers.CharField(
         min_length=4, max_length=64, write_only=True
@@ -59,7 +65,7 @@ class UserModelSerializer(serializers.ModelSerializer):
         if passwd != passwd_conf:
             raise serializers.ValidationError("Las contraseñas no coinciden")
         password_validation.validate_password(passwd)
-        data["password"] = make_password(passwd)
+        data["password"] = hash_password(passwd)
         self.context["group"] = data.pop("role", "admin")
         return data
 
@@ -71,6 +77,31 @@ class UserModelSerializer(serializers.ModelSerializer):
         return user
 
 
+class UserProfileSerializer(SparseFieldsMixin, serializers.Serializer):
+    """
+    Perfil de solo lectura armado sobre los diccionarios de `values()` (ver users/profiles.py).
+    Devuelve lo mismo que UserModelSerializer sin instanciar modelos ni consultar los grupos
+    de cada usuario por separado.
+    """
+    id = serializers.IntegerField()
+    groups = serializers.ListField(child=serializers.CharField())
+    last_login = serializers.DateTimeField()
+    is_superuser = serializers.BooleanField()
+    first_name = serializers.CharField()
+    last_name = serializers.CharField()
+    is_staff = serializers.BooleanField()
+    is_active = serializers.BooleanField()
+    email = serializers.EmailField()
+    dni = serializers.CharField()
+    phone = serializers.CharField()
+
+
+class UserBatchSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False,
+        max_length=getattr(settings, "USER_BATCH_MAX_IDS", 500))
+
+
 class UserPasswordSerializer(serializers.Serializer):
     password = serializers.CharField(
         min_length=4, max_length=64, write_only=True)
@@ -83,7 +114,7 @@ class UserPasswordSerializer(serializers.Serializer):
         if passwd != passwd_conf:
             raise serializers.ValidationError("Las contraseñas no coinciden")
         password_validation.validate_password(passwd)
-        data["password"] = make_password(passwd)
+        data["password"] = hash_password(passwd)
         return data
 
 
@@ -114,7 +145,7 @@ class UserCreateSerializer(UserModelSerializer):
         if passwd != passwd_conf:
             raise serializers.ValidationError("Las contraseñas no coinciden")
         password_validation.validate_password(passwd)
-        data["password"] = make_password(passwd)
+        data["password"] = hash_password(passwd)
         data["is_active"] = True
         # self.context["group"] = data.pop("role", "cliente")
         return data
@@ -133,7 +164,7 @@ class UserLoginSerializer(serializers.Serializer):
 
     def validate(self, data):
         """Check credentials."""
-        user = authenticate(email=data["email"], password=data["password"])
+        user = authenticate_credentials(data["email"], data["password"])
         if not user:
             raise AuthenticationFailed("Credenciales incorrectas")
         self.context["user"] = user
@@ -142,6 +173,9 @@ class UserLoginSerializer(serializers.Serializer):
     def create(self, data):
         user: User = self.context["user"]
         token = RefreshToken.for_user(user)
+        # Id de la sesión: lo heredan los access token y se conserva al rotar el refresh,
+        # así un logout revoca solo esta sesión en los servicios
+        token["sid"] = token[jwt_settings.JTI_CLAIM]
         refresh_token = str(token)
         access_token = str(token.access_token)
         return {
@@ -159,8 +193,38 @@ class UserLogoutSerializer(serializers.Serializer):
 
     def save(self, **kwargs):
         try:
-            RefreshToken(self.data["refresh_token"]).blacklist()
+            token = FilteredRefreshToken(self.data["refresh_token"])
+            token.blacklist()
         except TokenError:
             raise serializers.ValidationError(
                 {"error": True, "message": "Token invalido"}
             )
+        notify_token_revocation(token.payload.get(jwt_settings.USER_ID_CLAIM), token.payload.get("sid"))
+
+
+class UserTokenRefreshSerializer(TokenRefreshSerializer):
+    # Igual que TokenRefreshSerializer, pero la lista negra se revisa en el filtro de Bloom
+    # (users/blacklist.py) y el usuario activo en el perfil de la caché compartida (users/profiles.py),
+    # que se invalida en todos los workers cuando el usuario cambia
+    token_class = FilteredRefreshToken
+
+    def validate(self, attrs):
+        from .profiles import get_profile  # profiles importa este módulo
+
+        refresh = self.token_class(attrs["refresh"])
+        user_id = refresh.payload.get(jwt_settings.USER_ID_CLAIM, None)
+        if user_id:
+            profile = get_profile(user_id)
+            if profile is None or not profile.get("is_active"):
+                raise AuthenticationFailed(self.error_messages["no_active_account"], "no_active_account")
+
+        data = {"access": str(refresh.access_token)}
+        if jwt_settings.ROTATE_REFRESH_TOKENS:
+            if jwt_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+            data["refresh"] = str(refresh)
+        return data
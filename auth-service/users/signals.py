@@ -0,0 +1,37 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+
+from .profiles import invalidate_profiles
+
+User = get_user_model()
+
+
+def user_changed(sender, instance, **kwargs):
+    invalidate_profiles([instance.pk])
+
+
+def memberships_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith("post_") and action != "pre_clear":
+        return
+    if not reverse:
+        # user.groups.add/remove/clear(...)
+        invalidate_profiles([instance.pk])
+    elif action == "pre_clear":
+        # group.user_set.clear(): después ya no se sabe quiénes eran los miembros
+        invalidate_profiles(instance.user_set.values_list("id", flat=True))
+    elif pk_set:
+        invalidate_profiles(pk_set)
+
+
+def group_changed(sender, instance, **kwargs):
+    # Renombrar o borrar un grupo cambia el perfil de todos sus miembros
+    invalidate_profiles(instance.user_set.values_list("id", flat=True))
+
+
+# El perfil cacheado de auth/me/ (users/profiles.py) se descarta cuando cambia el usuario o sus grupos
+post_save.connect(user_changed, sender=User, dispatch_uid="profile_user_save")
+post_delete.connect(user_changed, sender=User, dispatch_uid="profile_user_delete")
+m2m_changed.connect(memberships_changed, sender=User.groups.through, dispatch_uid="profile_groups_changed")
+post_save.connect(group_changed, sender=Group, dispatch_uid="profile_group_save")
+pre_delete.connect(group_changed, sender=Group, dispatch_uid="profile_group_delete")
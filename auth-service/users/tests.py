@@ -1,3 +1,240 @@
-from django.test import TestCase
+import base64
+import json
+import time
+import uuid
+from unittest import mock
 
-# Create your tests here.
+import httpx
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+from hotelia_common.models import OutboxStatus
+
+from . import passwords, revocation
+from .blacklist import BloomFilter, FilteredRefreshToken, TokenBlacklist, purge_expired_tokens
+from .models import NotificationOutbox
+from .passwords import HashPool, PasswordHashBusy
+from .profiles import PROFILE_CACHE, PROFILE_CACHE_KEY, get_profile
+
+User = get_user_model()
+
+# Los hashes reales tardan a propósito; aquí solo importa el flujo
+FAST_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+
+def user(email="cliente@example.com", password="clave-segura", **fields):
+    n = User.objects.count()
+    return User.objects.create_user(email=email, password=password, dni=f"V{n}", phone=f"+58412000{n:04d}", **fields)
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class SessionTests(TestCase):
+    def setUp(self):
+        caches[PROFILE_CACHE].clear()
+        self.user = user()
+        notify = mock.patch("users.serializers.notify_token_revocation")
+        self.notify = notify.start()
+        self.addCleanup(notify.stop)
+
+    def login(self):
+        response = self.client.post("/api/auth/login/", {"email": self.user.email, "password": "clave-segura"})
+        self.assertEqual(response.status_code, 201)
+        return response.json()
+
+    def logout(self, tokens):
+        return self.client.post("/api/auth/logout/", {"refresh_token": tokens["refresh_token"]},
+                                headers={"Authorization": f"Bearer {tokens['access_token']}"})
+
+    def test_logout_blacklists_the_refresh_token_and_notifies_the_session(self):
+        tokens = self.login()
+        sid = FilteredRefreshToken(tokens["refresh_token"])["sid"]
+        self.assertEqual(self.logout(tokens).status_code, 200)
+
+        # Simple JWT guarda el id del usuario como texto en el claim
+        self.notify.assert_called_once_with(str(self.user.pk), sid)
+        response = self.client.post("/api/auth/refresh/", {"refresh": tokens["refresh_token"]})
+        self.assertEqual(response.status_code, 401)
+
+    def test_other_workers_see_the_logout_after_the_version_interval(self):
+        tokens = self.login()
+        jti = FilteredRefreshToken(tokens["refresh_token"])["jti"]
+        # Otro worker: su propio filtro, ya construido y sin sincronización periódica durante el test
+        other = TokenBlacklist(1000, 0.001, sync_interval=3600, version_interval=0.05)
+        self.assertFalse(other.contains(jti))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.logout(tokens)
+        time.sleep(0.06)
+        self.assertTrue(other.contains(jti))
+
+    def test_refresh_keeps_the_session_id(self):
+        tokens = self.login()
+        response = self.client.post("/api/auth/refresh/", {"refresh": tokens["refresh_token"]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(FilteredRefreshToken(tokens["refresh_token"])["sid"],
+                         json.loads(_jwt_payload(response.json()["access"]))["sid"])
+
+    def test_wrong_password_is_rejected(self):
+        response = self.client.post("/api/auth/login/", {"email": self.user.email, "password": "otra-clave"})
+        self.assertEqual(response.status_code, 401)
+
+
+def _jwt_payload(token):
+    payload = token.split(".")[1]
+    return base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4))
+
+
+class BloomFilterTests(TestCase):
+    def test_has_no_false_negatives_and_keeps_its_false_positive_rate(self):
+        bloom = BloomFilter(10000, 0.01)
+        members = [uuid.uuid4().hex for _ in range(10000)]
+        for jti in members:
+            bloom.add(jti)
+
+        self.assertTrue(all(jti in bloom for jti in members))
+        false_positives = sum(uuid.uuid4().hex in bloom for _ in range(20000))
+        self.assertLess(false_positives / 20000, 0.02)
+
+    def test_warm_misses_run_no_queries(self):
+        blacklist = TokenBlacklist(1000, 0.001, sync_interval=3600, version_interval=3600)
+        blacklist.contains("calentar")
+        with self.assertNumQueries(0):
+            for _ in range(3):
+                self.assertFalse(blacklist.contains(uuid.uuid4().hex))
+
+    def test_false_positives_are_confirmed_against_the_database(self):
+        blacklist = TokenBlacklist(1000, 0.001, sync_interval=3600)
+        blacklist.contains("calentar")
+        # Un filtro saturado responde "sí" a todo: la base decide
+        blacklist.filter = BloomFilter(1, 0.5)
+        for i in range(100):
+            blacklist.filter.add(str(i))
+        self.assertIn("no-esta", blacklist.filter)
+        self.assertFalse(blacklist.contains("no-esta"))
+
+    @override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+    def test_purge_removes_expired_tokens(self):
+        token = FilteredRefreshToken.for_user(user())
+        OutstandingToken.objects.filter(jti=token["jti"]).update(expires_at=timezone.now())
+        self.assertEqual(purge_expired_tokens(), 1)
+        self.assertFalse(OutstandingToken.objects.exists())
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class ProfileTests(TestCase):
+    def setUp(self):
+        caches[PROFILE_CACHE].clear()
+        self.user = user(first_name="Ana")
+
+    def test_serves_repeated_lookups_from_the_shared_cache(self):
+        profile = get_profile(self.user.pk)
+        # Una lectura de la caché compartida, sin usuario ni grupos
+        with self.assertNumQueries(1):
+            self.assertEqual(get_profile(self.user.pk), profile)
+        self.assertIsNone(caches["default"].get(PROFILE_CACHE_KEY.format(self.user.pk)))
+
+    def test_changes_invalidate_the_cached_profile(self):
+        get_profile(self.user.pk)
+        self.user.groups.add(Group.objects.create(name="cliente"))
+        self.assertEqual(get_profile(self.user.pk)["groups"], ["cliente"])
+
+        self.user.first_name = "Ana María"
+        self.user.save()
+        self.assertEqual(get_profile(self.user.pk)["first_name"], "Ana María")
+
+    def test_deactivated_users_cannot_refresh(self):
+        response = self.client.post("/api/auth/login/", {"email": self.user.email, "password": "clave-segura"})
+        get_profile(self.user.pk)
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.post("/api/auth/refresh/", {"refresh": response.json()["refresh_token"]})
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json()["code"], "no_active_account")
+
+    def test_unknown_users_have_no_profile(self):
+        self.assertIsNone(get_profile(999))
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class UserListTests(TestCase):
+    def setUp(self):
+        joined = timezone.now()
+        self.ids = [user(email=f"cliente{i}@example.com").pk for i in range(5)]
+        # Fechas repetidas: el id desempata
+        User.objects.update(date_joined=joined)
+
+    def test_pages_through_users_with_a_stable_order(self):
+        seen, url = [], "/api/auth/?page_size=2"
+        while url:
+            page = self.client.get(url).json()
+            seen += [item["id"] for item in page["results"]]
+            url = page["next"] and page["next"].replace("http://testserver", "")
+        self.assertEqual(seen, sorted(self.ids, reverse=True))
+
+    @override_settings(AUTH_SERVICE_TOKEN="auth-test-token")
+    def test_batch_lookup_reports_missing_ids(self):
+        response = self.client.post("/api/auth/batch/", {"ids": [self.ids[0], 999]}, content_type="application/json",
+                                    headers={"X-Auth-Service-Token": "auth-test-token"})
+        self.assertEqual([row["id"] for row in response.json()["results"]], [self.ids[0]])
+        self.assertEqual(response.json()["missing"], [999])
+
+
+class PasswordPoolTests(TestCase):
+    def test_rejects_hashes_beyond_the_admitted_queue(self):
+        pool = HashPool(workers=1, max_pending=1, queue_timeout=0.01)
+        pool.slots.acquire()
+        with self.assertRaises(PasswordHashBusy) as busy:
+            pool.run(len, "clave")
+        self.assertGreaterEqual(busy.exception.retry_after, 1)
+
+    def test_without_workers_hashes_in_the_request_thread(self):
+        self.assertEqual(HashPool(0, 1, 1).run(len, "clave"), 5)
+
+    @override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+    def test_login_answers_429_with_retry_after_when_saturated(self):
+        user()
+        busy = HashPool(workers=1, max_pending=1, queue_timeout=0.01)
+        busy.slots.acquire()
+        with mock.patch.object(passwords, "pool", busy):
+            response = self.client.post("/api/auth/login/", {"email": "cliente@example.com", "password": "clave-segura"})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], str(busy.retry_after()))
+
+
+@override_settings(AUTH_SERVICE_TOKEN="auth-test-token")
+class RevocationNoticeTests(TestCase):
+    def test_retries_until_the_subscriber_accepts(self):
+        attempts = []
+
+        def handle(request):
+            attempts.append((request.headers["X-Auth-Service-Token"], json.loads(request.content)))
+            return httpx.Response(503 if len(attempts) < 3 else 204)
+
+        with mock.patch.object(revocation, "get_client", lambda name: httpx.Client(transport=httpx.MockTransport(handle))), \
+                mock.patch.object(revocation.time, "sleep"):
+            self.assertTrue(revocation._notify("http://hotels/api/", {"user_id": 1, "session": "s1"}))
+        self.assertEqual(len(attempts), 3)
+        self.assertEqual(attempts[0], ("auth-test-token", {"user_id": 1, "session": "s1"}))
+
+    def test_gives_up_after_the_configured_retries(self):
+        handler = httpx.MockTransport(lambda request: httpx.Response(503))
+        with mock.patch.object(revocation, "get_client", lambda name: httpx.Client(transport=handler)), \
+                mock.patch.object(revocation.time, "sleep"), mock.patch("builtins.print"):
+            self.assertFalse(revocation._notify("http://hotels/api/", {"user_id": 1}))
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class SignupTests(TestCase):
+    def test_welcome_email_goes_through_the_outbox(self):
+        response = self.client.post("/api/auth/", {
+            "email": "nuevo@example.com", "password": "Clave-Segura-123", "password_confirmation": "Clave-Segura-123",
+            "first_name": "Ana", "last_name": "Pérez", "dni": "V123", "phone": "+584120000999",
+        })
+        self.assertEqual(response.status_code, 201)
+        message = NotificationOutbox.objects.get()
+        self.assertEqual((message.destinations, message.status), (["nuevo@example.com"], OutboxStatus.PENDING))
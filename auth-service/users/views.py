@@ -2,20 +2,27 @@
 from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from django.db.models import Prefetch
 from django.contrib.auth import get_user_model
 from django.conf import settings
-import httpx
+from rest_framework_simplejwt.exceptions import TokenError
 # Permissions
 from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 
 # Serializers
 from . import serializers
+from hotelia_common.outbox import enqueue_email
+from .pagination import UserPagination
+from .passwords import PasswordHashBusy
+from .profiles import PROFILE_FIELDS, attach_groups, get_profile
 
 # Models
 
 User = get_user_model()
-NOTIFICATIONS_SERVICE_URL = settings.NOTIFICATIONS_SERVICE_URL
+
+# Campos que devuelve auth/batch/
+USER_SUMMARY_FIELDS = ("id", "email", "first_name", "last_name", "is_active")
 
 
 class UserViewSet(
@@ -28,6 +35,7 @@ class UserViewSet(
 ):
     queryset = User.objects.all()
     serializer_class = serializers.UserModelSerializer
+    pagination_class = UserPagination
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -40,30 +48,33 @@ class UserViewSet(
             permissions = [IsAuthenticated]
         return [p() for p in permissions]
 
+    def handle_exception(self, exc):
+        # Pool de hashes saturado (alta, inicio de sesión, cambio de contraseña)
+        if isinstance(exc, PasswordHashBusy):
+            return Response({"error": str(exc)}, status=status.HTTP_429_TOO_MANY_REQUESTS,
+                            headers={"Retry-After": str(exc.retry_after)})
+        return super().handle_exception(exc)
+
     def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset()).order_by('-date_joined')
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        # Paginado por cursor sobre date_joined; solo se lee una página, como diccionarios
+        # con sus grupos en una consulta más, y se serializa sin instanciar modelos
+        queryset = self.filter_queryset(self.get_queryset()).values(*PROFILE_FIELDS, "date_joined")
+        page = attach_groups(self.paginate_queryset(queryset))
+        serializer = serializers.UserProfileSerializer(page, many=True, context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         serializer.save()
-        try:
-            email = serializer.data.get("email")
-            first_name = serializer.data.get("first_name")
-            last_name = serializer.data.get("last_name")
-            json = {
-                "subject": "USUARIO CREADO",
-                "body": f"Hola, {first_name} {last_name} tu usuario ha sido creado exitosamente. Bienvenido a Hotelia.",
-                "destinations": [email]
-            }
-            response = httpx.post(
-                f'{NOTIFICATIONS_SERVICE_URL}email/', timeout=8, json=json, headers={'X-Notification-Gateway-Token': settings.NOTIFICATION_TOKEN})
-            response.raise_for_status()
-            print(response.json())
-        except httpx.RequestError as e:
-            print("No se pudo enviar el correo")
+        email = serializer.data.get("email")
+        first_name = serializer.data.get("first_name")
+        last_name = serializer.data.get("last_name")
+        # El correo queda en el outbox y se envía en segundo plano, fuera del request
+        enqueue_email(
+            "USUARIO CREADO",
+            f"Hola, {first_name} {last_name} tu usuario ha sido creado exitosamente. Bienvenido a Hotelia.",
+            [email])
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     @action(detail=False, methods=["post"])
@@ -79,6 +90,16 @@ class UserViewSet(
         }
         return Response(data, status=status.HTTP_201_CREATED)
 
+    @action(detail=False, methods=["post"], authentication_classes=[])
+    def refresh(self, request):
+        # Lo usa el gateway (auth/refresh/); mismo comportamiento que api/token/refresh/
+        serializer = serializers.UserTokenRefreshSerializer(data=request.data)
+        try:
+            serializer.is_valid(raise_exception=True)
+        except TokenError as e:
+            return Response({"error": str(e)}, status=status.HTTP_401_UNAUTHORIZED)
+        return Response(serializer.validated_data, status=status.HTTP_200_OK)
+
     @action(detail=False, methods=["post"])
     def logout(self, request):
         serializer = serializers.UserLogoutSerializer(data=request.data)
@@ -115,9 +136,26 @@ class UserViewSet(
         except User.DoesNotExist:
             return Response({"error": "Usuario no encontrado"}, status=404)
 
+    @action(detail=False, methods=["post"])
+    def batch(self, request):
+        # Datos básicos de varios usuarios en una consulta, para que los servicios no pidan uno por uno
+        token = getattr(settings, "AUTH_SERVICE_TOKEN", None)
+        is_service = bool(token) and request.headers.get("X-Auth-Service-Token") == token
+        if not request.user.is_authenticated and not is_service:
+            return Response({"error": "No estas autenticado"}, status=status.HTTP_401_UNAUTHORIZED)
+        serializer = serializers.UserBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = set(serializer.validated_data["ids"])
+        users = list(User.objects.filter(id__in=ids).order_by("id").values(*USER_SUMMARY_FIELDS))
+        missing = sorted(ids - {user["id"] for user in users})
+        return Response({"results": users, "missing": missing}, status=status.HTTP_200_OK)
+
     @action(detail=False, methods=["post"])
     def me(self, request):
         if not request.user.is_authenticated:
             return Response({"error": "No estas autenticado"}, status=status.HTTP_401_UNAUTHORIZED)
-        data = self.get_serializer(request.user).data
+        # El gateway lo consulta en cada token nuevo: se sirve el perfil cacheado (users/profiles.py)
+        data = get_profile(request.user.pk)
+        if data is None:
+            return Response({"error": "Usuario no encontrado"}, status=status.HTTP_404_NOT_FOUND)
         return Response(data, status=status.HTTP_200_OK)
@@ -9,8 +9,14 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_asgi_application()
+
+# Abre el almacén vectorial y carga sus índices antes de atender la primera petición
+if settings.VECTOR_STORE_WARMUP:
+    from llama.vectorstore import warm_up
+    warm_up()
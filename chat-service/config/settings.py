@@ -8,7 +8,9 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 RESERVATIONS_GATEWAY_TOKEN = os.getenv("RESERVATION_TOKEN")
 AUTH_SERVICE_TOKEN = os.getenv("AUTH_SERVICE_TOKEN")
 HOTELS_GATEWAY_TOKEN = os.getenv("HOTEL_SERVICE_TOKEN")
+CHATBOT_GATEWAY_TOKEN = os.getenv("CHATBOT_TOKEN")
 NOTIFICATION_TOKEN = os.getenv("NOTIFICATION_TOKEN")
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
 
 GATEWAY_SERVICE_URL = os.getenv("GATEWAY_SERVICE_URL")
 AUTH_SERVICE_URL = os.getenv("USERS_SERVICE_URL")
@@ -22,16 +24,89 @@ OLLAMA_API = os.getenv("OLLAMA_API")
 MODEL_NAME = os.getenv("MODEL_NAME")
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 
-CHROMADB_PATH = BASE_DIR / "chroma_store"
+# Clientes HTTP hacia otros servicios (hotelia_common.clients); HTTP_CLIENTS sobrescribe cualquier clave.
+# Los modelos locales pueden tardar minutos en responder; se limita la concurrencia contra ellos
+HTTP_UPSTREAMS = {
+    "auth": {"timeout": 7.0},
+    "hotels": {"timeout": 10.0},
+    "ollama": {"timeout": 1000.0, "max_connections": 8, "max_keepalive": 8},
+    "llamacpp": {"timeout": 900.0, "max_connections": 8, "max_keepalive": 8},
+    "gemini": {"timeout": 120.0, "connect_timeout": 10.0},
+}
+
+CHROMADB_PATH = Path(os.getenv("CHROMADB_PATH", BASE_DIR / "chroma_store"))
+# Almacén vectorial (ver llama/vectorstore.py): "chroma" o "numpy" para catálogos pequeños.
+# "numpy" reescribe el .npz completo en cada escritura, así que solo se usa para las colecciones
+# de VECTOR_STORE_NUMPY_COLLECTIONS (los documentos, unos pocos miles); el historial y la caché de
+# respuestas crecen con cada pregunta y quedan en Chroma aunque el backend sea "numpy".
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "chroma")
+VECTOR_STORE_NUMPY_COLLECTIONS = os.getenv("VECTOR_STORE_NUMPY_COLLECTIONS", "hotel_docs,gemini_hotel_docs").split(",")
+VECTOR_STORE_READ_ONLY = os.getenv("VECTOR_STORE_READ_ONLY", "False") == "True"
+VECTOR_STORE_WARMUP = os.getenv("VECTOR_STORE_WARMUP", "True") == "True"
+# Último cambio del catálogo ya aplicado por sync_docs (un archivo por motor)
+DOCS_SYNC_CURSOR_DIR = Path(os.getenv("DOCS_SYNC_CURSOR_DIR", CHROMADB_PATH))
+DOCS_SYNC_INTERVAL = int(os.getenv("DOCS_SYNC_INTERVAL", 60))
+
+# Caché de embeddings (LRU en memoria + SQLite en disco)
+LLAMACPP_EMBEDDING_MODEL = os.getenv("LLAMACPP_EMBEDDING_MODEL")
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", BASE_DIR / "embedding_cache.sqlite3")
+EMBEDDING_CACHE_MEMORY_SIZE = int(os.getenv("EMBEDDING_CACHE_MEMORY_SIZE", 2048))
+EMBEDDING_CACHE_DISK_SIZE = int(os.getenv("EMBEDDING_CACHE_DISK_SIZE", 200000))
+
+# Caché semántica de respuestas del chatbot
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "True") == "True"
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", 0.95))
+ANSWER_CACHE_TTL = int(os.getenv("ANSWER_CACHE_TTL", 24 * 60 * 60))
+DOCS_VERSION_DIR = Path(os.getenv("DOCS_VERSION_DIR", CHROMADB_PATH))
+
+# Planificador de generaciones contra los modelos locales (Ollama, llama.cpp)
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", 1))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", 16))
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", 120))
+
+# Armado del contexto de los prompts (ver llama/context.py); sin variable se usa el valor por defecto
+CONTEXT_TOKEN_BUDGETS = {
+    engine: int(os.getenv(f"CONTEXT_TOKENS_{engine.upper()}"))
+    for engine in ("ollama", "llamacpp", "gemini")
+    if os.getenv(f"CONTEXT_TOKENS_{engine.upper()}")
+}
+CONTEXT_MAX_DISTANCE = {
+    engine: float(os.getenv(f"CONTEXT_MAX_DISTANCE_{engine.upper()}"))
+    for engine in ("ollama", "llamacpp", "gemini")
+    if os.getenv(f"CONTEXT_MAX_DISTANCE_{engine.upper()}")
+}
+CONTEXT_RELATIVE_CUTOFF = float(os.getenv("CONTEXT_RELATIVE_CUTOFF", 2.0))
+
+# Historial de conversaciones en la base relacional (ver llama/history.py)
+HISTORY_MAX_PAGE_SIZE = int(os.getenv("HISTORY_MAX_PAGE_SIZE", 100))
 
 ALLOWED_HOSTS = ["*"]
 
 
+# Marcas de revocación de token (hotelia_common.revocation). Las leen todos los workers, así que
+# van en una caché compartida: por defecto una tabla en la base (la crea `migrate`) o Redis con
+# REVOCATION_CACHE_BACKEND=django.core.cache.backends.redis.RedisCache. Con LocMemCache solo
+# funciona con un worker: el aviso del auth-service llega a un único proceso.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "revocations": {
+        "BACKEND": os.getenv("REVOCATION_CACHE_BACKEND", "django.core.cache.backends.db.DatabaseCache"),
+        "LOCATION": os.getenv("REVOCATION_CACHE_LOCATION", "hotelia_revocations"),
+    },
+}
+
+# Cada worker guarda las marcas leídas hasta AUTH_REVOCATION_LOCAL_TTL segundos: ahorra la consulta
+# a CACHES["revocations"] en cada petición a costa de ver las revocaciones de otros workers con ese retraso
+AUTH_REVOCATION_LOCAL_TTL = float(os.getenv("AUTH_REVOCATION_LOCAL_TTL", 2.0))
+
 INSTALLED_APPS = [
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.staticfiles',
     'rest_framework',
+    'hotelia_common',
     'llama'
 ]
 
@@ -69,7 +144,12 @@ REST_FRAMEWORK = {
 
 WSGI_APPLICATION = 'config.wsgi.application'
 
-DATABASES = {}
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+    }
+}
 
 
 LANGUAGE_CODE = 'es-MX'
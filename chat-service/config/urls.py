@@ -1,9 +1,18 @@
 
 from django.urls import path
-from llama.views import OLlamaBotView, ChatLlamaCppView, ChatGeminiView
+from hotelia_common.views import HttpClientMetricsView, TokenRevocationView
+from llama.views import (
+    OLlamaBotView, ChatLlamaCppView, ChatGeminiView,
+    EmbeddingCacheMetricsView, AnswerCacheMetricsView, LLMSchedulerMetricsView,
+)
 
 urlpatterns = [
     path('api/ollama/', OLlamaBotView.as_view(),name="ollama-chatbot"),
     path("api/llamacpp/", ChatLlamaCppView.as_view(), name="llamacpp-chatbot"),
-    path("api/gemini/", ChatGeminiView.as_view(), name="gemini-chatbot")
+    path("api/gemini/", ChatGeminiView.as_view(), name="gemini-chatbot"),
+    path("api/auth/revoke/", TokenRevocationView.as_view(), name="token-revoke"),
+    path("api/metrics/http/", HttpClientMetricsView.as_view(), name="http-client-metrics"),
+    path("api/metrics/embeddings/", EmbeddingCacheMetricsView.as_view(), name="embedding-cache-metrics"),
+    path("api/metrics/answers/", AnswerCacheMetricsView.as_view(), name="answer-cache-metrics"),
+    path("api/metrics/llm/", LLMSchedulerMetricsView.as_view(), name="llm-scheduler-metrics"),
 ]
@@ -9,8 +9,14 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
+
+# Abre el almacén vectorial y carga sus índices antes de atender la primera petición
+if settings.VECTOR_STORE_WARMUP:
+    from llama.vectorstore import warm_up
+    warm_up()
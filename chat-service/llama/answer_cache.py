@@ -0,0 +1,154 @@
+import threading
+import time
+from uuid import uuid4
+
+from django.conf import settings
+
+from . import vectorstore
+
+# Similitud coseno mínima entre preguntas para reutilizar una respuesta
+ANSWER_CACHE_THRESHOLD = getattr(settings, "ANSWER_CACHE_THRESHOLD", 0.95)
+ANSWER_CACHE_TTL = getattr(settings, "ANSWER_CACHE_TTL", 24 * 60 * 60)
+ANSWER_CACHE_ENABLED = getattr(settings, "ANSWER_CACHE_ENABLED", True)
+DOCS_VERSION_DIR = getattr(settings, "DOCS_VERSION_DIR", settings.CHROMADB_PATH)
+# Cada cuántas respuestas guardadas se purgan las entradas vencidas o de otra versión
+ANSWER_CACHE_PRUNE_EVERY = 200
+
+# Alcance de las respuestas que no dependen del historial de ningún usuario
+SHARED_SCOPE = "*"
+
+
+def _version_path(collection):
+    return DOCS_VERSION_DIR / f"{collection.name}.version"
+
+
+def docs_version(collection):
+    try:
+        return _version_path(collection).read_text().strip() or "0"
+    except OSError:
+        return "0"
+
+
+def bump_docs_version(collection):
+    # Cualquier escritura en la colección de documentos invalida las respuestas cacheadas con ella
+    path = _version_path(collection)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(uuid4().hex)
+    tmp.replace(path)
+
+
+class AnswerCache:
+    """
+    Caché semántica de respuestas del chatbot: guarda el embedding de cada pregunta respondida
+    junto con la respuesta y la versión de la colección de documentos usada, y reutiliza la
+    respuesta cuando llega una pregunta suficientemente parecida con la misma versión.
+    Si el contexto incluyó historial del usuario la respuesta solo se reutiliza para ese usuario.
+    """
+
+    def __init__(self, engine, embed, docs_collection, threshold=ANSWER_CACHE_THRESHOLD, ttl=ANSWER_CACHE_TTL):
+        self.engine = engine
+        self.embed = embed
+        self.docs_collection = docs_collection
+        self.threshold = threshold
+        self.ttl = ttl
+        self.collection = vectorstore.collection(f"answer_cache_{engine}", metadata={"hnsw:space": "cosine"})
+        self.lock = threading.Lock()
+        self.stores = 0
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "errors": 0,
+                      "saved_ms": 0.0, "lookup_ms": 0.0}
+
+    def _count(self, **amounts):
+        with self.lock:
+            for name, amount in amounts.items():
+                self.stats[name] += amount
+
+    def lookup(self, query, user_id):
+        """Devuelve la respuesta cacheada para la pregunta o None."""
+        if not ANSWER_CACHE_ENABLED:
+            return None
+        started = time.monotonic()
+        try:
+            results = self.collection.query(
+                query_embeddings=[self.embed(query)],
+                n_results=1,
+                where={"$and": [
+                    {"docs_version": docs_version(self.docs_collection)},
+                    {"scope": {"$in": [SHARED_SCOPE, str(user_id)]}},
+                    {"created_at": {"$gte": time.time() - self.ttl}},
+                ]},
+                include=["metadatas", "distances"],
+            )
+        except Exception as e:
+            print(f"Error al consultar la caché de respuestas ({self.engine}): {e}")
+            self._count(errors=1)
+            return None
+        lookup_ms = (time.monotonic() - started) * 1000
+
+        metadatas = (results.get("metadatas") or [[]])[0]
+        distances = (results.get("distances") or [[]])[0]
+        # En el espacio coseno de Chroma la distancia es 1 - similitud
+        if metadatas and 1 - distances[0] >= self.threshold:
+            self._count(hits=1, lookup_ms=lookup_ms, saved_ms=metadatas[0].get("elapsed_ms", 0))
+            return metadatas[0]["answer"]
+        self._count(misses=1, lookup_ms=lookup_ms)
+        return None
+
+    def store(self, query, user_id, answer, personal, elapsed_ms):
+        """`personal` indica que el contexto usado incluía historial del usuario."""
+        if not ANSWER_CACHE_ENABLED or vectorstore.store.read_only:
+            return
+        try:
+            self.collection.add(
+                ids=[uuid4().hex],
+                embeddings=[self.embed(query)],
+                documents=[query],
+                metadatas=[{
+                    "answer": answer,
+                    "scope": str(user_id) if personal else SHARED_SCOPE,
+                    "docs_version": docs_version(self.docs_collection),
+                    "created_at": time.time(),
+                    "elapsed_ms": round(elapsed_ms, 1),
+                }],
+            )
+        except Exception as e:
+            print(f"Error al guardar en la caché de respuestas ({self.engine}): {e}")
+            self._count(errors=1)
+            return
+        self._count(stores=1)
+        with self.lock:
+            self.stores += 1
+            prune = self.stores % ANSWER_CACHE_PRUNE_EVERY == 0
+        if prune:
+            self.prune()
+
+    def prune(self):
+        try:
+            self.collection.delete(where={"$or": [
+                {"docs_version": {"$ne": docs_version(self.docs_collection)}},
+                {"created_at": {"$lt": time.time() - self.ttl}},
+            ]})
+        except Exception as e:
+            print(f"Error al purgar la caché de respuestas ({self.engine}): {e}")
+
+    def snapshot(self):
+        with self.lock:
+            stats = dict(self.stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else None
+        stats["avg_lookup_ms"] = round(stats["lookup_ms"] / lookups, 2) if lookups else None
+        stats["saved_ms"] = round(stats["saved_ms"], 1)
+        stats["lookup_ms"] = round(stats["lookup_ms"], 1)
+        return stats
+
+
+# Cachés registradas por cada motor (rag.py, rag_llamacpp.py, rag_gemini.py)
+answer_caches = {}
+
+
+def register_answer_cache(engine, embed, docs_collection):
+    answer_caches[engine] = AnswerCache(engine, embed, docs_collection)
+    return answer_caches[engine]
+
+
+def answer_cache_stats():
+    return {engine: cache.snapshot() for engine, cache in answer_caches.items()}
@@ -0,0 +1,112 @@
+import math
+from dataclasses import dataclass
+
+from django.conf import settings
+
+NO_DOCS = "Sin contexto de documentos."
+NO_HISTORY = "\nSin historial previo relevante.\n"
+
+# Presupuesto de tokens del prompt completo (instrucciones + contexto + pregunta) por motor.
+# En llama.cpp sobre CPU el tiempo de procesar el prompt domina la latencia: se mantiene corto.
+DEFAULT_BUDGETS = {
+    "ollama": 1536,
+    "llamacpp": 1024,
+    "gemini": 4096,
+}
+CONTEXT_TOKEN_BUDGETS = {**DEFAULT_BUDGETS, **getattr(settings, "CONTEXT_TOKEN_BUDGETS", {})}
+# Distancia máxima aceptada por motor; depende del modelo de embeddings, sin valor no se filtra
+CONTEXT_MAX_DISTANCE = getattr(settings, "CONTEXT_MAX_DISTANCE", {})
+# Se descarta lo que esté más de N veces más lejos que el fragmento más cercano de su fuente
+CONTEXT_RELATIVE_CUTOFF = getattr(settings, "CONTEXT_RELATIVE_CUTOFF", 2.0)
+# Fracción del presupuesto de contexto reservada al historial del usuario
+CONTEXT_HISTORY_SHARE = getattr(settings, "CONTEXT_HISTORY_SHARE", 0.3)
+# Estimación sin tokenizador: los modelos usados rondan 3-4 caracteres por token en español
+CHARS_PER_TOKEN = getattr(settings, "CONTEXT_CHARS_PER_TOKEN", 3.5)
+
+
+@dataclass
+class Chunk:
+    text: str
+    distance: float
+    key: tuple
+
+    @property
+    def tokens(self):
+        return estimate_tokens(self.text)
+
+
+def estimate_tokens(text):
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def chunk_key(text, metadata):
+    # Un hotel o habitación puede estar indexado más de una vez (ids viejos, ingestas repetidas)
+    metadata = metadata or {}
+    if metadata.get("source") in ("hotel", "room") and metadata.get("id") is not None:
+        return metadata["source"], str(metadata["id"])
+    return "text", " ".join(text.split())
+
+
+def _relevant(chunks, max_distance):
+    # Ordena por distancia, deja un fragmento por entidad y corta los poco relevantes
+    best = {}
+    for chunk in chunks:
+        if chunk.key not in best or chunk.distance < best[chunk.key].distance:
+            best[chunk.key] = chunk
+    chunks = sorted(best.values(), key=lambda chunk: chunk.distance)
+    if max_distance is not None:
+        chunks = [chunk for chunk in chunks if chunk.distance <= max_distance]
+    if chunks and chunks[0].distance > 0:
+        limit = chunks[0].distance * CONTEXT_RELATIVE_CUTOFF
+        chunks = [chunk for chunk in chunks if chunk.distance <= limit]
+    return chunks
+
+
+def _fill(chunks, budget, seen):
+    taken = []
+    for chunk in chunks:
+        if chunk.key in seen or chunk.tokens > budget:
+            continue
+        seen.add(chunk.key)
+        taken.append(chunk)
+        budget -= chunk.tokens
+    return taken
+
+
+def assemble_context(engine, docs, history, reserved=""):
+    """
+    Une los documentos y turnos de historial recuperados (listas de Chunk) dentro del
+    presupuesto de tokens del motor. `reserved` es el resto del prompt (instrucciones y
+    pregunta), que se descuenta del presupuesto. Devuelve el contexto y si incluye historial.
+    """
+    max_distance = CONTEXT_MAX_DISTANCE.get(engine)
+    docs = _relevant(docs, max_distance)
+    # Solo se usan turnos completos "Usuario: ...\nAsistente: ..." del historial
+    history = _relevant([turn for turn in history if "\nAsistente:" in turn.text], max_distance)
+
+    available = max(0, CONTEXT_TOKEN_BUDGETS.get(engine, DEFAULT_BUDGETS["llamacpp"]) - estimate_tokens(reserved))
+    seen = set()
+    # El historial usa como máximo su parte; lo que no ocupa queda para los documentos
+    history_taken = _fill(history, int(available * CONTEXT_HISTORY_SHARE), seen)
+    docs_budget = available - sum(turn.tokens for turn in history_taken)
+    docs_taken = _fill(docs, docs_budget, seen)
+
+    context = "\n".join(chunk.text for chunk in docs_taken) if docs_taken else NO_DOCS
+    context += "\n\nHistorial relevante:\n"
+    context += "\n".join(chunk.text for chunk in history_taken) if history_taken else NO_HISTORY
+
+    print(
+        f"Contexto {engine}: {len(docs_taken)}/{len(docs)} documentos, "
+        f"{len(history_taken)}/{len(history)} turnos de historial, "
+        f"~{estimate_tokens(reserved) + estimate_tokens(context)} tokens de prompt "
+        f"(presupuesto {CONTEXT_TOKEN_BUDGETS.get(engine)})"
+    )
+    return context, bool(history_taken)
+
+
+def log_prompt_usage(engine, tokens, elapsed_ms=None):
+    # Tokens de prompt que informó el modelo, para comparar con la estimación de assemble_context
+    if tokens is None:
+        return
+    timing = f" procesados en {elapsed_ms:.0f} ms" if elapsed_ms else ""
+    print(f"Prompt {engine}: {tokens} tokens{timing}")
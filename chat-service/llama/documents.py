@@ -0,0 +1,41 @@
+import hashlib
+
+
+# Texto que se indexa por cada hotel y habitación del hotels-service. Lo usan tanto la ingesta
+# completa (ingest_docs) como la incremental (sync_docs), así ambas producen el mismo documento.
+def hotel_document(hotel):
+    id = hotel.get("id", "unknown")
+    text = (
+        f"Hotel: {hotel.get('name', 'Hotel sin nombre')}. "
+        f"Descripción: {hotel.get('description', '')}. "
+        f"Estrellas: Hotel de {hotel.get('star_rating', 1)} estrellas. "
+        f"Servicios: {hotel.get('services', '')}. "
+        f"Correo: {hotel.get('email', 'Hotel sin correo')}. "
+        f"Telefono: {hotel.get('phone', 'Hotel sin telefono')}. "
+        f"Ciudad: {hotel.get('city', '')}. "
+        f"Política de pago: {hotel.get('payment_policy', '')}. "
+        f"Política de reservaciones: {hotel.get('reservation_policy', '')}."
+    )
+    return document_id("hotel", id), text, {"source": "hotel", "id": id}
+
+
+def room_document(room):
+    id = room.get("id", "unknown")
+    text = (
+        f"Habitación {room.get('room_number', 'Sin número')} del hotel {room.get('hotel_name', 'Hotel sin nombre')}. "
+        f"Tipo de habitación: {room.get('room_type', '')}. "
+        f"Capacidad: {room.get('capacity', '')}. "
+        f"Precio por noche: {room.get('price_per_night', '')}$."
+    )
+    return document_id("room", id), text, {"source": "room", "id": id}
+
+
+BUILDERS = {"hotel": hotel_document, "room": room_document}
+
+
+def document_id(kind, object_id):
+    return f"{kind}_{object_id}"
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode()).hexdigest()
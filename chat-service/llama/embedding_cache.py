@@ -0,0 +1,169 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+from django.conf import settings
+
+EMBEDDING_CACHE_PATH = getattr(settings, "EMBEDDING_CACHE_PATH", "./embedding_cache.sqlite3")
+# Entradas en memoria del proceso (LRU) y filas máximas en disco antes de desalojar las menos usadas
+EMBEDDING_CACHE_MEMORY_SIZE = getattr(settings, "EMBEDDING_CACHE_MEMORY_SIZE", 2048)
+EMBEDDING_CACHE_DISK_SIZE = getattr(settings, "EMBEDDING_CACHE_DISK_SIZE", 200_000)
+# Cada cuántas escrituras se revisa el tamaño en disco
+EMBEDDING_CACHE_TRIM_EVERY = 500
+
+
+def cache_key(engine, model, text):
+    digest = hashlib.sha256(text.encode()).hexdigest()
+    return f"{engine}:{model}:{digest}"
+
+
+class EmbeddingCache:
+    """
+    Caché de embeddings en dos niveles, indexada por (motor, modelo, sha256 del texto):
+    un LRU en memoria delante de una tabla SQLite con los vectores guardados como float32.
+    """
+
+    def __init__(self, path=EMBEDDING_CACHE_PATH, memory_size=EMBEDDING_CACHE_MEMORY_SIZE,
+                 disk_size=EMBEDDING_CACHE_DISK_SIZE):
+        self.path = str(path)
+        self.memory_size = memory_size
+        self.disk_size = disk_size
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.writes = 0
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0,
+                      "memory_evictions": 0, "disk_evictions": 0, "errors": 0}
+
+    def _connection(self):
+        # sqlite3 no comparte conexiones entre hilos: una por hilo
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)")
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS embeddings_last_used_idx ON embeddings (last_used)")
+            self.local.connection = connection
+        return connection
+
+    def _remember(self, key, vector):
+        with self.lock:
+            self.memory[key] = vector
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.memory_size:
+                self.memory.popitem(last=False)
+                self.stats["memory_evictions"] += 1
+
+    def _count(self, name, amount=1):
+        with self.lock:
+            self.stats[name] += amount
+
+    def get_many(self, keys):
+        found = {}
+        with self.lock:
+            for key in keys:
+                if key in self.memory:
+                    self.memory.move_to_end(key)
+                    found[key] = self.memory[key]
+            self.stats["memory_hits"] += len(found)
+
+        missing = [key for key in keys if key not in found]
+        if missing:
+            try:
+                connection = self._connection()
+                placeholders = ",".join("?" * len(missing))
+                rows = connection.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", missing).fetchall()
+                if rows:
+                    connection.execute(
+                        f"UPDATE embeddings SET last_used = ? WHERE key IN ({','.join('?' * len(rows))})",
+                        [time.time(), *(key for key, _ in rows)])
+                    connection.commit()
+            except sqlite3.Error as e:
+                print(f"Error al leer la caché de embeddings: {e}")
+                self._count("errors")
+                rows = []
+            for key, blob in rows:
+                vector = array("f")
+                vector.frombytes(blob)
+                vector = vector.tolist()
+                found[key] = vector
+                self._remember(key, vector)
+            self._count("disk_hits", len(rows))
+        self._count("misses", len(keys) - len(found))
+        return found
+
+    def set_many(self, items):
+        for key, vector in items.items():
+            self._remember(key, list(vector))
+        try:
+            connection = self._connection()
+            now = time.time()
+            connection.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [(key, array("f", vector).tobytes(), now) for key, vector in items.items()])
+            connection.commit()
+        except sqlite3.Error as e:
+            print(f"Error al escribir la caché de embeddings: {e}")
+            self._count("errors")
+            return
+        with self.lock:
+            self.writes += len(items)
+            trim = self.writes >= EMBEDDING_CACHE_TRIM_EVERY
+            if trim:
+                self.writes = 0
+        if trim:
+            self._trim(connection)
+
+    def _trim(self, connection):
+        try:
+            (total,) = connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+            excess = total - self.disk_size
+            if excess > 0:
+                connection.execute(
+                    "DELETE FROM embeddings WHERE key IN ("
+                    " SELECT key FROM embeddings ORDER BY last_used LIMIT ?)", [excess])
+                connection.commit()
+                self._count("disk_evictions", excess)
+        except sqlite3.Error as e:
+            print(f"Error al recortar la caché de embeddings: {e}")
+            self._count("errors")
+
+    def embeddings(self, engine, model, texts, compute):
+        """
+        Devuelve un embedding por texto, en orden. Solo los textos que no están en caché
+        se envían a `compute` (una sola llamada por lote).
+        """
+        keys = [cache_key(engine, model, text) for text in texts]
+        found = self.get_many(list(dict.fromkeys(keys)))
+        pending = {key: text for key, text in zip(keys, texts) if key not in found}
+        if pending:
+            computed = compute(list(pending.values()))
+            if len(computed) != len(pending):
+                raise ValueError(f"se esperaban {len(pending)} embeddings y llegaron {len(computed)}")
+            fresh = dict(zip(pending, computed))
+            self.set_many(fresh)
+            found.update(fresh)
+        return [found[key] for key in keys]
+
+    def snapshot(self):
+        with self.lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self.memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 4) if lookups else None
+        return stats
+
+
+embedding_cache = EmbeddingCache()
+
+
+def cached_embedding(engine, model, text, compute):
+    return embedding_cache.embeddings(engine, model, [text], compute)[0]
@@ -0,0 +1,66 @@
+import re
+from functools import reduce
+from operator import and_
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+
+from .models import ChatInteraction
+
+HISTORY_MAX_PAGE_SIZE = getattr(settings, "HISTORY_MAX_PAGE_SIZE", 100)
+
+
+def record_interaction(engine, user_id, query, answer, embedding_id=None):
+    return ChatInteraction.objects.create(
+        engine=engine, user_id=str(user_id), query=query, answer=answer, embedding_id=embedding_id)
+
+
+def _item(interaction):
+    return {
+        "id": interaction.id,
+        "query": interaction.query,
+        "answer": interaction.answer,
+        "created_at": interaction.created_at,
+    }
+
+
+def recent_history(engine, user_id, limit=10, before=None):
+    """
+    Una página del historial, de la interacción más reciente a la más antigua, leída por el
+    índice (engine, user_id, -id). Devuelve (items, cursor) donde cursor es el `before` de la
+    página siguiente o None si no hay más.
+    """
+    limit = max(1, min(limit, HISTORY_MAX_PAGE_SIZE))
+    queryset = ChatInteraction.objects.filter(engine=engine, user_id=str(user_id))
+    if before is not None:
+        queryset = queryset.filter(id__lt=before)
+    rows = list(queryset.order_by("-id")[:limit + 1])
+    cursor = rows[limit - 1].id if len(rows) > limit else None
+    return [_item(row) for row in rows[:limit]], cursor
+
+
+def _terms(text):
+    return re.findall(r"\w+", text)
+
+
+def search_history(engine, user_id, text, limit=5):
+    """Búsqueda de texto completo (FTS5) en preguntas y respuestas del usuario, por relevancia."""
+    terms = _terms(text)
+    if not terms:
+        return []
+    limit = max(1, min(limit, HISTORY_MAX_PAGE_SIZE))
+    if connection.vendor == "sqlite":
+        # Cada término entre comillas (sin operadores de FTS) y como prefijo: "pag"* encuentra "pago"
+        match = " ".join('"{}"*'.format(term) for term in terms)
+        rows = ChatInteraction.objects.raw(
+            "SELECT c.* FROM llama_chatinteraction_fts f "
+            "JOIN llama_chatinteraction c ON c.id = f.rowid "
+            "WHERE llama_chatinteraction_fts MATCH %s AND c.engine = %s AND c.user_id = %s "
+            "ORDER BY f.rank LIMIT %s",
+            [match, engine, str(user_id), limit],
+        )
+    else:
+        matches = reduce(and_, (Q(query__icontains=term) | Q(answer__icontains=term) for term in terms))
+        rows = ChatInteraction.objects.filter(matches, engine=engine, user_id=str(user_id)).order_by("-id")[:limit]
+    return [_item(row) for row in rows]
@@ -0,0 +1,107 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+
+from django.conf import settings
+
+from . import rag, rag_gemini, rag_llamacpp
+from .answer_cache import bump_docs_version
+from .documents import content_hash
+
+INGEST_BATCH_SIZE = getattr(settings, "INGEST_BATCH_SIZE", 32)
+INGEST_CONCURRENCY = getattr(settings, "INGEST_CONCURRENCY", 4)
+# Documentos que se comparan de una vez contra los ids existentes en Chroma
+INGEST_PAGE_SIZE = getattr(settings, "INGEST_PAGE_SIZE", 512)
+
+# Colección de documentos y función de embeddings por lote de cada motor
+ENGINES = {
+    "ollama": (rag.collection_docs, rag.get_ollama_embeddings),
+    "llama": (rag_llamacpp.docs_collection, rag_llamacpp.get_llamacpp_embeddings),
+    "gemini": (rag_gemini.docs_collection, rag_gemini.get_gemini_embeddings),
+}
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _stored_hashes(collection, ids):
+    if not ids:
+        return {}
+    existing = collection.get(ids=ids, include=["metadatas"])
+    return {doc_id: (metadata or {}).get("content_hash")
+            for doc_id, metadata in zip(existing["ids"], existing["metadatas"])}
+
+
+class IngestPipeline:
+    """
+    Ingesta en streaming de documentos (id, texto, metadata) hacia Chroma:
+    compara cada página contra la colección en una sola consulta y descarta los documentos
+    cuyo hash de contenido no cambió (ver llama/documents.py); de los demás pide los
+    embeddings por lotes con un máximo de `concurrency` lotes en vuelo y escribe
+    cada lote con un solo upsert.
+    """
+
+    def __init__(self, engine, batch_size=INGEST_BATCH_SIZE, concurrency=INGEST_CONCURRENCY,
+                 force=False, log=print):
+        self.collection, self.embed = ENGINES[engine]
+        self.batch_size = batch_size
+        self.concurrency = max(1, concurrency)
+        self.force = force
+        self.log = log
+        self.stats = {"seen": 0, "skipped": 0, "written": 0, "failed": 0, "deleted": 0}
+
+    def _pending_batches(self, documents):
+        for page in _chunks(documents, INGEST_PAGE_SIZE):
+            # Ids repetidos dentro de la misma página: gana el último
+            page = list({str(doc_id): (str(doc_id), text, {**(metadata or {}), "content_hash": content_hash(text)})
+                         for doc_id, text, metadata in page}.values())
+            self.stats["seen"] += len(page)
+            if not self.force:
+                stored = _stored_hashes(self.collection, [doc[0] for doc in page])
+                unchanged = [doc for doc in page if stored.get(doc[0]) == doc[2]["content_hash"]]
+                self.stats["skipped"] += len(unchanged)
+                page = [doc for doc in page if stored.get(doc[0]) != doc[2]["content_hash"]]
+            yield from _chunks(page, self.batch_size)
+
+    def _write(self, batch, embeddings):
+        ids, texts, metadatas = zip(*batch)
+        # Chroma no es seguro entre hilos al escribir: las escrituras se hacen en el hilo principal
+        self.collection.upsert(ids=list(ids), documents=list(texts),
+                               metadatas=list(metadatas), embeddings=embeddings)
+        self.stats["written"] += len(batch)
+
+    def _collect(self, futures, done):
+        for future in done:
+            batch = futures.pop(future)
+            try:
+                embeddings = future.result()
+                if len(embeddings) != len(batch):
+                    raise ValueError(f"se esperaban {len(batch)} embeddings y llegaron {len(embeddings)}")
+                self._write(batch, embeddings)
+            except Exception as e:
+                self.stats["failed"] += len(batch)
+                self.log(f"Error al ingresar el lote que inicia en '{batch[0][0]}': {e}")
+
+    def run(self, documents):
+        futures = {}
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="ingest") as pool:
+            for batch in self._pending_batches(documents):
+                if len(futures) >= self.concurrency:
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    self._collect(futures, done)
+                futures[pool.submit(self.embed, [text for _, text, _ in batch])] = batch
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                self._collect(futures, done)
+        if self.stats["written"]:
+            bump_docs_version(self.collection)
+        return self.stats
+
+    def delete(self, ids):
+        ids = [str(doc_id) for doc_id in ids]
+        if ids:
+            self.collection.delete(ids=ids)
+            self.stats["deleted"] += len(ids)
+            bump_docs_version(self.collection)
@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand
+
+from llama import vectorstore
+from llama.models import ChatInteraction
+
+# Colecciones de historial en Chroma; Ollama y llama.cpp comparten "chat_history"
+COLLECTIONS = ["chat_history", "gemini_chat_history"]
+PAGE_SIZE = 1000
+
+
+def engine_for(collection_name, embedding_id):
+    if collection_name == "gemini_chat_history":
+        return "gemini"
+    # rag.py guarda con ids "chat_<usuario>_...", rag_llamacpp.py con "<usuario>-<uuid>"
+    return "ollama" if embedding_id.startswith("chat_") else "llamacpp"
+
+
+def split_turn(document):
+    # Formato guardado: "Usuario: <pregunta>\nAsistente: <respuesta>"
+    query, _, answer = document.partition("\nAsistente:")
+    return query.replace("Usuario:", "", 1).strip(), answer.strip()
+
+
+class Command(BaseCommand):
+    help = (
+        "Copia a la tabla de historial las interacciones que solo existen en las colecciones "
+        "de Chroma (guardadas antes de tener el historial en la base de datos)."
+    )
+
+    def handle(self, *args, **options):
+        existing = set(ChatInteraction.objects.exclude(embedding_id=None).values_list("embedding_id", flat=True))
+
+        for name in COLLECTIONS:
+            collection = vectorstore.collection(name, create=False)
+            try:
+                collection.resolve()
+            except Exception:
+                self.stdout.write(f"{name}: no existe, se omite")
+                continue
+
+            created = 0
+            offset = 0
+            while True:
+                page = collection.get(limit=PAGE_SIZE, offset=offset, include=["documents", "metadatas"])
+                ids = page.get("ids") or []
+                if not ids:
+                    break
+                offset += len(ids)
+
+                rows = []
+                for embedding_id, document, metadata in zip(ids, page["documents"], page["metadatas"]):
+                    if embedding_id in existing or not isinstance(document, str):
+                        continue
+                    query, answer = split_turn(document)
+                    rows.append(ChatInteraction(
+                        engine=engine_for(name, embedding_id),
+                        user_id=str((metadata or {}).get("user_id") or "anon"),
+                        query=query,
+                        answer=answer,
+                        embedding_id=embedding_id,
+                    ))
+                ChatInteraction.objects.bulk_create(rows, batch_size=500)
+                created += len(rows)
+
+            self.stdout.write(self.style.SUCCESS(f"{name}: {created} interacciones importadas"))
@@ -0,0 +1,121 @@
+import json
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from hotelia_common.clients import get_client
+from llama.documents import BUILDERS, document_id, room_document
+from llama.ingest import INGEST_BATCH_SIZE, INGEST_CONCURRENCY, IngestPipeline
+from llama.management.commands.ingest_docs import ROOMS_API, iter_items
+
+CHANGES_API = f"{settings.HOTELS_SERVICE_URL}changes/"
+CURSOR_DIR = getattr(settings, "DOCS_SYNC_CURSOR_DIR", settings.CHROMADB_PATH)
+SYNC_INTERVAL = getattr(settings, "DOCS_SYNC_INTERVAL", 60)
+CHANGES_LIMIT = 500
+
+
+def cursor_path(engine):
+    return CURSOR_DIR / f"sync_cursor_{engine}.json"
+
+
+def load_cursor(engine):
+    try:
+        with open(cursor_path(engine)) as f:
+            return int(json.load(f).get("cursor", 0))
+    except (OSError, ValueError):
+        return 0
+
+
+def save_cursor(engine, cursor):
+    # Se escribe a un temporal y se renombra para no dejar un cursor a medias
+    path = cursor_path(engine)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        json.dump({"cursor": cursor}, f)
+    tmp.replace(path)
+
+
+class Command(BaseCommand):
+    help = (
+        "Aplica al almacén de documentos solo los cambios del catálogo (hoteles y habitaciones) "
+        "posteriores al último cursor, en vez de volver a ingerir todo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--engine", type=str, choices=["ollama", "llama", "gemini"], default="llama",
+                            help="Motor para generar embeddings (ollama, llama o Gemini).")
+        parser.add_argument("--once", action="store_true",
+                            help="Aplica los cambios pendientes y termina.")
+        parser.add_argument("--interval", type=int, default=SYNC_INTERVAL,
+                            help="Segundos entre cada consulta al change feed.")
+        parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE,
+                            help="Documentos por petición de embeddings.")
+        parser.add_argument("--concurrency", type=int, default=INGEST_CONCURRENCY,
+                            help="Lotes de embeddings en vuelo al mismo tiempo.")
+        parser.add_argument("--reset", action="store_true",
+                            help="Descarta el cursor guardado y recorre el feed desde el inicio.")
+
+    def handle(self, *args, **options):
+        engine = options["engine"]
+        self.headers = {
+            "Content-Type": "application/json",
+            "X-Hotel-Gateway-Token": settings.HOTELS_GATEWAY_TOKEN
+        }
+        self.client = get_client("hotels")
+        if options["reset"]:
+            save_cursor(engine, 0)
+        while True:
+            try:
+                self.sync(engine, options)
+            except Exception as e:
+                self.stderr.write(f"Error al sincronizar documentos: {e}")
+            if options["once"]:
+                return
+            time.sleep(options["interval"])
+
+    def sync(self, engine, options):
+        cursor = load_cursor(engine)
+        while True:
+            response = self.client.get(CHANGES_API, headers=self.headers,
+                                       params={"since": cursor, "limit": CHANGES_LIMIT})
+            response.raise_for_status()
+            data = response.json()
+            if data["results"]:
+                stats = self.apply(engine, data["results"], options)
+                self.stdout.write(
+                    f"Cambios {cursor + 1}-{data['cursor']}: {stats['written']} actualizados, "
+                    f"{stats['skipped']} sin cambios, {stats['deleted']} eliminados, {stats['failed']} con error.")
+                if stats["failed"]:
+                    # No se avanza el cursor: el siguiente ciclo reintenta el mismo tramo
+                    return
+            cursor = data["cursor"]
+            save_cursor(engine, cursor)
+            if not data["has_more"]:
+                return
+
+    def apply(self, engine, changes, options):
+        # Solo importa el último estado de cada objeto dentro del tramo
+        latest = {}
+        for change in changes:
+            latest[(change["kind"], change["object_id"])] = change
+
+        documents, deleted = [], []
+        for (kind, object_id), change in latest.items():
+            build_document = BUILDERS.get(kind)
+            if build_document is None:
+                continue
+            if change["object"] is None:
+                deleted.append(document_id(kind, object_id))
+                continue
+            documents.append(build_document(change["object"]))
+            if kind == "hotel" and change["action"] == "updated":
+                # El texto de cada habitación incluye el nombre del hotel
+                documents.extend(
+                    room_document(room) for room in iter_items(
+                        self.client, ROOMS_API, self.headers, {"hotel_id": object_id}))
+
+        pipeline = IngestPipeline(engine, batch_size=options["batch_size"],
+                                  concurrency=options["concurrency"], log=self.stderr.write)
+        pipeline.delete(deleted)
+        return pipeline.run(documents)
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-18 10:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChatInteraction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('engine', models.CharField(choices=[('ollama', 'Ollama'), ('llamacpp', 'llama.cpp'), ('gemini', 'Gemini')], max_length=20)),
+                ('user_id', models.CharField(max_length=64)),
+                ('query', models.TextField()),
+                ('answer', models.TextField()),
+                ('embedding_id', models.CharField(blank=True, max_length=128, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Interacción del chat',
+                'verbose_name_plural': 'Interacciones del chat',
+                'indexes': [models.Index(fields=['engine', 'user_id', '-id'], name='chat_history_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+from django.db import migrations
+
+# Índice de texto completo (SQLite FTS5) sobre pregunta y respuesta del historial.
+# Es una tabla "external content": guarda solo el índice y se mantiene con triggers.
+CREATE_FTS = [
+    """
+    CREATE VIRTUAL TABLE llama_chatinteraction_fts USING fts5(
+        query, answer,
+        content='llama_chatinteraction', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER llama_chatinteraction_fts_insert AFTER INSERT ON llama_chatinteraction BEGIN
+        INSERT INTO llama_chatinteraction_fts(rowid, query, answer) VALUES (new.id, new.query, new.answer);
+    END
+    """,
+    """
+    CREATE TRIGGER llama_chatinteraction_fts_delete AFTER DELETE ON llama_chatinteraction BEGIN
+        INSERT INTO llama_chatinteraction_fts(llama_chatinteraction_fts, rowid, query, answer)
+        VALUES ('delete', old.id, old.query, old.answer);
+    END
+    """,
+    """
+    CREATE TRIGGER llama_chatinteraction_fts_update AFTER UPDATE ON llama_chatinteraction BEGIN
+        INSERT INTO llama_chatinteraction_fts(llama_chatinteraction_fts, rowid, query, answer)
+        VALUES ('delete', old.id, old.query, old.answer);
+        INSERT INTO llama_chatinteraction_fts(rowid, query, answer) VALUES (new.id, new.query, new.answer);
+    END
+    """,
+    "INSERT INTO llama_chatinteraction_fts(llama_chatinteraction_fts) VALUES ('rebuild')",
+]
+
+DROP_FTS = [
+    "DROP TRIGGER IF EXISTS llama_chatinteraction_fts_insert",
+    "DROP TRIGGER IF EXISTS llama_chatinteraction_fts_delete",
+    "DROP TRIGGER IF EXISTS llama_chatinteraction_fts_update",
+    "DROP TABLE IF EXISTS llama_chatinteraction_fts",
+]
+
+
+def run_on_sqlite(statements):
+    # En otras bases de datos la búsqueda cae a icontains (ver llama/history.py)
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != "sqlite":
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('llama', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_sqlite(CREATE_FTS), run_on_sqlite(DROP_FTS)),
+    ]
@@ -1,3 +1,30 @@
 from django.db import models
 
 # Create your models here.
+
+
+class ChatEngine(models.TextChoices):
+    OLLAMA = "ollama", "Ollama"
+    LLAMACPP = "llamacpp", "llama.cpp"
+    GEMINI = "gemini", "Gemini"
+
+
+class ChatInteraction(models.Model):
+    # Historial del chatbot; Chroma guarda solo el embedding para la búsqueda semántica (embedding_id)
+    engine = models.CharField(max_length=20, choices=ChatEngine.choices)
+    user_id = models.CharField(max_length=64)
+    query = models.TextField()
+    answer = models.TextField()
+    embedding_id = models.CharField(max_length=128, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = "Interacciones del chat"
+        verbose_name = "Interacción del chat"
+        indexes = [
+            # Páginas del historial por usuario y motor, de la más reciente a la más antigua
+            models.Index(fields=["engine", "user_id", "-id"], name="chat_history_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.engine} {self.user_id}: {self.query[:50]}"
@@ -1,12 +1,24 @@
-import chromadb
+import time
+from uuid import uuid4
+
 import httpx
 from django.conf import settings
+from hotelia_common.clients import get_client
+
+from . import vectorstore
+from .answer_cache import register_answer_cache
+from .context import log_prompt_usage
+from .embedding_cache import cached_embedding
+from .history import record_interaction
+from .retrieval import retrieve_context
+from .scheduler import get_scheduler
+from .streaming import iter_ndjson
 
 OLLAMA_API = getattr(settings, "OLLAMA_API", "http://localhost:11434/api")
 MODEL_NAME = getattr(settings, "MODEL_NAME", "no_model")
-client = chromadb.PersistentClient(path="./chroma_store")
-collection_docs = client.get_or_create_collection("hotel_docs")
-collection_chat = client.get_or_create_collection("chat_history")
+EMBEDDING_MODEL = "nomic-embed-text"
+collection_docs = vectorstore.docs_collection("ollama")
+collection_chat = vectorstore.history_collection("ollama")
 
 SYSTEM_PROMPT = (
     "Eres el asistente de reservas del sistema Hotelia. "
@@ -18,14 +30,19 @@ SYSTEM_PROMPT = (
 ERROR_MESSAGE = "No pude generar la respuesta."
 
 # === FUNCIONES DE EMBEDDING ===
+def get_ollama_embeddings(texts: list[str]):
+    # /api/embed acepta una lista de textos y devuelve un embedding por cada uno, en orden
+    resp = get_client("ollama").post(f"{OLLAMA_API}embed", json={
+        "model": EMBEDDING_MODEL,
+        "input": texts,
+    })
+    resp.raise_for_status()
+    return resp.json()["embeddings"]
+
 def get_ollama_embedding(text: str):
-    with httpx.Client(timeout=900.0) as client_http:
-        resp = client_http.post(f"{OLLAMA_API}embeddings", json={
-            "model": "nomic-embed-text",
-            "prompt": text,
-        })
-        resp.raise_for_status()
-        return resp.json()["embedding"]
+    return cached_embedding("ollama", EMBEDDING_MODEL, text, get_ollama_embeddings)
+
+answer_cache = register_answer_cache("ollama", get_ollama_embedding, collection_docs)
 
 def add_document(doc_id, text, metadata=None):
     emb = get_ollama_embedding(text)
@@ -53,76 +70,96 @@ def query_user_history(user_query, user_id, n_results=3):
     return []
 
 def store_user_interaction(user_id, user_query, bot_answer):
+    if vectorstore.store.read_only:
+        # Réplica de solo lectura: se guarda en la base, sin embedding para la búsqueda semántica
+        record_interaction("ollama", user_id, user_query, bot_answer)
+        return
     chat_text = f"Usuario: {user_query}\nAsistente: {bot_answer}"
     emb = get_ollama_embedding(chat_text)
+    embedding_id = f"chat_{user_id or 'anon'}_{uuid4().hex}"
     collection_chat.add(
-        ids=[f"chat_{user_id or 'anon'}_{hash(user_query)}"],
+        ids=[embedding_id],
         documents=[chat_text],
         metadatas=[{"user_id": user_id}],
         embeddings=[emb],
     )
+    record_interaction("ollama", user_id, user_query, bot_answer, embedding_id)
 
-def generate_answer(query, full_context):
-    prompt = (
+def build_prompt(query, full_context):
+    return (
         f"{SYSTEM_PROMPT}\n\n"
         f"Context:\n{full_context}\n\n"
         f"Pregunta del usuario: {query}\n\n"
         "Respuesta:"
     )
+
+def generate_answer(query, full_context):
+    prompt = build_prompt(query, full_context)
     
-    with httpx.Client(timeout=1000.0) as client_http:
-        try:
-            print("haciendo peticion")
-            resp = client_http.post(f"{OLLAMA_API}generate", json={
-                "model": MODEL_NAME,
-                "prompt": prompt,
-                "stream": False
-            })
-            if resp.status_code == 200:
-                resp.raise_for_status()
-                data = resp.json()
-                return data.get("response", ERROR_MESSAGE)
-            else: return ERROR_MESSAGE
-        except httpx.RequestError as e:
-            print(e)
-            return ERROR_MESSAGE
-        
-def get_user_history(user_id: str, limit: int = 10):
-    results = collection_chat.get(where={"user_id": user_id})
-    docs = results.get("documents", [])
-
-    history = []
-    for doc in docs[-limit:]:
-        parts = doc.split("\nAsistente:")
-        if len(parts) == 2:
-            query = parts[0].replace("Usuario:", "").strip()
-            answer = parts[1].strip()
-            history.append({"query": query, "answer": answer})
-    return list(reversed(history))  # devuelve en orden cronológico
-
-def search_user_history(user_id: str, search: str, n_results: int = 5):
-    results = collection_chat.get(where={"user_id": user_id})
-    docs = results.get("documents", [])
-    filtered = [doc for doc in docs if search.lower() in doc.lower()]
-    filtered = filtered[-n_results:]
-
-    history = []
-    for doc in docs:
-        parts = doc.split("\nAsistente:")
-        if len(parts) == 2:
-            query = parts[0].replace("Usuario:", "").strip()
-            answer = parts[1].strip()
-            history.append({"query": query, "answer": answer})
-    return history
+    def generate():
+        print("haciendo peticion")
+        resp = get_client("ollama").post(f"{OLLAMA_API}generate", json={
+            "model": MODEL_NAME,
+            "prompt": prompt,
+            "stream": False
+        })
+        if resp.status_code == 200:
+            resp.raise_for_status()
+            data = resp.json()
+            # Ollama informa duraciones en nanosegundos
+            log_prompt_usage("ollama", data.get("prompt_eval_count"), (data.get("prompt_eval_duration") or 0) / 1e6)
+            return data.get("response", ERROR_MESSAGE)
+        else: return ERROR_MESSAGE
 
+    try:
+        # Espera cupo en el modelo; un prompt idéntico ya en curso comparte la respuesta
+        return get_scheduler("ollama").run((MODEL_NAME, prompt), generate)
+    except httpx.RequestError as e:
+        print(e)
+        return ERROR_MESSAGE
+
+def stream_answer(query, full_context):
+    # Igual que generate_answer pero entrega cada fragmento apenas Ollama lo genera
+    with get_client("ollama").stream("POST", f"{OLLAMA_API}generate", json={
+        "model": MODEL_NAME,
+        "prompt": build_prompt(query, full_context),
+        "stream": True
+    }) as resp:
+        resp.raise_for_status()
+        for data in iter_ndjson(resp):
+            yield data.get("response", "")
+            if data.get("done"):
+                log_prompt_usage("ollama", data.get("prompt_eval_count"), (data.get("prompt_eval_duration") or 0) / 1e6)
+                return
+        
 def handle_chat_query(query: str, user_id: str = "anon"):
-    docs = query_documents(query)
-    context = "\n".join(docs) if docs else "Sin contexto de documentos."
-    user_history = query_user_history(query, user_id)
-    context += "\n\nHistorial relevante:\n"
-    if user_history:
-        context += "\n".join(user_history)
-    else: context += "\nSin historial previo relevante.\n"
+    cached = answer_cache.lookup(query, user_id)
+    if cached is not None:
+        # La respuesta ya está en la caché: va al historial de la base, sin calcular otro embedding
+        record_interaction("ollama", user_id, query, cached)
+        return cached
+    started = time.monotonic()
+    context, personal = retrieve_context(query, user_id, "ollama", get_ollama_embedding, collection_docs, collection_chat,
+                                         n_docs=8, n_history=3, reserved=build_prompt(query, ""))
     answer = generate_answer(query, context)
-    if answer != ERROR_MESSAGE: store_user_interaction(user_id, query, answer)
+    if answer != ERROR_MESSAGE:
+        store_user_interaction(user_id, query, answer)
+        answer_cache.store(query, user_id, answer, personal, (time.monotonic() - started) * 1000)
     return answer
+
+def stream_chat_query(query: str, user_id: str = "anon"):
+    # Devuelve (fragmentos, finish): la interacción se guarda cuando termina el stream
+    cached = answer_cache.lookup(query, user_id)
+    if cached is not None:
+        return [cached], lambda answer: record_interaction("ollama", user_id, query, answer) and answer
+    started = time.monotonic()
+    context, personal = retrieve_context(query, user_id, "ollama", get_ollama_embedding, collection_docs, collection_chat,
+                                         n_docs=8, n_history=3, reserved=build_prompt(query, ""))
+
+    def finish(answer):
+        if not answer:
+            return ERROR_MESSAGE
+        store_user_interaction(user_id, query, answer)
+        answer_cache.store(query, user_id, answer, personal, (time.monotonic() - started) * 1000)
+        return answer
+    return get_scheduler("ollama").hold(stream_answer(query, context)), finish
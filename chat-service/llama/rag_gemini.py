@@ -1,19 +1,28 @@
-import httpx
-import chromadb
 from uuid import uuid4
 from django.conf import settings
 import re
+import time
+from hotelia_common.clients import get_client
+
+from . import vectorstore
+from .answer_cache import register_answer_cache
+from .context import log_prompt_usage
+from .embedding_cache import cached_embedding
+from .history import record_interaction
+from .retrieval import retrieve_context
+from .streaming import iter_sse
 
 # Configuración de Google Gemini
 GOOGLE_API_KEY = getattr(settings, "GOOGLE_API_KEY", None)
 GEMINI_API_BASE = "https://generativelanguage.googleapis.com/v1beta"
+GEMINI_EMBEDDING_MODEL = "gemini-embedding-001"
+GEMINI_EMBEDDING_DIMENSIONS = 768
+GEMINI_CHAT_MODEL = "gemini-2.0-flash-lite"
 
 ERROR_MESSAGE = "No pude generar la respuesta."
 
-# Cliente ChromaDB persistente
-client = chromadb.PersistentClient(path="./chroma_store")
-docs_collection = client.get_or_create_collection("gemini_hotel_docs")
-history_collection = client.get_or_create_collection("gemini_chat_history")
+docs_collection = vectorstore.docs_collection("gemini")
+history_collection = vectorstore.history_collection("gemini")
 
 SYSTEM_PROMPT = (
     "Eres el asistente de reservas del sistema Hotelia. "
@@ -23,21 +32,30 @@ SYSTEM_PROMPT = (
 )
 
 
-def get_gemini_embedding(text: str):
-    url = f"{GEMINI_API_BASE}/models/gemini-embedding-001:embedContent?key={GOOGLE_API_KEY}"
-    response = httpx.post(
+def get_gemini_embeddings(texts: list[str]):
+    # batchEmbedContents recibe hasta 100 textos por petición
+    url = f"{GEMINI_API_BASE}/models/{GEMINI_EMBEDDING_MODEL}:batchEmbedContents?key={GOOGLE_API_KEY}"
+    response = get_client("gemini").post(
         url,
         json={
-            "content": {
-                "parts": [{"text": text}]
-            },
-            "output_dimensionality": 768
+            "requests": [{
+                "model": f"models/{GEMINI_EMBEDDING_MODEL}",
+                "content": {"parts": [{"text": text}]},
+                "output_dimensionality": GEMINI_EMBEDDING_DIMENSIONS
+            } for text in texts]
         },
-        timeout=60,
     )
     response.raise_for_status()
     data = response.json()
-    return data.get("embedding", {}).get("values", [])
+    return [item.get("values", []) for item in data.get("embeddings", [])]
+
+
+def get_gemini_embedding(text: str):
+    return cached_embedding(
+        "gemini", f"{GEMINI_EMBEDDING_MODEL}@{GEMINI_EMBEDDING_DIMENSIONS}", text, get_gemini_embeddings)
+
+
+answer_cache = register_answer_cache("gemini", get_gemini_embedding, docs_collection)
 
 
 def add_document(doc_id, text, metadata=None):
@@ -68,72 +86,39 @@ def query_documents(query: str, n_results=23):
 
 
 def store_user_interaction(user_id: str, query: str, answer: str):
+    if vectorstore.store.read_only:
+        # Réplica de solo lectura: se guarda en la base, sin embedding para la búsqueda semántica
+        record_interaction("gemini", user_id, query, answer)
+        return
     combined_text = f"Usuario: {query}\nAsistente: {answer}"
     embedding = get_gemini_embedding(combined_text)
     print("Almacenando: ",combined_text, "user: ",user_id)
+    embedding_id = f"{user_id}-{uuid4()}"
     history_collection.add(
-        ids=[f"{user_id}-{uuid4()}"],
+        ids=[embedding_id],
         documents=[combined_text],
         metadatas={"user_id": user_id},
         embeddings=[embedding],
     )
+    record_interaction("gemini", user_id, query, answer, embedding_id)
 
 
-def gemini_get_user_history(user_id: str, limit: int = 10):
-    try:
-        results = history_collection.get(where={"user_id": user_id})
-    except Exception as e:
-        print(f"Error al obtener historial del usuario {user_id}: {e}")
-        return []
-
-    docs = results.get("documents", []) if isinstance(results, dict) else []
-    history = []
-    for doc in docs[-limit:]:
-        if not isinstance(doc, str):
-            continue
-        parts = doc.split("\nAsistente:")
-        if len(parts) == 2:
-            query = parts[0].replace("Usuario:", "").strip()
-            answer = parts[1].strip()
-            history.append({"query": query, "answer": answer})
-        else:
-            history.append({"query": doc.strip(), "answer": ""})
-    return list(reversed(history))
-
-
-def search_user_history_gemini(user_id: str, search: str, n_results: int = 5):
-    q_embed = get_gemini_embedding(search)
-    results = history_collection.query(
-        query_embeddings=[q_embed], n_results=n_results, where={
-            "user_id": user_id}
-    )
-    docs_nested = results.get("documents", [])
-    docs = [d for sublist in docs_nested for d in sublist] if docs_nested else []
-
-    history = []
-    for doc in docs:
-        if not isinstance(doc, str):
-            doc = str(doc)
-        parts = doc.split("\nAsistente:")
-        if len(parts) == 2:
-            query = parts[0].replace("Usuario:", "").strip()
-            answer = parts[1].strip()
-            history.append({"query": query, "answer": answer})
-    return history
-
-
-def generate_answer_gemini(query: str, context: str, temperature: float = 0.8):
-    prompt = (
+def build_prompt(query: str, context: str):
+    return (
         f"{SYSTEM_PROMPT}\n\n"
         f"=== CONTEXT ===\n{context}\n\n"
         f"=== PREGUNTA DEL USUARIO ===\n{query}\n\n"
         "=== INSTRUCCIÓN ===\n"
         "Responde solo con información del contexto. Sé claro y conciso."
     )
-    url = f"{GEMINI_API_BASE}/models/gemini-2.0-flash-lite:generateContent?key={GOOGLE_API_KEY}"
+
+
+def generate_answer_gemini(query: str, context: str, temperature: float = 0.8):
+    prompt = build_prompt(query, context)
+    url = f"{GEMINI_API_BASE}/models/{GEMINI_CHAT_MODEL}:generateContent?key={GOOGLE_API_KEY}"
     try:
         print("contexto: ", prompt)
-        response = httpx.post(url, json={
+        response = get_client("gemini").post(url, json={
             "contents": [
                 {
                     "role": "user",
@@ -146,6 +131,7 @@ def generate_answer_gemini(query: str, context: str, temperature: float = 0.8):
         )
         response.raise_for_status()
         data = response.json()
+        log_prompt_usage("gemini", (data.get("usageMetadata") or {}).get("promptTokenCount"))
 
         # Gemini responde con un formato anidado
         candidates = data.get("candidates", [])
@@ -161,20 +147,30 @@ def generate_answer_gemini(query: str, context: str, temperature: float = 0.8):
         return ERROR_MESSAGE
 
 
+def stream_answer_gemini(query: str, context: str):
+    # streamGenerateContent con alt=sse envía un evento por cada fragmento de la respuesta
+    url = f"{GEMINI_API_BASE}/models/{GEMINI_CHAT_MODEL}:streamGenerateContent?alt=sse&key={GOOGLE_API_KEY}"
+    with get_client("gemini").stream("POST", url, json={
+        "contents": [{"role": "user", "parts": [{"text": build_prompt(query, context)}]}]
+    }, timeout=120) as response:
+        response.raise_for_status()
+        usage = {}
+        for data in iter_sse(response):
+            usage = data.get("usageMetadata") or usage
+            for candidate in data.get("candidates", [])[:1]:
+                for part in candidate.get("content", {}).get("parts", []):
+                    yield part.get("text", "")
+        log_prompt_usage("gemini", usage.get("promptTokenCount"))
+
+
 def handle_chat_query_gemini(query: str, user_id: str):
-    docs = query_documents(query)
-    context = "\n".join(docs) if docs else "Sin contexto de documentos."
-    user_history = search_user_history_gemini(user_id=user_id, search=query)
-    context += "\n\nHistorial relevante:\n"
-    if user_history:
-        formatted_history = [
-            f"Usuario: {item['query']}\nAsistente: {item['answer']}"
-            for item in user_history
-            if isinstance(item, dict)
-        ]
-        context += "\n".join(formatted_history)
-    else:
-        context += "\nSin historial previo relevante.\n"
+    cached = answer_cache.lookup(query, user_id)
+    if cached is not None:
+        record_interaction("gemini", user_id, query, cached)
+        return cached
+    started = time.monotonic()
+    context, personal = retrieve_context(query, user_id, "gemini", get_gemini_embedding, docs_collection, history_collection,
+                                         n_docs=23, n_history=5, reserved=build_prompt(query, ""))
 
     try:
         answer = generate_answer_gemini(query, context)
@@ -182,12 +178,32 @@ def handle_chat_query_gemini(query: str, user_id: str):
         if answer != ERROR_MESSAGE:
             pass
             store_user_interaction(user_id, query, answer)
+            answer_cache.store(query, user_id, answer, personal, (time.monotonic() - started) * 1000)
         return answer
     except Exception as e:
         print(e)
         return ERROR_MESSAGE
 
 
+def stream_chat_query_gemini(query: str, user_id: str):
+    # Devuelve (fragmentos, finish): la interacción se guarda cuando termina el stream
+    cached = answer_cache.lookup(query, user_id)
+    if cached is not None:
+        return [cached], lambda answer: record_interaction("gemini", user_id, query, answer) and answer
+    started = time.monotonic()
+    context, personal = retrieve_context(query, user_id, "gemini", get_gemini_embedding, docs_collection, history_collection,
+                                         n_docs=23, n_history=5, reserved=build_prompt(query, ""))
+
+    def finish(answer):
+        answer = clean_response(answer)
+        if not answer:
+            return ERROR_MESSAGE
+        store_user_interaction(user_id, query, answer)
+        answer_cache.store(query, user_id, answer, personal, (time.monotonic() - started) * 1000)
+        return answer
+    return stream_answer_gemini(query, context), finish
+
+
 def clean_response(text: str) -> str:
     text = re.sub(r"```+", "", text)
     text = text.strip()
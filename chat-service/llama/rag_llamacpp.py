@@ -1,19 +1,29 @@
 import httpx
-import chromadb
 from uuid import uuid4
 from django.conf import settings
 import re
+import time
+from hotelia_common.clients import get_client
+
+from . import vectorstore
+from .answer_cache import register_answer_cache
+from .context import log_prompt_usage
+from .embedding_cache import cached_embedding
+from .history import record_interaction
+from .retrieval import retrieve_context
+from .scheduler import SchedulerBusy, get_scheduler
+from .streaming import iter_sse
 
 # URL base de tu servidor llama.cpp
 LLAMACPP_API = getattr(settings, "LLAMACPP_API", "http://localhost:8080/")
 LLAMACPP_API_EMBEDDINGS = getattr(
     settings, "LLAMACPP_API_EMBEDDINGS", "http://localhost:8085/")
+# llama.cpp no informa el modelo de embeddings: por defecto se identifica por el servidor
+LLAMACPP_EMBEDDING_MODEL = getattr(settings, "LLAMACPP_EMBEDDING_MODEL", None) or LLAMACPP_API_EMBEDDINGS
 
 ERROR_MESSAGE = "No pude generar la respuesta."
-# Cliente ChromaDB persistente
-client = chromadb.PersistentClient(path="./chroma_store")
-docs_collection = client.get_or_create_collection("hotel_docs")
-history_collection = client.get_or_create_collection("chat_history")
+docs_collection = vectorstore.docs_collection("llamacpp")
+history_collection = vectorstore.history_collection("llamacpp")
 
 SYSTEM_PROMPT = (
     "Eres el asistente de reservas del sistema Hotelia. "
@@ -48,29 +58,35 @@ def add_document(doc_id, text, metadata=None):
         print(f"Error al agregar documento '{doc_id}': {e}")
 
 
-def get_llamacpp_embedding(text: str):
-    if not isinstance(text, str):
-        text = str(text)
-    with httpx.Client(timeout=900.0) as client_http:
-        response = client_http.post(
-            f"{LLAMACPP_API_EMBEDDINGS}embeddings",
-            json={"content": text}
-        )
-        response.raise_for_status()
-        data = response.json()
-        if isinstance(data, dict) and "embedding" in data:
-            return data.get("embedding", [])
+def _parse_llamacpp_embedding(item):
+    embedding = item.get("embedding", [])
+    # Puede venir como lista dentro de lista
+    return embedding[0] if embedding and isinstance(embedding[0], list) else embedding
 
-    # Si la respuesta es una lista
-        if isinstance(data, list):
-            first = data[0]
-            if "embedding" in first:
-                # Puede venir como lista dentro de lista
-                embedding = first["embedding"]
-                return embedding[0] if isinstance(embedding[0], list) else embedding
 
+def get_llamacpp_embeddings(texts: list[str]):
+    # El endpoint /embeddings de llama.cpp acepta una lista en "content" y responde
+    # una lista de {"index", "embedding"}
+    response = get_client("llamacpp").post(
+        f"{LLAMACPP_API_EMBEDDINGS}embeddings",
+        json={"content": [str(text) for text in texts]}
+    )
+    response.raise_for_status()
+    data = response.json()
+    if isinstance(data, dict) and "embedding" in data:
+        data = [data]
+    if not isinstance(data, list) or len(data) != len(texts):
         raise ValueError(
             f"Formato inesperado en la respuesta de embeddings: {data}")
+    data = sorted(data, key=lambda item: item.get("index", 0))
+    return [_parse_llamacpp_embedding(item) for item in data]
+
+
+def get_llamacpp_embedding(text: str):
+    return cached_embedding("llamacpp", LLAMACPP_EMBEDDING_MODEL, text, get_llamacpp_embeddings)
+
+
+answer_cache = register_answer_cache("llamacpp", get_llamacpp_embedding, docs_collection)
 
 
 def query_documents(query: str, n_results=6):
@@ -81,134 +97,126 @@ def query_documents(query: str, n_results=6):
 
 
 def store_user_interaction(user_id: str, query: str, answer: str):
+    if vectorstore.store.read_only:
+        # Réplica de solo lectura: se guarda en la base, sin embedding para la búsqueda semántica
+        record_interaction("llamacpp", user_id, query, answer)
+        return
     print("Almacenando en ChromaDB")
     combined_text = f"Usuario: {query}\nAsistente: {answer}"
     embedding = get_llamacpp_embedding(combined_text)
+    embedding_id = f"{user_id}-{uuid4()}"
     history_collection.add(
-        ids=[f"{user_id}-{uuid4()}"],
+        ids=[embedding_id],
         documents=[combined_text],
         metadatas={"user_id": user_id},
         embeddings=[embedding],
     )
+    record_interaction("llamacpp", user_id, query, answer, embedding_id)
 
 
-def get_user_history(user_id: str, limit: int = 10):
-    try:
-        results = history_collection.get(where={"user_id": user_id})
-    except Exception as e:
-        print(f"Error al obtener historial del usuario {user_id}: {e}")
-        return []
-
-    docs = results.get("documents", []) if isinstance(results, dict) else []
-
-    history = []
-    for doc in docs[-limit:]:
-        if not isinstance(doc, str):
-            continue
-
-        # Formato esperado: "Usuario: <pregunta>\nAsistente: <respuesta>"
-        parts = doc.split("\nAsistente:")
-        if len(parts) == 2:
-            query = parts[0].replace("Usuario:", "").strip()
-            answer = parts[1].strip()
-            history.append({
-                "query": query,
-                "answer": answer
-            })
-        else:
-            # Si no coincide el formato, guarda el texto completo como referencia
-            history.append({
-                "query": doc.strip(),
-                "answer": ""
-            })
-
-    # Devuelve el historial más antiguo primero (orden cronológico)
-    return list(reversed(history))
-
-
-def search_user_history(user_id: str, search: str, n_results: int = 5):
-    q_embed = get_llamacpp_embedding(search)
-    results = history_collection.query(
-        query_embeddings=[q_embed],
-        n_results=n_results,
-        where={"user_id": user_id},
-    )
-    docs_nested = results.get("documents", [])
-
-    # Aplanar lista de listas
-    docs = [d for sublist in docs_nested for d in sublist] if docs_nested else []
-
-    history = []
-    for doc in docs:
-        if not isinstance(doc, str):
-            doc = str(doc)
-
-        parts = doc.split("\nAsistente:")
-        if len(parts) == 2:
-            query = parts[0].replace("Usuario:", "").strip()
-            answer = parts[1].strip()
-            history.append({"query": query, "answer": answer})
-    return history
-
-
-def generate_answer_llamacpp(query: str, context: str, n_predict: int = 512, temperature: float = 0.8):
-    prompt = (
+def build_prompt(query: str, context: str):
+    return (
         f"{SYSTEM_PROMPT}\n\n"
         f"=== CONTEXT ===\n{context}\n\n"
         f"=== PREGUNTA DEL USUARIO ===\n{query}\n\n"
         "=== INSTRUCCIÓN ===\n"
         "Responde solo con información del contexto. Sé claro y conciso.\n"
     )
+
+
+def generate_answer_llamacpp(query: str, context: str, n_predict: int = 512, temperature: float = 0.8):
+    prompt = build_prompt(query, context)
     print("contexto: ", context)
 
-    with httpx.Client(timeout=900.0) as client_http:
-        try:
-            response = client_http.post(
-                f"{LLAMACPP_API}completion",
-                json={
-                    "prompt": prompt,
-                    "n_predict": n_predict,
-                    "temperature": temperature,
-                    "stream": False,
-                    "stop": ["Usuario:", "Pregunta:"],
-                },
-            )
-            response.raise_for_status()
-            data = response.json()
-
-            return data.get("content", ERROR_MESSAGE)
-        except httpx.RequestError as e:
-            print("error:", e)
-            return ERROR_MESSAGE
+    def complete():
+        response = get_client("llamacpp").post(
+            f"{LLAMACPP_API}completion",
+            json={
+                "prompt": prompt,
+                "n_predict": n_predict,
+                "temperature": temperature,
+                "stream": False,
+                "stop": ["Usuario:", "Pregunta:"],
+            },
+        )
+        response.raise_for_status()
+        data = response.json()
+        timings = data.get("timings") or {}
+        log_prompt_usage("llamacpp", timings.get("prompt_n", data.get("tokens_evaluated")), timings.get("prompt_ms"))
+        return data.get("content", ERROR_MESSAGE)
+
+    try:
+        # Espera cupo en el modelo; un prompt idéntico ya en curso comparte la respuesta
+        return get_scheduler("llamacpp").run((prompt, n_predict, temperature), complete)
+    except httpx.RequestError as e:
+        print("error:", e)
+        return ERROR_MESSAGE
+
+
+def stream_answer_llamacpp(query: str, context: str, n_predict: int = 512, temperature: float = 0.8):
+    # Con "stream": true llama.cpp responde eventos SSE con el texto nuevo en "content"
+    with get_client("llamacpp").stream(
+        "POST",
+        f"{LLAMACPP_API}completion",
+        json={
+            "prompt": build_prompt(query, context),
+            "n_predict": n_predict,
+            "temperature": temperature,
+            "stream": True,
+            "stop": ["Usuario:", "Pregunta:"],
+        },
+    ) as response:
+        response.raise_for_status()
+        for data in iter_sse(response):
+            yield data.get("content", "")
+            if data.get("stop"):
+                timings = data.get("timings") or {}
+                log_prompt_usage("llamacpp", timings.get("prompt_n", data.get("tokens_evaluated")), timings.get("prompt_ms"))
+                return
 
 
 def handle_chat_query_llamacpp(query: str, user_id: str = "anon"):
-    docs = query_documents(query)
-    context = "\n".join(docs) if docs else "Sin contexto de documentos."
-    user_history = search_user_history(user_id=user_id, search=query)
-    context += "\n\nHistorial relevante:\n"
-    if user_history:
-        # Convertir diccionarios a texto
-        formatted_history = [
-            f"Usuario: {item['query']}\nAsistente: {item['answer']}"
-            for item in user_history
-            if isinstance(item, dict)
-        ]
-        context += "\n".join(formatted_history)
-    else:
-        context += "\nSin historial previo relevante.\n"
+    cached = answer_cache.lookup(query, user_id)
+    if cached is not None:
+        record_interaction("llamacpp", user_id, query, cached)
+        return cached
+    started = time.monotonic()
+    context, personal = retrieve_context(query, user_id, "llamacpp", get_llamacpp_embedding, docs_collection, history_collection,
+                                         n_docs=6, n_history=5, reserved=build_prompt(query, ""))
     try:
         answer = generate_answer_llamacpp(query, context)
         answer = clean_response(answer)
         print("Respuesta:", answer)
         if answer != ERROR_MESSAGE:
             store_user_interaction(user_id, query, answer)
+            answer_cache.store(query, user_id, answer, personal, (time.monotonic() - started) * 1000)
         return answer
+    except SchedulerBusy:
+        raise
     except Exception as e:
         print(e)
         return ERROR_MESSAGE
 
 
+def stream_chat_query_llamacpp(query: str, user_id: str = "anon"):
+    # Devuelve (fragmentos, finish): la interacción se guarda cuando termina el stream
+    cached = answer_cache.lookup(query, user_id)
+    if cached is not None:
+        return [cached], lambda answer: record_interaction("llamacpp", user_id, query, answer) and answer
+    started = time.monotonic()
+    context, personal = retrieve_context(query, user_id, "llamacpp", get_llamacpp_embedding, docs_collection, history_collection,
+                                         n_docs=6, n_history=5, reserved=build_prompt(query, ""))
+
+    def finish(answer):
+        answer = clean_response(answer)
+        if not answer:
+            return ERROR_MESSAGE
+        store_user_interaction(user_id, query, answer)
+        answer_cache.store(query, user_id, answer, personal, (time.monotonic() - started) * 1000)
+        return answer
+    return get_scheduler("llamacpp").hold(stream_answer_llamacpp(query, context)), finish
+
+
 def clean_response(text: str) -> str:
     # Elimina los bloques de código Markdown
     text = re.sub(r"```+", "", text)
@@ -0,0 +1,47 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from .context import Chunk, assemble_context, chunk_key
+
+RETRIEVAL_WORKERS = getattr(settings, "RETRIEVAL_WORKERS", 8)
+
+# Pool compartido por todas las peticiones: las búsquedas en Chroma liberan el GIL
+_executor = ThreadPoolExecutor(max_workers=RETRIEVAL_WORKERS, thread_name_prefix="retrieval")
+
+
+def _search(collection, embedding, n_results, where=None):
+    results = collection.query(query_embeddings=[embedding], n_results=n_results, where=where,
+                               include=["documents", "metadatas", "distances"])
+    documents = (results.get("documents") or [[]])[0]
+    metadatas = (results.get("metadatas") or [[]])[0] or [None] * len(documents)
+    distances = (results.get("distances") or [[]])[0]
+    chunks = []
+    for doc, metadata, distance in zip(documents, metadatas, distances):
+        text = doc if isinstance(doc, str) else str(doc)
+        if text.strip():
+            chunks.append(Chunk(text, distance, chunk_key(text, metadata)))
+    return chunks
+
+
+def _search_history(collection, embedding, n_results, user_id):
+    try:
+        return _search(collection, embedding, n_results, where={"user_id": user_id})
+    except Exception as e:
+        # Sin historial se puede responder igual; sin documentos no
+        print(f"Error al buscar historial del usuario {user_id}: {e}")
+        return []
+
+
+def retrieve_context(query, user_id, engine, embed, docs_collection, history_collection,
+                     n_docs, n_history, reserved=""):
+    """
+    Etapa de recuperación de los handle_chat_query*: calcula el embedding de la pregunta una
+    sola vez y busca en documentos e historial del usuario al mismo tiempo. n_docs y n_history
+    son los candidatos; assemble_context (llama/context.py) decide cuáles entran al prompt.
+    Devuelve el contexto y si usó historial del usuario.
+    """
+    embedding = embed(query)
+    history = _executor.submit(_search_history, history_collection, embedding, n_history, user_id)
+    docs = _search(docs_collection, embedding, n_docs)
+    return assemble_context(engine, docs, history.result(), reserved=reserved)
@@ -0,0 +1,192 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+from django.conf import settings
+
+# Valores por defecto de cada modelo local; LLM_SCHEDULERS en settings sobrescribe cualquier clave
+DEFAULT_OPTIONS = {
+    "concurrency": getattr(settings, "LLM_CONCURRENCY", 1),
+    "max_queue": getattr(settings, "LLM_MAX_QUEUE", 16),
+    "queue_timeout": getattr(settings, "LLM_QUEUE_TIMEOUT", 120.0),
+}
+
+BACKENDS = {
+    "ollama": {},
+    "llamacpp": {},
+}
+
+# Muestras de espera que se guardan para calcular percentiles
+WAIT_SAMPLES = 500
+
+
+class SchedulerBusy(Exception):
+    """La cola del modelo está llena o la petición esperó demasiado; reintentar en `retry_after` s."""
+
+    def __init__(self, backend, retry_after):
+        super().__init__(f"El modelo '{backend}' está ocupado, intenta de nuevo en {retry_after} s")
+        self.backend = backend
+        self.retry_after = retry_after
+
+
+class LLMScheduler:
+    """
+    Limita cuántas generaciones corren a la vez contra un modelo local y encola el resto en
+    orden de llegada (FIFO) hasta `max_queue`; más allá se rechaza con SchedulerBusy.
+    Las peticiones con la misma clave (mismo prompt) que llegan mientras otra igual está en
+    curso esperan ese resultado en vez de generar de nuevo.
+    """
+
+    def __init__(self, name, concurrency, max_queue, queue_timeout):
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.condition = threading.Condition()
+        self.queue = deque()
+        self.active = 0
+        self.inflight = {}
+        self.waits = deque(maxlen=WAIT_SAMPLES)
+        # Promedio móvil de la duración de cada generación, para estimar Retry-After
+        self.service_seconds = None
+        self.stats = {"admitted": 0, "completed": 0, "rejected": 0, "timeouts": 0, "coalesced": 0}
+
+    def retry_after(self, position):
+        per_slot = self.service_seconds or 5.0
+        return max(1, round(per_slot * (position + 1) / self.concurrency))
+
+    def acquire(self):
+        ticket = object()
+        with self.condition:
+            if len(self.queue) >= self.max_queue:
+                self.stats["rejected"] += 1
+                raise SchedulerBusy(self.name, self.retry_after(len(self.queue)))
+            self.queue.append(ticket)
+            started = time.monotonic()
+            deadline = started + self.queue_timeout
+            try:
+                while self.queue[0] is not ticket or self.active >= self.concurrency:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.stats["timeouts"] += 1
+                        raise SchedulerBusy(self.name, self.retry_after(self.queue.index(ticket)))
+                    self.condition.wait(remaining)
+            except BaseException:
+                self.queue.remove(ticket)
+                self.condition.notify_all()
+                raise
+            self.queue.popleft()
+            self.active += 1
+            self.stats["admitted"] += 1
+            self.waits.append(time.monotonic() - started)
+            # Puede haber más cupos libres para el siguiente de la cola
+            self.condition.notify_all()
+        return time.monotonic()
+
+    def release(self, admitted_at):
+        elapsed = time.monotonic() - admitted_at
+        with self.condition:
+            self.active -= 1
+            self.stats["completed"] += 1
+            self.service_seconds = elapsed if self.service_seconds is None else (
+                0.8 * self.service_seconds + 0.2 * elapsed)
+            self.condition.notify_all()
+
+    @contextmanager
+    def slot(self):
+        admitted_at = self.acquire()
+        try:
+            yield
+        finally:
+            self.release(admitted_at)
+
+    def run(self, key, fn):
+        """Ejecuta fn() dentro de un cupo; si ya hay una ejecución con la misma clave, reutiliza su resultado."""
+        with self.condition:
+            future = self.inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self.inflight[key] = Future()
+            else:
+                self.stats["coalesced"] += 1
+        if not leader:
+            return future.result()
+        try:
+            with self.slot():
+                result = fn()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.condition:
+                self.inflight.pop(key, None)
+
+    def hold(self, iterator):
+        """Toma un cupo ahora (o lanza SchedulerBusy) y lo mantiene mientras se consume `iterator`."""
+        return _HeldSlot(self, self.acquire(), iterator)
+
+    def snapshot(self):
+        with self.condition:
+            waits = sorted(self.waits)
+            stats = dict(self.stats, active=self.active, queued=len(self.queue),
+                         concurrency=self.concurrency, max_queue=self.max_queue,
+                         inflight_prompts=len(self.inflight))
+        for name, quantile in (("wait_ms_p50", 0.5), ("wait_ms_p95", 0.95)):
+            stats[name] = round(waits[min(len(waits) - 1, int(len(waits) * quantile))] * 1000, 1) if waits else None
+        stats["service_ms_avg"] = round(self.service_seconds * 1000, 1) if self.service_seconds else None
+        return stats
+
+
+class _HeldSlot:
+    # Iterador que libera el cupo al agotarse, al fallar o al cerrarse (cliente desconectado)
+    def __init__(self, scheduler, admitted_at, iterator):
+        self.scheduler = scheduler
+        self.admitted_at = admitted_at
+        self.iterator = iter(iterator)
+        self.released = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self.iterator)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        if self.released:
+            return
+        self.released = True
+        try:
+            close = getattr(self.iterator, "close", None)
+            if close:
+                close()
+        finally:
+            self.scheduler.release(self.admitted_at)
+
+    def __del__(self):
+        self.close()
+
+
+def _options(name):
+    options = dict(DEFAULT_OPTIONS)
+    options.update(BACKENDS.get(name, {}))
+    options.update(getattr(settings, "LLM_SCHEDULERS", {}).get(name, {}))
+    return options
+
+
+_schedulers = {name: LLMScheduler(name, **_options(name)) for name in BACKENDS}
+
+
+def get_scheduler(name):
+    return _schedulers[name]
+
+
+def scheduler_stats():
+    return {name: scheduler.snapshot() for name, scheduler in _schedulers.items()}
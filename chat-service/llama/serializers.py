@@ -10,16 +10,47 @@ class ChatRequestSerializer(serializers.Serializer):
         allow_blank=True,
         help_text="Identificador opcional del usuario. Se usa para mantener el historial contextual en ChromaDB."
     )
+    stream = serializers.BooleanField(
+        required=False,
+        default=False,
+        help_text="Si es true la respuesta se transmite en JSON por línea (application/x-ndjson) mientras se genera."
+    )
 
 class ChatResponseSerializer(serializers.Serializer):
     user_id = serializers.CharField(help_text="ID del usuario que hizo la consulta.")
     query = serializers.CharField(help_text="Pregunta original enviada por el usuario.")
     response = serializers.CharField(help_text="Respuesta generada por el modelo LLaMA u Ollama.")
 
+class HistoryQuerySerializer(serializers.Serializer):
+    limit = serializers.IntegerField(
+        required=False,
+        default=10,
+        min_value=1,
+        max_value=100,
+        help_text="Cantidad de interacciones por página."
+    )
+    before = serializers.IntegerField(
+        required=False,
+        min_value=1,
+        help_text="Cursor: devuelve las interacciones anteriores a este id (el `next` de la página previa)."
+    )
+    search = serializers.CharField(
+        required=False,
+        allow_blank=True,
+        help_text="Texto a buscar en preguntas y respuestas (búsqueda de texto completo)."
+    )
+
 class UserHistoryItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField(required=False, help_text="Identificador de la interacción.")
     query = serializers.CharField(help_text="Pregunta del usuario.")
     answer = serializers.CharField(help_text="Respuesta del asistente.")
+    created_at = serializers.DateTimeField(required=False, help_text="Fecha de la interacción.")
 
 class UserHistoryResponseSerializer(serializers.Serializer):
     user_id = serializers.CharField(help_text="Identificador del usuario.")
     history = UserHistoryItemSerializer(many=True)
+    next = serializers.IntegerField(
+        allow_null=True,
+        required=False,
+        help_text="Cursor para pedir la página siguiente con ?before=; null si no hay más."
+    )
@@ -0,0 +1,78 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+ERROR_MESSAGE = "No pude generar la respuesta."
+_DONE = object()
+
+
+def iter_sse(response):
+    # Eventos "data: {...}" de llama.cpp y Gemini; se ignoran comentarios y líneas vacías
+    for line in response.iter_lines():
+        if not line.startswith("data:"):
+            continue
+        payload = line[len("data:"):].strip()
+        if payload == "[DONE]":
+            return
+        yield json.loads(payload)
+
+
+def iter_ndjson(response):
+    # Ollama transmite un objeto JSON por línea
+    for line in response.iter_lines():
+        if line.strip():
+            yield json.loads(line)
+
+
+def _line(event):
+    return json.dumps(event, ensure_ascii=False) + "\n"
+
+
+async def _iterate_in_thread(iterator):
+    # Bajo ASGI Django consume los iteradores síncronos completos antes de enviarlos;
+    # se pide cada fragmento en un hilo para que salga apenas se genera.
+    try:
+        while (chunk := await sync_to_async(next, thread_sensitive=False)(iterator, _DONE)) is not _DONE:
+            yield chunk
+    finally:
+        await sync_to_async(iterator.close, thread_sensitive=False)()
+
+
+def stream_chat_response(request, user_id, query, deltas, finish):
+    """
+    Respuesta del chatbot en JSON por línea (application/x-ndjson):
+    {"type": "start"}, un {"type": "delta", "text"} por fragmento generado y al final
+    {"type": "end", "response"} con la respuesta completa, o {"type": "error"}.
+    `finish(answer)` se llama con el texto completo cuando termina el modelo (limpia y guarda
+    la interacción) y devuelve la respuesta final.
+    """
+    def body():
+        yield _line({"type": "start", "user_id": user_id, "query": query})
+        parts = []
+        try:
+            for delta in deltas:
+                if delta:
+                    parts.append(delta)
+                    yield _line({"type": "delta", "text": delta})
+            answer = finish("".join(parts))
+        except Exception as e:
+            print(f"Error al transmitir la respuesta: {e}")
+            yield _line({"type": "error", "error": ERROR_MESSAGE})
+            return
+        finally:
+            # Cierra la conexión con el modelo (y libera su cupo) aunque el cliente se desconecte
+            close = getattr(deltas, "close", None)
+            if close:
+                close()
+        yield _line({"type": "end", "user_id": user_id, "query": query, "response": answer})
+
+    content = body()
+    if isinstance(getattr(request, "_request", request), ASGIRequest):
+        content = _iterate_in_thread(content)
+    response = StreamingHttpResponse(content, content_type="application/x-ndjson")
+    response["Cache-Control"] = "no-cache"
+    # Evita que un proxy (nginx) acumule la respuesta antes de enviarla
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -1,3 +1,310 @@
-from django.test import TestCase
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase
+
+from . import answer_cache, rag
+from .answer_cache import AnswerCache, bump_docs_version
+from .context import Chunk, assemble_context, estimate_tokens
+from .embedding_cache import EmbeddingCache
+from .history import recent_history, record_interaction, search_history
+from .models import ChatInteraction
+from .scheduler import LLMScheduler, SchedulerBusy
+from .vectorstore import NumpyCollection, VectorStore, matches
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("La condición no se cumplió a tiempo")
+        time.sleep(0.005)
+
+
+class LLMSchedulerTests(SimpleTestCase):
+    def test_queues_beyond_the_concurrency_and_admits_in_order(self):
+        scheduler = LLMScheduler("prueba", concurrency=1, max_queue=4, queue_timeout=2)
+        admitted_at = scheduler.acquire()
+        order = []
+
+        def request(name):
+            with scheduler.slot():
+                order.append(name)
+
+        threads = []
+        for name in ("primera", "segunda"):
+            threads.append(threading.Thread(target=request, args=(name,)))
+            threads[-1].start()
+            wait_until(lambda: len(scheduler.queue) == len(threads))
+        self.assertEqual(scheduler.snapshot()["active"], 1)
+
+        scheduler.release(admitted_at)
+        for thread in threads:
+            thread.join(2)
+        self.assertEqual(order, ["primera", "segunda"])
+        self.assertEqual(scheduler.snapshot()["admitted"], 3)
+
+    def test_rejects_when_the_queue_is_full(self):
+        scheduler = LLMScheduler("prueba", concurrency=1, max_queue=1, queue_timeout=2)
+        admitted_at = scheduler.acquire()
+        waiting = threading.Thread(target=lambda: scheduler.release(scheduler.acquire()))
+        waiting.start()
+        wait_until(lambda: scheduler.queue)
+
+        with self.assertRaises(SchedulerBusy) as busy:
+            scheduler.acquire()
+        self.assertGreaterEqual(busy.exception.retry_after, 1)
+        self.assertEqual(scheduler.snapshot()["rejected"], 1)
+        scheduler.release(admitted_at)
+        waiting.join(2)
+
+    def test_gives_up_after_the_queue_timeout_and_frees_its_place(self):
+        scheduler = LLMScheduler("prueba", concurrency=1, max_queue=1, queue_timeout=0.05)
+        scheduler.acquire()
+        with self.assertRaises(SchedulerBusy):
+            scheduler.acquire()
+        stats = scheduler.snapshot()
+        self.assertEqual((stats["timeouts"], stats["queued"]), (1, 0))
+
+    def test_identical_prompts_share_one_generation(self):
+        scheduler = LLMScheduler("prueba", concurrency=2, max_queue=4, queue_timeout=2)
+        release, calls, results = threading.Event(), [], []
+
+        def generate():
+            calls.append(1)
+            release.wait(2)
+            return "respuesta"
+
+        threads = [threading.Thread(target=lambda: results.append(scheduler.run("prompt", generate)))
+                   for _ in range(3)]
+        threads[0].start()
+        wait_until(lambda: calls)
+        for thread in threads[1:]:
+            thread.start()
+        wait_until(lambda: scheduler.snapshot()["coalesced"] == 2)
+        release.set()
+        for thread in threads:
+            thread.join(2)
+
+        self.assertEqual((len(calls), results), (1, ["respuesta"] * 3))
+        self.assertEqual(scheduler.snapshot()["inflight_prompts"], 0)
+
+    def test_streams_hold_the_slot_until_closed(self):
+        scheduler = LLMScheduler("prueba", concurrency=1, max_queue=1, queue_timeout=2)
+        stream = scheduler.hold(iter(["Hola", " mundo"]))
+        self.assertEqual(next(stream), "Hola")
+        self.assertEqual(scheduler.snapshot()["active"], 1)
+
+        # Cliente desconectado a mitad de la respuesta
+        stream.close()
+        self.assertEqual(scheduler.snapshot()["active"], 0)
+        self.assertEqual(list(scheduler.hold(iter(["otra"]))), ["otra"])
+        self.assertEqual(scheduler.snapshot()["active"], 0)
+
+
+class WhereMatchingTests(SimpleTestCase):
+    def test_supports_the_chroma_operators_used_by_the_service(self):
+        metadata = {"source": "room", "hotel_id": 3, "price": 80}
+        self.assertTrue(matches(metadata, {"source": "room"}))
+        self.assertTrue(matches(metadata, {"$and": [{"hotel_id": {"$in": [1, 3]}}, {"price": {"$lte": 80}}]}))
+        self.assertTrue(matches(metadata, {"$or": [{"source": "hotel"}, {"price": {"$gt": 50}}]}))
+        self.assertFalse(matches(metadata, {"price": {"$gte": 50, "$lt": 80}}))
+        self.assertFalse(matches(metadata, {"source": {"$nin": ["room"]}}))
+
+    def test_missing_keys_only_match_negative_conditions(self):
+        self.assertFalse(matches({}, {"user_id": "7"}))
+        self.assertTrue(matches({}, {"user_id": {"$ne": "7"}}))
+        self.assertTrue(matches(None, None))
+
+    def test_incomparable_values_do_not_match(self):
+        self.assertFalse(matches({"price": "barato"}, {"price": {"$gt": 10}}))
+
+
+class NumpyCollectionTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = str(Path(directory.name) / "numpy" / "hotel_docs.npz")
+        self.collection = NumpyCollection(self.path, "hotel_docs")
+        self.collection.add(
+            ids=["a", "b", "c"],
+            embeddings=[[0, 0], [1, 0], [5, 5]],
+            documents=["Hotel Central", "Suite doble", "Cabaña"],
+            metadatas=[{"source": "hotel", "id": 1}, {"source": "room", "id": 2}, {"source": "room", "id": 3}],
+        )
+
+    def test_returns_the_nearest_documents_first(self):
+        results = self.collection.query(query_embeddings=[[0.9, 0], [5, 4]], n_results=2)
+        self.assertEqual(results["ids"], [["b", "a"], ["c", "b"]])
+        self.assertEqual(results["documents"][0], ["Suite doble", "Hotel Central"])
+        # Distancia euclidiana al cuadrado, como Chroma
+        self.assertAlmostEqual(results["distances"][0][0], 0.01, places=5)
+
+    def test_the_numpy_backend_only_holds_the_document_collections(self):
+        store = VectorStore(str(Path(self.path).parent.parent), backend="numpy")
+        store.client = mock.Mock()
+        self.assertIsInstance(store.open("hotel_docs", None, True), NumpyCollection)
+        # El historial crece con cada pregunta: reescribir el .npz en cada una no escala
+        self.assertIs(store.open("chat_history", None, True), store.client.get_or_create_collection.return_value)
+
+    def test_filters_with_where_before_ranking(self):
+        results = self.collection.query(query_embeddings=[[0, 0]], n_results=5, where={"source": "room"})
+        self.assertEqual(results["ids"], [["b", "c"]])
+        empty = self.collection.query(query_embeddings=[[0, 0]], where={"source": "review"})
+        self.assertEqual((empty["ids"], empty["distances"]), ([[]], [[]]))
+
+    def test_cosine_space_ignores_the_vector_length(self):
+        collection = NumpyCollection(self.path.replace("hotel_docs", "cosine"), "cosine", {"hnsw:space": "cosine"})
+        collection.add(ids=["largo", "corto"], embeddings=[[10, 0], [0, 1]])
+        results = collection.query(query_embeddings=[[1, 0]], n_results=2)
+        self.assertEqual(results["ids"], [["largo", "corto"]])
+        self.assertAlmostEqual(results["distances"][0][0], 0.0, places=5)
+
+    def test_writes_are_persisted_and_seen_by_other_processes(self):
+        self.collection.add(ids="a", embeddings=[[9, 9]], documents="ignorado")
+        self.collection.upsert(ids=["b"], embeddings=[[2, 0]], documents=["Suite renovada"],
+                               metadatas=[{"source": "room", "id": 2}])
+        self.collection.delete(where={"id": 3})
+
+        other = NumpyCollection(self.path, "hotel_docs")
+        self.assertEqual(other.count(), 2)
+        self.assertEqual(other.get(ids=["a", "b"])["documents"], ["Hotel Central", "Suite renovada"])
+        self.assertEqual(other.get(where={"source": "room"}, include=())["ids"], ["b"])
+
+
+class AnswerCacheTests(SimpleTestCase):
+    VECTORS = {
+        "¿A qué hora es el check-in?": [1.0, 0.0],
+        "¿A que hora es el check in?": [0.99, 0.01],
+        "¿Aceptan mascotas?": [0.0, 1.0],
+    }
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        base = Path(directory.name)
+        self.docs = NumpyCollection(str(base / "hotel_docs.npz"), "hotel_docs")
+        collection = NumpyCollection(str(base / "answers.npz"), "answers", {"hnsw:space": "cosine"})
+        for patcher in (mock.patch.object(answer_cache, "DOCS_VERSION_DIR", base),
+                        mock.patch.object(answer_cache.vectorstore, "collection", lambda *args, **kwargs: collection)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.cache = AnswerCache("prueba", self.VECTORS.get, self.docs, threshold=0.95)
+
+    def test_similar_questions_reuse_the_answer(self):
+        self.assertIsNone(self.cache.lookup("¿A qué hora es el check-in?", "7"))
+        self.cache.store("¿A qué hora es el check-in?", "7", "A las 3 p. m.", personal=False, elapsed_ms=900)
+
+        self.assertEqual(self.cache.lookup("¿A que hora es el check in?", "8"), "A las 3 p. m.")
+        self.assertIsNone(self.cache.lookup("¿Aceptan mascotas?", "8"))
+        stats = self.cache.snapshot()
+        self.assertEqual((stats["hits"], stats["misses"], stats["hit_rate"]), (1, 2, 0.3333))
+        self.assertEqual(stats["saved_ms"], 900)
+
+    def test_personal_answers_are_only_reused_for_their_user(self):
+        self.cache.store("¿A qué hora es el check-in?", "7", "Tu reserva entra a las 3", personal=True, elapsed_ms=1)
+        self.assertIsNone(self.cache.lookup("¿A qué hora es el check-in?", "8"))
+        self.assertEqual(self.cache.lookup("¿A qué hora es el check-in?", "7"), "Tu reserva entra a las 3")
+
+    def test_new_documents_invalidate_cached_answers(self):
+        self.cache.store("¿A qué hora es el check-in?", "7", "A las 3 p. m.", personal=False, elapsed_ms=1)
+        bump_docs_version(self.docs)
+        self.assertIsNone(self.cache.lookup("¿A qué hora es el check-in?", "7"))
+
+
+class CachedAnswerHistoryTests(TestCase):
+    def setUp(self):
+        self.embed = mock.Mock(side_effect=AssertionError("no debería calcular embeddings"))
+        for patcher in (mock.patch.object(rag.answer_cache, "lookup", return_value="A las 3 p. m."),
+                        mock.patch.object(rag, "get_ollama_embedding", self.embed),
+                        mock.patch.object(rag, "collection_chat", mock.Mock())):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_cache_hits_only_record_the_interaction(self):
+        self.assertEqual(rag.handle_chat_query("¿A qué hora es el check-in?", "7"), "A las 3 p. m.")
+        fragments, finish = rag.stream_chat_query("¿A qué hora es el check-in?", "7")
+        self.assertEqual(finish("".join(fragments)), "A las 3 p. m.")
+
+        rag.collection_chat.add.assert_not_called()
+        self.assertEqual(list(ChatInteraction.objects.values_list("engine", "answer", "embedding_id")),
+                         [("ollama", "A las 3 p. m.", None)] * 2)
+
+
+class EmbeddingCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "embeddings.sqlite3"
+        self.computed = []
+
+    def compute(self, texts):
+        self.computed.append(texts)
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def test_only_computes_texts_missing_from_the_cache(self):
+        cache = EmbeddingCache(self.path, memory_size=10)
+        cache.embeddings("ollama", "nomic", ["hola", "adiós"], self.compute)
+        vectors = cache.embeddings("ollama", "nomic", ["hola", "hola", "nuevo"], self.compute)
+
+        self.assertEqual(self.computed, [["hola", "adiós"], ["nuevo"]])
+        self.assertEqual(vectors, [[4.0, 1.0], [4.0, 1.0], [5.0, 1.0]])
+        self.assertEqual(cache.snapshot()["memory_hits"], 1)
+
+    def test_other_processes_read_the_vectors_from_disk(self):
+        EmbeddingCache(self.path).embeddings("ollama", "nomic", ["hola"], self.compute)
+        other = EmbeddingCache(self.path)
+        other.embeddings("ollama", "nomic", ["hola"], self.compute)
+        # Otro modelo no comparte entradas
+        other.embeddings("ollama", "otro", ["hola"], self.compute)
+
+        self.assertEqual(len(self.computed), 2)
+        stats = other.snapshot()
+        self.assertEqual((stats["disk_hits"], stats["misses"], stats["hit_rate"]), (1, 1, 0.5))
+
+
+class ContextBudgetTests(SimpleTestCase):
+    def test_keeps_one_chunk_per_entity_within_the_budget(self):
+        docs = [Chunk("Suite doble " * 10, 0.2, ("room", "2")), Chunk("Suite doble", 0.3, ("room", "2")),
+                Chunk("Hotel Central " * 2000, 0.25, ("hotel", "1")), Chunk("Cabaña lejana", 0.9, ("room", "9"))]
+        history = [Chunk("Usuario: hola\nAsistente: ¿en qué te ayudo?", 0.2, ("text", "hola")),
+                   Chunk("Usuario: hola", 0.1, ("text", "incompleto"))]
+        with mock.patch("builtins.print"):
+            context, personal = assemble_context("llamacpp", docs, history, reserved="Pregunta")
+
+        self.assertTrue(personal)
+        self.assertEqual(context.count("Suite doble"), 10)
+        self.assertNotIn("Hotel Central", context)
+        self.assertNotIn("Cabaña", context)
+        self.assertNotIn("Usuario: hola\n\n", context)
+        self.assertLessEqual(estimate_tokens(context), 1024)
+
+
+class HistoryTests(TestCase):
+    def setUp(self):
+        self.ids = [record_interaction("llamacpp", 7, f"pregunta {i}", f"respuesta {i}").id for i in range(5)]
+        record_interaction("llamacpp", 7, "¿Cómo pago la reserva?", "Con tarjeta o transferencia.")
+        record_interaction("llamacpp", 8, "¿Cómo pago?", "Con tarjeta.")
+        record_interaction("ollama", 7, "¿Cómo pago?", "En efectivo.")
+
+    def test_pages_from_the_most_recent_with_a_cursor(self):
+        items, cursor = recent_history("llamacpp", 7, limit=4)
+        self.assertEqual(len(items), 4)
+        more, last = recent_history("llamacpp", 7, limit=4, before=cursor)
+        self.assertEqual([item["id"] for item in more], self.ids[:2][::-1])
+        self.assertIsNone(last)
+
+    def test_searches_questions_and_answers_of_the_user_by_prefix(self):
+        self.assertEqual([item["answer"] for item in search_history("llamacpp", 7, "pag")],
+                         ["Con tarjeta o transferencia."])
+        self.assertEqual(len(search_history("llamacpp", 7, "transferencia tarjeta")), 1)
+        self.assertEqual(search_history("llamacpp", 7, "???"), [])
+
+    def test_history_endpoint(self):
+        page = self.client.get("/api/llamacpp/", {"limit": 2}).json()
+        self.assertEqual(page["history"], [])
+        self.assertIsNone(page["next"])
+        self.assertEqual(self.client.get("/api/llamacpp/", {"limit": 0}).status_code, 400)
@@ -0,0 +1,326 @@
+import json
+import operator
+import os
+import threading
+
+import numpy as np
+from django.conf import settings
+
+VECTOR_STORE_PATH = str(getattr(settings, "CHROMADB_PATH", "./chroma_store"))
+# "chroma" (por defecto) o "numpy": índice en memoria por fuerza bruta para catálogos pequeños
+VECTOR_STORE_BACKEND = getattr(settings, "VECTOR_STORE_BACKEND", "chroma")
+# Réplicas de solo lectura: no crean colecciones ni escriben (ingesta, historial, caché)
+VECTOR_STORE_READ_ONLY = getattr(settings, "VECTOR_STORE_READ_ONLY", False)
+
+# Colecciones de documentos e historial de cada motor; Ollama y llama.cpp comparten las suyas
+ENGINE_COLLECTIONS = {
+    "ollama": ("hotel_docs", "chat_history"),
+    "llamacpp": ("hotel_docs", "chat_history"),
+    "gemini": ("gemini_hotel_docs", "gemini_chat_history"),
+}
+# Con el backend "numpy" solo van a NumpyCollection estas colecciones: cada escritura reescribe el
+# .npz completo, así que sirve para los documentos (cambian con la ingesta) pero no para el
+# historial ni la caché de respuestas, que crecen con cada pregunta y siguen en Chroma.
+VECTOR_STORE_NUMPY_COLLECTIONS = set(getattr(
+    settings, "VECTOR_STORE_NUMPY_COLLECTIONS", [docs for docs, _ in ENGINE_COLLECTIONS.values()]))
+
+
+class ReadOnlyVectorStore(Exception):
+    pass
+
+
+class CollectionHandle:
+    """
+    Referencia a una colección que se abre la primera vez que se usa. Expone la misma interfaz
+    que una colección de Chroma (query, get, add, upsert, delete, count...) con cualquier backend.
+    """
+
+    def __init__(self, store, name, metadata=None, create=True):
+        self.store = store
+        self.name = name
+        self.metadata = metadata
+        self.create = create
+        self._collection = None
+
+    def resolve(self):
+        if self._collection is None:
+            self._collection = self.store.open(self.name, self.metadata, self.create)
+        return self._collection
+
+    def __getattr__(self, attr):
+        return getattr(self.resolve(), attr)
+
+    def _write(self, method, *args, **kwargs):
+        if self.store.read_only:
+            raise ReadOnlyVectorStore(f"La colección '{self.name}' es de solo lectura en esta réplica")
+        return getattr(self.resolve(), method)(*args, **kwargs)
+
+    def add(self, *args, **kwargs):
+        return self._write("add", *args, **kwargs)
+
+    def upsert(self, *args, **kwargs):
+        return self._write("upsert", *args, **kwargs)
+
+    def update(self, *args, **kwargs):
+        return self._write("update", *args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        return self._write("delete", *args, **kwargs)
+
+
+class VectorStore:
+    """Dueño único del cliente del almacén vectorial del proceso y de sus colecciones."""
+
+    def __init__(self, path, backend="chroma", read_only=False, numpy_collections=VECTOR_STORE_NUMPY_COLLECTIONS):
+        self.path = path
+        self.backend = backend
+        self.numpy_collections = numpy_collections
+        self.read_only = read_only
+        self.lock = threading.Lock()
+        self.client = None
+        self.handles = {}
+
+    def _client(self):
+        if self.client is None:
+            import chromadb
+            self.client = chromadb.PersistentClient(path=self.path)
+        return self.client
+
+    def open(self, name, metadata, create):
+        with self.lock:
+            if self.backend == "numpy" and name in self.numpy_collections:
+                return NumpyCollection(os.path.join(self.path, "numpy", f"{name}.npz"), name, metadata)
+            client = self._client()
+            if create and not self.read_only:
+                return client.get_or_create_collection(name, metadata=metadata)
+            return client.get_collection(name)
+
+    def collection(self, name, metadata=None, create=True):
+        with self.lock:
+            if name not in self.handles:
+                self.handles[name] = CollectionHandle(self, name, metadata, create)
+            return self.handles[name]
+
+    def warm_up(self):
+        # Abre el cliente y carga cada índice con una consulta, para que no lo pague la primera petición
+        for handle in list(self.handles.values()):
+            try:
+                sample = handle.peek(1)
+                embeddings = sample.get("embeddings")
+                if embeddings is not None and len(embeddings):
+                    handle.query(query_embeddings=[list(embeddings[0])], n_results=1, include=[])
+            except Exception as e:
+                print(f"No se pudo precargar la colección '{handle.name}': {e}")
+
+
+store = VectorStore(VECTOR_STORE_PATH, VECTOR_STORE_BACKEND, VECTOR_STORE_READ_ONLY)
+
+
+def collection(name, metadata=None, create=True):
+    return store.collection(name, metadata, create)
+
+
+def docs_collection(engine):
+    return store.collection(ENGINE_COLLECTIONS[engine][0])
+
+
+def history_collection(engine):
+    return store.collection(ENGINE_COLLECTIONS[engine][1])
+
+
+def warm_up():
+    for engine in ENGINE_COLLECTIONS:
+        docs_collection(engine)
+        history_collection(engine)
+    store.warm_up()
+
+
+OPERATORS = {
+    "$eq": operator.eq,
+    "$ne": operator.ne,
+    "$gt": operator.gt,
+    "$gte": operator.ge,
+    "$lt": operator.lt,
+    "$lte": operator.le,
+    "$in": lambda value, options: value in options,
+    "$nin": lambda value, options: value not in options,
+}
+
+
+def matches(metadata, where):
+    # Subconjunto de los filtros `where` de Chroma que usa el servicio
+    for key, condition in (where or {}).items():
+        if key == "$and":
+            if not all(matches(metadata, sub) for sub in condition):
+                return False
+        elif key == "$or":
+            if not any(matches(metadata, sub) for sub in condition):
+                return False
+        else:
+            value = (metadata or {}).get(key)
+            conditions = condition if isinstance(condition, dict) else {"$eq": condition}
+            for op, argument in conditions.items():
+                if op not in ("$ne", "$nin") and value is None:
+                    return False
+                try:
+                    if not OPERATORS[op](value, argument):
+                        return False
+                except TypeError:
+                    return False
+    return True
+
+
+class NumpyCollection:
+    """
+    Colección en memoria con búsqueda por fuerza bruta (producto de matrices en numpy),
+    persistida en un .npz. Pensada para catálogos de unos pocos miles de documentos, donde
+    recorrer todos los vectores cuesta menos que mantener un índice HNSW. Cada escritura
+    reescribe el archivo y los demás procesos lo recargan cuando cambia, por eso el
+    VectorStore solo la usa para VECTOR_STORE_NUMPY_COLLECTIONS.
+    """
+
+    def __init__(self, path, name, metadata=None):
+        self.path = path
+        self.name = name
+        self.metadata = metadata or {}
+        self.cosine = self.metadata.get("hnsw:space") == "cosine"
+        self.lock = threading.RLock()
+        self.mtime = None
+        self.ids, self.documents, self.metadatas = [], [], []
+        self.embeddings = np.zeros((0, 0), dtype=np.float32)
+        self._reload()
+
+    def _reload(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self.mtime:
+            return
+        with np.load(self.path) as data:
+            rows = json.loads(str(data["rows"]))
+            self.embeddings = data["embeddings"]
+        self.ids = [row[0] for row in rows]
+        self.documents = [row[1] for row in rows]
+        self.metadatas = [row[2] for row in rows]
+        self.mtime = mtime
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        rows = json.dumps(list(zip(self.ids, self.documents, self.metadatas)), ensure_ascii=False)
+        tmp = f"{self.path}.tmp.npz"
+        np.savez(tmp, embeddings=self.embeddings, rows=np.array(rows))
+        os.replace(tmp, self.path)
+        self.mtime = os.stat(self.path).st_mtime_ns
+
+    def _positions(self, ids=None, where=None):
+        if ids is not None:
+            index = {doc_id: i for i, doc_id in enumerate(self.ids)}
+            positions = [index[doc_id] for doc_id in ids if doc_id in index]
+        else:
+            positions = range(len(self.ids))
+        return [i for i in positions if matches(self.metadatas[i], where)]
+
+    def _rows(self, positions, include):
+        result = {"ids": [self.ids[i] for i in positions]}
+        if "documents" in include:
+            result["documents"] = [self.documents[i] for i in positions]
+        if "metadatas" in include:
+            result["metadatas"] = [self.metadatas[i] for i in positions]
+        if "embeddings" in include:
+            result["embeddings"] = self.embeddings[list(positions)]
+        return result
+
+    def count(self):
+        with self.lock:
+            self._reload()
+            return len(self.ids)
+
+    def get(self, ids=None, where=None, limit=None, offset=None, include=("documents", "metadatas")):
+        with self.lock:
+            self._reload()
+            positions = self._positions(ids, where)
+            start = offset or 0
+            positions = positions[start:start + limit if limit is not None else None]
+            return self._rows(positions, include)
+
+    def peek(self, limit=10):
+        return self.get(limit=limit, include=("documents", "metadatas", "embeddings"))
+
+    def query(self, query_embeddings, n_results=10, where=None,
+              include=("documents", "metadatas", "distances")):
+        with self.lock:
+            self._reload()
+            positions = np.array(self._positions(where=where), dtype=np.int64)
+            # Sin filtro se usa la matriz completa, sin copiarla
+            vectors = self.embeddings if where is None else self.embeddings[positions]
+            results = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+            for embedding in query_embeddings:
+                query = np.asarray(embedding, dtype=np.float32)
+                if positions.size:
+                    if self.cosine:
+                        norms = np.linalg.norm(vectors, axis=1) * (np.linalg.norm(query) or 1.0)
+                        distances = 1 - (vectors @ query) / np.where(norms == 0, 1.0, norms)
+                    else:
+                        # Igual que Chroma: distancia euclidiana al cuadrado
+                        distances = ((vectors - query) ** 2).sum(axis=1)
+                    k = min(n_results, positions.size)
+                    nearest = np.argpartition(distances, k - 1)[:k]
+                    nearest = nearest[np.argsort(distances[nearest])]
+                else:
+                    nearest, distances = [], np.zeros(0)
+                rows = self._rows([int(positions[i]) for i in nearest], include)
+                results["ids"].append(rows["ids"])
+                results["documents"].append(rows.get("documents"))
+                results["metadatas"].append(rows.get("metadatas"))
+                results["distances"].append([float(distances[i]) for i in nearest])
+            return results
+
+    def _write(self, ids, documents, metadatas, embeddings, replace):
+        # Chroma acepta un solo elemento sin lista (p. ej. metadatas={"user_id": ...})
+        ids = [ids] if isinstance(ids, str) else list(ids)
+        documents = [documents] if isinstance(documents, str) else documents
+        metadatas = [metadatas] if isinstance(metadatas, dict) else metadatas
+        documents = documents or [None] * len(ids)
+        metadatas = metadatas or [None] * len(ids)
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        with self.lock:
+            self._reload()
+            index = {doc_id: i for i, doc_id in enumerate(self.ids)}
+            new = []
+            for doc_id, document, metadata, vector in zip(ids, documents, metadatas, vectors):
+                if doc_id in index:
+                    if replace:
+                        i = index[doc_id]
+                        self.documents[i], self.metadatas[i] = document, metadata
+                        self.embeddings[i] = vector
+                    continue
+                index[doc_id] = len(self.ids) + len(new)
+                new.append((doc_id, document, metadata, vector))
+            if new:
+                self.ids += [row[0] for row in new]
+                self.documents += [row[1] for row in new]
+                self.metadatas += [row[2] for row in new]
+                added = np.stack([row[3] for row in new])
+                self.embeddings = added if not self.embeddings.size else np.vstack([self.embeddings, added])
+            self._save()
+
+    def add(self, ids, embeddings, documents=None, metadatas=None):
+        # Como en Chroma, los ids que ya existen se ignoran
+        self._write(ids, documents, metadatas, embeddings, replace=False)
+
+    def upsert(self, ids, embeddings, documents=None, metadatas=None):
+        self._write(ids, documents, metadatas, embeddings, replace=True)
+
+    def delete(self, ids=None, where=None):
+        with self.lock:
+            self._reload()
+            removed = set(self._positions(ids, where))
+            if not removed:
+                return
+            keep = [i for i in range(len(self.ids)) if i not in removed]
+            self.ids = [self.ids[i] for i in keep]
+            self.documents = [self.documents[i] for i in keep]
+            self.metadatas = [self.metadatas[i] for i in keep]
+            self.embeddings = self.embeddings[keep]
+            self._save()
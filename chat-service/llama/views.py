@@ -2,10 +2,42 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
 from .authentication import UserAuthentication
-from .rag import handle_chat_query, get_user_history, search_user_history
-from .serializers import ChatRequestSerializer, ChatResponseSerializer, UserHistoryResponseSerializer
-from .rag_llamacpp import handle_chat_query_llamacpp, get_user_history as get_user_history_llamacpp, search_user_history as search_user_history_llamacpp
-from .rag_gemini import handle_chat_query_gemini, gemini_get_user_history, search_user_history_gemini
+from hotelia_common.views import metrics_denied
+from .answer_cache import answer_cache_stats
+from .embedding_cache import embedding_cache
+from .history import recent_history, search_history
+from .rag import handle_chat_query, stream_chat_query
+from .serializers import ChatRequestSerializer, ChatResponseSerializer, HistoryQuerySerializer, UserHistoryResponseSerializer
+from .streaming import stream_chat_response
+from .rag_llamacpp import handle_chat_query_llamacpp, stream_chat_query_llamacpp
+from .scheduler import SchedulerBusy, scheduler_stats
+from .rag_gemini import handle_chat_query_gemini, stream_chat_query_gemini
+
+
+def history_response(request, engine, user_id):
+    # Historial paginado por cursor (?before=) o búsqueda de texto completo (?search=)
+    serializer = HistoryQuerySerializer(data=request.query_params)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    limit = serializer.validated_data["limit"]
+    search = serializer.validated_data.get("search")
+    try:
+        if search:
+            history, cursor = search_history(engine, user_id, search, limit=limit), None
+        else:
+            history, cursor = recent_history(engine, user_id, limit=limit,
+                                             before=serializer.validated_data.get("before"))
+        response_serializer = UserHistoryResponseSerializer({
+            "user_id": user_id,
+            "history": history,
+            "next": cursor,
+        })
+        return Response(response_serializer.data, status=status.HTTP_200_OK)
+    except Exception as e:
+        return Response(
+            {"error": f"No se pudo obtener el historial: {str(e)}"},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
 
 class OLlamaBotView(APIView):
     permission_classes = [permissions.AllowAny]
@@ -18,6 +50,8 @@ class OLlamaBotView(APIView):
         query = serializer.validated_data.get("query")
         user_id = str(request.user.id) if request.user.is_authenticated else "anon"
         try:
+            if serializer.validated_data.get("stream"):
+                return stream_chat_response(request, user_id, query, *stream_chat_query(query, user_id))
             answer = handle_chat_query(query, user_id)
 
             response_data = {
@@ -29,6 +63,9 @@ class OLlamaBotView(APIView):
             response_serializer = ChatResponseSerializer(response_data)
             return Response(response_serializer.data, status=status.HTTP_200_OK)
 
+        except SchedulerBusy as e:
+            return Response({"error": str(e)}, status=status.HTTP_429_TOO_MANY_REQUESTS,
+                            headers={"Retry-After": str(e.retry_after)})
         except Exception as e:
             print(e)
             return Response(
@@ -37,24 +74,8 @@ class OLlamaBotView(APIView):
             )
         
     def get(self, request):
-        limit = int(request.query_params.get("limit", 10))
-        search = request.query_params.get("search")
         user_id = str(request.user.id) if request.user.is_authenticated else "anon"
-        try:
-            if search:
-                history = search_user_history(user_id, search=search, n_results=limit)
-            else:
-                history = get_user_history(user_id=user_id, limit=limit)
-            response_serializer = UserHistoryResponseSerializer({
-                "user_id": user_id,
-                "history": history
-            })
-            return Response(response_serializer.data, status=status.HTTP_200_OK)
-        except Exception as e:
-            return Response(
-                {"error": f"No se pudo obtener el historial: {str(e)}"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        return history_response(request, "ollama", user_id)
 
 
 class ChatLlamaCppView(APIView):
@@ -68,32 +89,21 @@ class ChatLlamaCppView(APIView):
         user_id = str(request.user.id) if request.user.is_authenticated else "anon"
 
         try:
+            if serializer.validated_data.get("stream"):
+                return stream_chat_response(request, user_id, query, *stream_chat_query_llamacpp(query, user_id))
             answer = handle_chat_query_llamacpp(query, user_id)
             response_data = {"user_id": user_id,
                              "query": query, "response": answer}
             response_serializer = ChatResponseSerializer(response_data)
             return Response(response_serializer.data, status=status.HTTP_200_OK)
+        except SchedulerBusy as e:
+            return Response({"error": str(e)}, status=status.HTTP_429_TOO_MANY_REQUESTS,
+                            headers={"Retry-After": str(e.retry_after)})
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     def get(self, request):
-        limit = int(request.query_params.get("limit", 10))
-        search = request.query_params.get("search")
         user_id = str(request.user.id) if request.user.is_authenticated else "anon"
-        try:
-            if search:
-                history = search_user_history_llamacpp(user_id, search=search, n_results=limit)
-            else:
-                history = get_user_history_llamacpp(user_id=user_id, limit=limit)
-            response_serializer = UserHistoryResponseSerializer({
-                "user_id": user_id,
-                "history": history
-            })
-            return Response(response_serializer.data, status=status.HTTP_200_OK)
-        except Exception as e:
-            return Response(
-                {"error": f"No se pudo obtener el historial: {str(e)}"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        return history_response(request, "llamacpp", user_id)
         
 class ChatGeminiView(APIView):
     permission_classes = [permissions.AllowAny]
@@ -105,6 +115,8 @@ class ChatGeminiView(APIView):
         query = serializer.validated_data.get("query")
         user_id = str(request.user.id) if request.user.is_authenticated else "anonimo"
         try:
+            if serializer.validated_data.get("stream"):
+                return stream_chat_response(request, user_id, query, *stream_chat_query_gemini(query, user_id))
             answer = handle_chat_query_gemini(query, user_id)
             response_data = {"user_id": user_id,
                              "query": query, "response": answer}
@@ -113,21 +125,32 @@ class ChatGeminiView(APIView):
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     def get(self, request):
-        limit = int(request.query_params.get("limit", 10))
-        search = request.query_params.get("search")
         user_id = str(request.user.id) if request.user.is_authenticated else "anonimo"
-        try:
-            if search:
-                history = search_user_history_gemini(user_id, search=search, n_results=limit)
-            else:
-                history = gemini_get_user_history(user_id=user_id, limit=limit)
-            response_serializer = UserHistoryResponseSerializer({
-                "user_id": user_id,
-                "history": history
-            })
-            return Response(response_serializer.data, status=status.HTTP_200_OK)
-        except Exception as e:
-            return Response(
-                {"error": f"No se pudo obtener el historial: {str(e)}"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
\ No newline at end of file
+        return history_response(request, "gemini", user_id)
+
+
+class EmbeddingCacheMetricsView(APIView):
+    # Aciertos, fallos y desalojos de la caché de embeddings de este proceso.
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        return metrics_denied(request) or Response(embedding_cache.snapshot(), status=status.HTTP_200_OK)
+
+
+class AnswerCacheMetricsView(APIView):
+    # Aciertos de la caché semántica de respuestas por motor y tiempo de generación ahorrado.
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        return metrics_denied(request) or Response(answer_cache_stats(), status=status.HTTP_200_OK)
+
+
+class LLMSchedulerMetricsView(APIView):
+    # Cupos en uso, profundidad de cola, rechazos y tiempos de espera de cada modelo local.
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        return metrics_denied(request) or Response(scheduler_stats(), status=status.HTTP_200_OK)
@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class HoteliaCommonConfig(AppConfig):
+    # Solo aporta la migración que crea las tablas de caché en base (marcas de revocación)
+    name = "hotelia_common"
+    verbose_name = "Hotelia common"
@@ -0,0 +1,183 @@
+import base64
+import hashlib
+import hmac
+import json
+import time
+
+import httpx
+import jwt
+from rest_framework.authentication import BaseAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+from django.conf import settings
+
+from .cache import TTLCache
+from .clients import get_client
+from .revocation import is_revoked
+
+# Los access token de SimpleJWT se firman con el SECRET_KEY compartido del auth-service,
+# así que la firma y la expiración se pueden validar aquí sin salir a la red.
+JWT_SIGNING_KEY = getattr(settings, "JWT_SIGNING_KEY", settings.SECRET_KEY)
+JWT_ALGORITHM = getattr(settings, "JWT_ALGORITHM", "HS256")
+AUTH_LOCAL_JWT_VERIFY = getattr(settings, "AUTH_LOCAL_JWT_VERIFY", True)
+PROFILE_CACHE_TTL = getattr(settings, "AUTH_PROFILE_CACHE_TTL", 300)
+PROFILE_CACHE_SIZE = getattr(settings, "AUTH_PROFILE_CACHE_SIZE", 10000)
+
+# Identidad que reenvía el gateway ya verificada, firmada con el token compartido del servicio
+IDENTITY_HEADER = "X-Gateway-Identity"
+
+# Perfiles por token en memoria del worker. Solo guarda perfiles: si un token está revocado
+# se decide siempre con las marcas de la caché compartida (revocation.py).
+_profiles = TTLCache(PROFILE_CACHE_SIZE, PROFILE_CACHE_TTL)
+
+
+class ProxyUser:
+    # Usuario en memoria con la info que devuelve el auth-service (no es un modelo).
+    is_active = True
+    is_anonymous = False
+    is_authenticated = True
+
+    def __init__(self, user_data):
+        self.id = self.pk = user_data.get('id')
+        self.username = user_data.get('email')
+        self.email = user_data.get("email")
+        self.is_staff = user_data.get('is_staff', False)
+        self.is_superuser = user_data.get('is_superuser', False)
+        self.first_name = user_data.get('first_name')
+        self.last_name = user_data.get('last_name')
+        self.dni = user_data.get('dni')
+        self.phone = user_data.get('phone')
+        self.is_active = user_data.get('is_active', False)
+        self.groups = user_data.get('groups') or []
+
+    def __str__(self):
+        return f"{self.email}"
+
+    def get_username(self):
+        return self.email
+
+    def has_perm(self, perm, obj=None):
+        # Lógica de permisos, podrías obtenerla del auth-service
+        return True
+
+    def has_module_perms(self, app_label):
+        return True
+
+
+def decode_access_token(token):
+    try:
+        claims = jwt.decode(token, JWT_SIGNING_KEY, algorithms=[JWT_ALGORITHM],
+                            options={"require": ["exp", "jti"]})
+    except jwt.ExpiredSignatureError:
+        raise AuthenticationFailed("El token ha expirado.")
+    except jwt.InvalidTokenError:
+        raise AuthenticationFailed("Token invalido.")
+    if claims.get("token_type", "access") != "access":
+        raise AuthenticationFailed("Token invalido.")
+
+    if is_revoked(claims.get("user_id"), claims.get("sid"), claims.get("iat")):
+        raise AuthenticationFailed("El token fue revocado.")
+    return claims
+
+
+def _unb64(value):
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+
+def verify_identity(envelope, key):
+    # Sobre "<payload>.<firma>" de api-gateway/gateway/identity.py; None si falta o no es válido
+    if not key or not envelope:
+        return None
+    try:
+        payload, signature = envelope.split(".")
+        expected = hmac.new(key.encode(), payload.encode(), hashlib.sha256).digest()
+        if not hmac.compare_digest(expected, _unb64(signature)):
+            return None
+        identity = json.loads(_unb64(payload))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(identity, dict) or not identity.get("id") or identity.get("exp", 0) <= time.time():
+        return None
+
+    if is_revoked(identity["id"], identity.get("sid"), identity.get("iat")):
+        raise AuthenticationFailed("El token fue revocado.")
+    return identity
+
+
+def fetch_user_data(auth_header):
+    try:
+        # Realiza una llamada al auth-service para obtener la info del usuario
+        headers = {'Authorization': auth_header}
+        response = get_client("auth").post(f"{settings.AUTH_SERVICE_URL}auth/me/", headers=headers)
+        response.raise_for_status()  # Lanza un error para códigos de estado 4xx/5xx
+        try:
+            return response.json()
+        except json.JSONDecodeError:
+            raise AuthenticationFailed(
+                "El servicio de autenticación devolvió una respuesta JSON inválida."
+            )
+    except httpx.RequestError as exc:
+        raise AuthenticationFailed(
+            "Fallo al comunicarse con el servicio de autenticación."
+        )
+    except httpx.HTTPStatusError as exc:
+        # Por ejemplo: 401 Unauthorized, 403 Forbidden, 500 Internal Server Error
+        raise AuthenticationFailed(
+            f"El servicio de autenticación rechazó la solicitud: {exc.response.status_code}"
+        )
+
+
+class UserAuthentication(BaseAuthentication):
+    # Cada servicio la extiende indicando el setting con su token compartido con el gateway
+    # (el que firma los sobres de identidad), p. ej. "HOTELS_GATEWAY_TOKEN".
+    gateway_token_setting = None
+
+    def authenticate(self, request):
+        # 0. El gateway ya autenticó al usuario: se usa su identidad firmada sin salir a la red
+        key = getattr(settings, self.gateway_token_setting, None) if self.gateway_token_setting else None
+        identity = verify_identity(request.headers.get(IDENTITY_HEADER), key)
+        if identity is not None:
+            if not identity.get('is_active', False):
+                raise AuthenticationFailed(
+                    "La solicitud fue rechazada. El usuario no esta activo."
+                )
+            return (ProxyUser(identity), None)
+
+        auth_header = request.headers.get('Authorization')
+        if not auth_header:
+            return None
+
+        # 1. Valida el token localmente; el perfil se pide al auth-service solo una vez por token
+        parts = auth_header.split()
+        local = AUTH_LOCAL_JWT_VERIFY and len(parts) == 2 and parts[0] == "Bearer"
+        if local:
+            claims = decode_access_token(parts[1])
+            cache_key = claims["jti"]
+            ttl = claims["exp"] - time.time()
+        else:
+            cache_key = hashlib.sha256(auth_header.encode()).hexdigest()
+            ttl = PROFILE_CACHE_TTL
+
+        cached = _profiles.get(cache_key)
+        if cached is not None and not local and is_revoked(cached[0].get('id'), issued_at=cached[1]):
+            # Sin claims no hay iat: vale la hora en que se cacheó el perfil
+            raise AuthenticationFailed("El token fue revocado.")
+        if cached is None:
+            user_data = fetch_user_data(auth_header)
+            try:
+                if not user_data.get('id'):
+                    return None  # No hay ID de usuario en la respuesta
+            except (AttributeError, TypeError):
+                raise AuthenticationFailed(
+                    "El servicio de autenticación respondió con datos de usuario incorrectos."
+                )
+            cached = (user_data, int(time.time()))
+            _profiles.set(cache_key, cached, ttl)
+        user_data = cached[0]
+
+        if not user_data.get('is_active', False):
+            raise AuthenticationFailed(
+                "La solicitud fue rechazada. El usuario no esta activo."
+            )
+
+        # 2. Crea un objeto de usuario en memoria con la info obtenida
+        return (ProxyUser(user_data), None)
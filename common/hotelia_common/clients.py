@@ -0,0 +1,118 @@
+import threading
+import time
+from collections import Counter
+
+import httpx
+from django.conf import settings
+
+try:
+    import h2  # noqa: F401  # httpx solo negocia HTTP/2 si el paquete h2 está instalado
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Valores por defecto de cada upstream. Cada servicio declara los suyos en HTTP_UPSTREAMS y
+# HTTP_CLIENTS permite sobrescribir cualquier clave sin tocar el código.
+DEFAULT_OPTIONS = {
+    "timeout": getattr(settings, "HTTP_CLIENT_TIMEOUT", 10.0),
+    "connect_timeout": getattr(settings, "HTTP_CLIENT_CONNECT_TIMEOUT", 5.0),
+    "max_connections": getattr(settings, "HTTP_CLIENT_MAX_CONNECTIONS", 50),
+    "max_keepalive": getattr(settings, "HTTP_CLIENT_MAX_KEEPALIVE", 10),
+    "keepalive_expiry": getattr(settings, "HTTP_CLIENT_KEEPALIVE_EXPIRY", 30.0),
+    "http2": getattr(settings, "HTTP_CLIENT_HTTP2", True),
+}
+
+_clients = {}
+_stats = {}
+_lock = threading.Lock()
+
+
+def upstream_options(name):
+    options = dict(DEFAULT_OPTIONS)
+    options.update(getattr(settings, "HTTP_UPSTREAMS", {}).get(name, {}))
+    options.update(getattr(settings, "HTTP_CLIENTS", {}).get(name, {}))
+    return options
+
+
+def _hooks(stats):
+    # Todo se mide con los hooks de httpx y la extensión "trace" de httpcore (API pública):
+    # peticiones, latencia, conexiones nuevas y versión de HTTP negociada
+    def trace(event, info):
+        if event == "connection.connect_tcp.complete":
+            with _lock:
+                stats["connections_opened"] += 1
+
+    def on_request(request):
+        request.extensions["started_at"] = time.monotonic()
+        request.extensions["trace"] = trace
+        with _lock:
+            stats["requests"] += 1
+
+    def on_response(response):
+        elapsed = time.monotonic() - response.request.extensions.get("started_at", time.monotonic())
+        with _lock:
+            stats["responses"] += 1
+            stats[f"status_{response.status_code // 100}xx"] += 1
+            stats[response.http_version] += 1
+            stats["elapsed_ms"] += int(elapsed * 1000)
+
+    return {"request": [on_request], "response": [on_response]}
+
+
+def get_client(name):
+    """
+    Devuelve el httpx.Client compartido del upstream `name`. Se crea una sola vez por proceso,
+    con keep-alive y límites propios, y es seguro usarlo desde varios hilos.
+    """
+    client = _clients.get(name)
+    if client is not None:
+        return client
+    with _lock:
+        client = _clients.get(name)
+        if client is None:
+            options = upstream_options(name)
+            stats = _stats.setdefault(name, Counter())
+            client = httpx.Client(
+                timeout=httpx.Timeout(options["timeout"], connect=options["connect_timeout"]),
+                limits=httpx.Limits(
+                    max_connections=options["max_connections"],
+                    max_keepalive_connections=options["max_keepalive"],
+                    keepalive_expiry=options["keepalive_expiry"],
+                ),
+                http2=options["http2"] and HTTP2_AVAILABLE,
+                event_hooks=_hooks(stats),
+            )
+            _clients[name] = client
+    return client
+
+
+def pool_stats():
+    # Contadores por upstream: peticiones, errores, latencia y reutilización de conexiones
+    result = {}
+    with _lock:
+        names = list(_clients)
+        counters = {name: dict(stats) for name, stats in _stats.items()}
+    for name in names:
+        stats = counters.get(name, {})
+        requests = stats.get("requests", 0)
+        opened = stats.pop("connections_opened", 0)
+        versions = {version: stats.pop(version) for version in list(stats) if version.startswith("HTTP/")}
+        result[name] = {
+            **stats,
+            # Peticiones sin respuesta: errores de red/timeouts (o las que siguen en curso)
+            "errors": requests - stats.get("responses", 0),
+            "connections_opened": opened,
+            # Peticiones por conexión abierta: cuánto se aprovecha el keep-alive
+            "requests_per_connection": round(requests / opened, 2) if opened else None,
+            "http_versions": versions,
+            "http2": versions.get("HTTP/2", 0) > 0,
+            "limits": {k: v for k, v in upstream_options(name).items() if k != "http2"},
+        }
+    return result
+
+
+def close_clients():
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
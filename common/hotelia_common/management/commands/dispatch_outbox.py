@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from hotelia_common.outbox import OUTBOX_POLL_INTERVAL, dispatch_pending
+
+
+class Command(BaseCommand):
+    help = (
+        "Envía los correos pendientes del outbox (settings.OUTBOX_MODEL) al notifications-service. "
+        "Útil para correr el despachador como proceso aparte (con OUTBOX_AUTOSTART=False)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true",
+                            help="Vacía el outbox una vez y termina.")
+        parser.add_argument("--interval", type=int, default=OUTBOX_POLL_INTERVAL,
+                            help="Segundos entre revisiones del outbox.")
+
+    def handle(self, *args, **options):
+        while True:
+            total = 0
+            while processed := dispatch_pending():
+                total += processed
+            if total:
+                self.stdout.write(f"Correos procesados: {total}")
+            if options["once"]:
+                return
+            time.sleep(options["interval"])
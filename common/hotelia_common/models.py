@@ -0,0 +1,33 @@
+from django.db import models
+from django.utils import timezone
+
+
+class OutboxStatus(models.TextChoices):
+    PENDING = 'pending', 'Pendiente'
+    SENT = 'sent', 'Enviado'
+    FAILED = 'failed', 'Fallido'
+
+
+class NotificationOutboxBase(models.Model):
+    # Campos del outbox de correos (ver outbox.py). Cada servicio declara su modelo concreto con
+    # created_at/updated_at y el índice outbox_pending_idx, y lo indica en settings.OUTBOX_MODEL.
+    class Meta:
+        abstract = True
+
+    subject = models.CharField(max_length=200)
+    body = models.TextField()
+    destinations = models.JSONField()
+    status = models.CharField(
+        max_length=20, default=OutboxStatus.PENDING, choices=OutboxStatus.choices)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default="")
+
+    def __str__(self):
+        return f"{self.subject} para {', '.join(self.destinations)} ({self.status})"
+
+    @property
+    def delivery_key(self):
+        # Clave de idempotencia para el notifications-service: no cambia entre reintentos y no se
+        # repite entre servicios ni si la base se recrea y vuelven a salir los mismos id.
+        return f"{self._meta.label_lower}:{self.pk}:{int(self.created_at.timestamp())}"
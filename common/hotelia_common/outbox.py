@@ -0,0 +1,144 @@
+import threading
+from datetime import timedelta
+
+import httpx
+from django.apps import apps
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .clients import get_client
+from .models import OutboxStatus
+
+# Modelo concreto del servicio, p. ej. "reservations.NotificationOutbox" (ver models.NotificationOutboxBase)
+OUTBOX_MODEL = getattr(settings, "OUTBOX_MODEL", None)
+NOTIFICATIONS_SERVICE_URL = getattr(settings, "NOTIFICATIONS_SERVICE_URL", None)
+OUTBOX_BATCH_SIZE = getattr(settings, "OUTBOX_BATCH_SIZE", 50)
+OUTBOX_MAX_ATTEMPTS = getattr(settings, "OUTBOX_MAX_ATTEMPTS", 8)
+OUTBOX_RETRY_BACKOFF = getattr(settings, "OUTBOX_RETRY_BACKOFF", 30)  # segundos, se duplica por intento
+OUTBOX_POLL_INTERVAL = getattr(settings, "OUTBOX_POLL_INTERVAL", 30)
+# Debe ser mayor que el timeout del cliente "notifications", para que otro despachador no tome
+# un lote que sigue en vuelo
+OUTBOX_LEASE = getattr(settings, "OUTBOX_LEASE", 120)
+OUTBOX_AUTOSTART = getattr(settings, "OUTBOX_AUTOSTART", True)
+
+
+def outbox_model():
+    return apps.get_model(OUTBOX_MODEL)
+
+
+def enqueue_email(subject, body, destinations):
+    """Guarda el correo en el outbox; el envío real lo hace el despachador en segundo plano."""
+    destinations = [email for email in destinations if email]
+    if not destinations:
+        return None
+    message = outbox_model().objects.create(
+        subject=subject, body=body, destinations=destinations)
+    transaction.on_commit(wake_dispatcher)
+    return message
+
+
+def _claim(batch_size):
+    # Reserva cada fila moviendo su próximo intento hacia adelante; si otro despachador
+    # ya la tomó, el update condicional no afecta filas y se descarta.
+    Outbox = outbox_model()
+    now = timezone.now()
+    candidates = Outbox.objects.filter(
+        status=OutboxStatus.PENDING, next_attempt_at__lte=now,
+    ).order_by("id")[:batch_size]
+    claimed = []
+    for message in candidates:
+        updated = Outbox.objects.filter(
+            pk=message.pk, status=OutboxStatus.PENDING, next_attempt_at=message.next_attempt_at,
+        ).update(next_attempt_at=now + timedelta(seconds=OUTBOX_LEASE))
+        if updated:
+            claimed.append(message)
+    return claimed
+
+
+def _retry(message, error):
+    message.attempts += 1
+    message.last_error = str(error)[:1000]
+    if message.attempts >= OUTBOX_MAX_ATTEMPTS:
+        message.status = OutboxStatus.FAILED
+    else:
+        message.next_attempt_at = timezone.now() + timedelta(
+            seconds=OUTBOX_RETRY_BACKOFF * 2 ** (message.attempts - 1))
+    message.save(update_fields=["attempts", "last_error", "status", "next_attempt_at", "updated_at"])
+
+
+def dispatch_pending(batch_size=OUTBOX_BATCH_SIZE):
+    """
+    Envía un lote de correos pendientes en una sola petición. Devuelve cuántos se procesaron.
+    Solo se reintentan los que el notifications-service no confirmó; cada correo lleva su
+    `key`, así que si la respuesta se pierde (timeout) el reintento no duplica los ya entregados.
+    """
+    messages = _claim(batch_size)
+    if not messages:
+        return 0
+    payload = {"messages": [
+        {"id": message.pk, "key": message.delivery_key, "subject": message.subject,
+         "body": message.body, "destinations": message.destinations}
+        for message in messages
+    ]}
+    try:
+        response = get_client("notifications").post(
+            f'{NOTIFICATIONS_SERVICE_URL}email/bulk/', json=payload,
+            headers={'X-Notification-Gateway-Token': settings.NOTIFICATION_TOKEN})
+        response.raise_for_status()
+        results = {item["id"]: item for item in response.json().get("results", [])}
+    except (httpx.HTTPError, ValueError) as e:
+        print(f"No se pudo contactar el servicio de notificaciones: {e}")
+        for message in messages:
+            _retry(message, e)
+        return len(messages)
+
+    for message in messages:
+        result = results.get(message.pk, {"sent": False, "error": "Sin respuesta"})
+        if result.get("sent"):
+            message.status = OutboxStatus.SENT
+            message.attempts += 1
+            message.save(update_fields=["status", "attempts", "updated_at"])
+        else:
+            _retry(message, result.get("error"))
+    return len(messages)
+
+
+class OutboxDispatcher(threading.Thread):
+    # Hilo del proceso que vacía el outbox en lotes; se despierta al encolar o cada OUTBOX_POLL_INTERVAL.
+    def __init__(self):
+        super().__init__(name="notification-outbox", daemon=True)
+        self.wakeup = threading.Event()
+
+    def run(self):
+        while True:
+            self.wakeup.wait(OUTBOX_POLL_INTERVAL)
+            self.wakeup.clear()
+            try:
+                while dispatch_pending():
+                    pass
+            except Exception as e:
+                print(f"Error al despachar el outbox de notificaciones: {e}")
+            finally:
+                close_old_connections()
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def wake_dispatcher():
+    global _dispatcher
+    if not OUTBOX_AUTOSTART:
+        return
+    with _dispatcher_lock:
+        if _dispatcher is None or not _dispatcher.is_alive():
+            _dispatcher = OutboxDispatcher()
+            _dispatcher.start()
+    _dispatcher.wakeup.set()
+
+
+def start_dispatcher():
+    # Desde AppConfig.ready(): al reiniciar el proceso se envían los pendientes que quedaron en
+    # la tabla sin esperar a que se encole un correo nuevo.
+    wake_dispatcher()
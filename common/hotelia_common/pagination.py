@@ -0,0 +1,33 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+MAX_PAGE_SIZE = getattr(settings, "MAX_PAGE_SIZE", 100)
+
+
+class KeysetPagination(CursorPagination):
+    # Paginación por cursor (keyset): cada página es un "WHERE id < cursor ORDER BY id DESC LIMIT n"
+    # sobre un índice, así el costo depende del tamaño de la página y no de la tabla.
+    ordering = "-id"
+    page_size_query_param = "page_size"
+    max_page_size = MAX_PAGE_SIZE
+
+
+class SparseFieldsMixin:
+    """
+    Permite pedir solo algunos campos con ?fields=id,name en las lecturas (GET).
+    Los campos desconocidos se ignoran; si ninguno coincide se devuelve el serializer completo.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if request is None or request.method not in ("GET", "HEAD"):
+            return
+        fields = request.query_params.get("fields")
+        if not fields:
+            return
+        requested = {name.strip() for name in fields.split(",")} & set(self.fields)
+        if not requested:
+            return
+        for name in set(self.fields) - requested:
+            self.fields.pop(name)
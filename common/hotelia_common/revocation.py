@@ -0,0 +1,93 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .cache import TTLCache
+
+# Las marcas tienen que verlas todos los workers del servicio, por eso van en un alias de caché
+# compartido (CACHES["revocations"], una tabla en la base o Redis) y no en memoria del proceso.
+REVOCATION_CACHE = getattr(settings, "AUTH_REVOCATION_CACHE",
+                           "revocations" if "revocations" in settings.CACHES else "default")
+# Debe cubrir la vida de un access token (ACCESS_TOKEN_LIFETIME del auth-service)
+REVOCATION_TTL = getattr(settings, "AUTH_REVOCATION_TTL", 60 * 60 * 24)
+# Copia local de las marcas leídas: ahorra la lectura a la caché compartida (una consulta si es
+# DatabaseCache) en cada petición del mismo usuario. Una revocación hecha en otro worker se ve
+# como mucho a los AUTH_REVOCATION_LOCAL_TTL segundos; con 0 se lee siempre la compartida.
+REVOCATION_LOCAL_TTL = getattr(settings, "AUTH_REVOCATION_LOCAL_TTL", 2.0)
+REVOCATION_LOCAL_SIZE = getattr(settings, "AUTH_REVOCATION_LOCAL_SIZE", 10000)
+
+USER_REVOCATION_KEY = "auth:revoked:user:{}"
+SESSION_REVOCATION_KEY = "auth:revoked:session:{}"
+_NO_MARKER = object()
+
+local_markers = TTLCache(maxsize=REVOCATION_LOCAL_SIZE, ttl=REVOCATION_LOCAL_TTL)
+
+
+def revocation_cache():
+    return caches[REVOCATION_CACHE]
+
+
+def revoke_session(session_id):
+    # Logout: solo caen los token de esa sesión (claim "sid"), las demás siguen válidas
+    key = SESSION_REVOCATION_KEY.format(session_id)
+    revocation_cache().set(key, True, timeout=REVOCATION_TTL)
+    local_markers.set(key, True)
+
+
+def revoke_user_tokens(user_id, issued_before=None):
+    # Invalida todos los token del usuario emitidos antes de `issued_before`.
+    issued_before = int(issued_before or time.time())
+    key = USER_REVOCATION_KEY.format(user_id)
+    revocation_cache().set(key, issued_before, timeout=REVOCATION_TTL)
+    local_markers.set(key, issued_before)
+
+
+def _marker_keys(user_id, session_id):
+    user_key = USER_REVOCATION_KEY.format(user_id)
+    return [user_key, SESSION_REVOCATION_KEY.format(session_id)] if session_id else [user_key]
+
+
+def _cached_markers(keys):
+    markers, missing = {}, []
+    for key in keys:
+        value = local_markers.get(key)
+        if value is None:
+            missing.append(key)
+        elif value is not _NO_MARKER:
+            markers[key] = value
+    return markers, missing
+
+
+def _remember(markers, fetched, missing):
+    for key in missing:
+        value = fetched.get(key)
+        local_markers.set(key, _NO_MARKER if value is None else value)
+        if value is not None:
+            markers[key] = value
+    return markers
+
+
+def _revoked(markers, keys, issued_at):
+    if len(keys) > 1 and markers.get(keys[1]):
+        return True
+    revoked_before = markers.get(keys[0])
+    # Comparación estricta: un login hecho en el mismo segundo de la revocación sigue valiendo
+    return revoked_before is not None and (issued_at or 0) < revoked_before
+
+
+def is_revoked(user_id, session_id=None, issued_at=None):
+    # Como mucho una lectura a la caché compartida por petición, y ninguna si las marcas están en local_markers
+    keys = _marker_keys(user_id, session_id)
+    markers, missing = _cached_markers(keys)
+    if missing:
+        markers = _remember(markers, revocation_cache().get_many(missing), missing)
+    return _revoked(markers, keys, issued_at)
+
+
+async def ais_revoked(user_id, session_id=None, issued_at=None):
+    keys = _marker_keys(user_id, session_id)
+    markers, missing = _cached_markers(keys)
+    if missing:
+        markers = _remember(markers, await revocation_cache().aget_many(missing), missing)
+    return _revoked(markers, keys, issued_at)
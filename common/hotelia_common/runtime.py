@@ -0,0 +1,19 @@
+import os
+import sys
+
+# Ejecutables que corren comandos de Django (manage.py, django-admin, python -m django)
+_MANAGEMENT_ENTRYPOINTS = {"manage.py", "django-admin", "django-admin.py", "__main__.py"}
+
+
+def serves_requests():
+    """
+    True si el proceso atiende peticiones (uvicorn, gunicorn, runserver). Los hilos de fondo que
+    arrancan en `AppConfig.ready()` se saltan los comandos de manage.py (migrate, test, shell...)
+    y el proceso vigilante del autoreload de runserver.
+    """
+    if not sys.argv or os.path.basename(sys.argv[0]) not in _MANAGEMENT_ENTRYPOINTS:
+        return True
+    if len(sys.argv) < 2 or sys.argv[1] != "runserver":
+        return False
+    # Con autoreload solo el proceso hijo (RUN_MAIN=true) atiende peticiones
+    return os.environ.get("RUN_MAIN") == "true" or "--noreload" in sys.argv
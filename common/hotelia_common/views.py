@@ -0,0 +1,45 @@
+from django.conf import settings
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .clients import pool_stats
+from .revocation import revoke_session, revoke_user_tokens
+
+
+class TokenRevocationView(APIView):
+    # Aviso del auth-service tras un logout: con "session" se revoca esa sesión; sin ella,
+    # todos los token del usuario emitidos antes de "issued_before".
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+    schema = None  # endpoint interno entre servicios, fuera de la documentación
+
+    def post(self, request):
+        token = getattr(settings, "AUTH_SERVICE_TOKEN", None)
+        if not token or request.headers.get('X-Auth-Service-Token') != token:
+            return Response({'error': 'No tienes permiso para realizar dicha accion'}, status=status.HTTP_401_UNAUTHORIZED)
+        session_id = request.data.get("session")
+        user_id = request.data.get("user_id")
+        if session_id:
+            revoke_session(session_id)
+        elif user_id is not None:
+            revoke_user_tokens(user_id, request.data.get("issued_before"))
+        else:
+            return Response({"error": "La id del usuario es requerida"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+def metrics_denied(request):
+    token = getattr(settings, "METRICS_TOKEN", None)
+    if not token or request.headers.get('X-Metrics-Token') != token:
+        return Response({'error': 'No tienes permiso para realizar dicha accion'}, status=status.HTTP_401_UNAUTHORIZED)
+    return None
+
+
+class HttpClientMetricsView(APIView):
+    # Uso de los pools HTTP hacia otros servicios: peticiones, errores, latencia y conexiones abiertas.
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        return metrics_denied(request) or Response(pool_stats(), status=status.HTTP_200_OK)
@@ -0,0 +1,90 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+CATALOG_CACHE_TTL = getattr(settings, "CATALOG_CACHE_TTL", 60 * 60)
+# Las respuestas pueden quedar en la memoria de cada worker porque su clave lleva la versión; la
+# versión tiene que ser la misma para todos, así que va en una caché compartida (CACHES["catalog"])
+CATALOG_CACHE = getattr(settings, "CATALOG_CACHE", "default")
+CATALOG_VERSION_CACHE = getattr(settings, "CATALOG_VERSION_CACHE",
+                                "catalog" if "catalog" in settings.CACHES else "default")
+CATALOG_VERSION_KEY = "hotels:catalog:version"
+
+
+def catalog_version():
+    versions = caches[CATALOG_VERSION_CACHE]
+    version = versions.get(CATALOG_VERSION_KEY)
+    if version is None:
+        versions.add(CATALOG_VERSION_KEY, 1, timeout=None)
+        version = versions.get(CATALOG_VERSION_KEY, 1)
+    return version
+
+
+def bump_catalog_version(**kwargs):
+    # Cambiar la versión deja huérfanas todas las entradas anteriores, en todos los workers;
+    # expiran solas por TTL
+    versions = caches[CATALOG_VERSION_CACHE]
+    try:
+        versions.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        versions.set(CATALOG_VERSION_KEY, 2, timeout=None)
+
+
+def compute_etag(data):
+    return '"{}"'.format(hashlib.sha1(JSONRenderer().render(data)).hexdigest())
+
+
+def etag_matches(request, etag):
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Se aceptan ETag débiles (W/"...") porque el contenido se compara por hash
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return etag in candidates
+
+
+class CatalogCacheMixin:
+    """
+    Cachea list y retrieve del catálogo con una clave que incluye la versión del catálogo,
+    y responde 304 cuando el cliente ya tiene el mismo contenido (If-None-Match).
+    La versión se incrementa en hotels/signals.py al crear, editar o borrar Hotel, Room o Review.
+    """
+    catalog_cache_prefix = None
+
+    def _catalog_cache_key(self, request):
+        # El host forma parte de la clave porque las imágenes se serializan con URL absoluta
+        raw = f"{request.get_host()}{request.get_full_path()}"
+        digest = hashlib.sha1(raw.encode()).hexdigest()
+        return f"hotels:catalog:{catalog_version()}:{self.catalog_cache_prefix}:{digest}"
+
+    def _cached_response(self, request, render):
+        key = self._catalog_cache_key(request)
+        cache = caches[CATALOG_CACHE]
+        cached = cache.get(key)
+        if cached is None:
+            response = render()
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            cached = (compute_etag(response.data), response.data)
+            cache.set(key, cached, timeout=CATALOG_CACHE_TTL)
+
+        etag, data = cached
+        if etag_matches(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(data, status=status.HTTP_200_OK)
+        response["ETag"] = etag
+        response["Cache-Control"] = "no-cache"
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(request, lambda: super(CatalogCacheMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(request, lambda: super(CatalogCacheMixin, self).retrieve(request, *args, **kwargs))
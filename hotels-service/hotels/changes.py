@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import CatalogChange
+
+# Días que se guarda el feed de cambios (api/changes/). Un consumidor con un cursor más viejo que
+# eso pierde los cambios borrados y tiene que volver a leer el catálogo completo.
+CATALOG_CHANGE_RETENTION_DAYS = getattr(settings, "CATALOG_CHANGE_RETENTION_DAYS", 30)
+CATALOG_CHANGE_PURGE_BATCH = 5000
+
+
+def purge_catalog_changes(days=CATALOG_CHANGE_RETENTION_DAYS):
+    # Los id crecen con updated_at, así que basta con el último id viejo como corte. Se borra por
+    # lotes para no bloquear la tabla y nunca el último cambio: su id es el cursor más reciente.
+    cutoff = timezone.now() - timedelta(days=days)
+    last_id = (CatalogChange.objects.filter(updated_at__lt=cutoff)
+               .order_by("-id").values_list("id", flat=True).first())
+    if last_id is None:
+        return 0
+    last_id = min(last_id, CatalogChange.objects.order_by("-id").values_list("id", flat=True).first() - 1)
+    deleted = 0
+    while True:
+        ids = list(CatalogChange.objects.filter(id__lte=last_id)
+                   .order_by("id").values_list("id", flat=True)[:CATALOG_CHANGE_PURGE_BATCH])
+        if not ids:
+            return deleted
+        deleted += CatalogChange.objects.filter(id__in=ids).delete()[0]
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from hotels.changes import CATALOG_CHANGE_RETENTION_DAYS, purge_catalog_changes
+
+
+class Command(BaseCommand):
+    help = (
+        "Borra del feed de cambios del catálogo (api/changes/) los registros más viejos que la "
+        "retención. Pensado para correr periódicamente (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=CATALOG_CHANGE_RETENTION_DAYS,
+                            help="Días de cambios que se conservan.")
+
+    def handle(self, *args, **options):
+        deleted = purge_catalog_changes(options["days"])
+        self.stdout.write(f"Cambios del catálogo borrados: {deleted}")
@@ -0,0 +1,14 @@
+# Generated by Django 5.2.8 on 2026-10-18 10:42
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotels', '0003_alter_hotel_name'),
+        ('hotels', '0004_alter_room_room_type_alter_room_status'),
+    ]
+
+    operations = [
+    ]
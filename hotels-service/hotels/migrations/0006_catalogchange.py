@@ -0,0 +1,40 @@
+# Generated by Django 5.2.8 on 2026-10-18 10:42
+
+from django.db import migrations, models
+
+
+def backfill_changes(apps, schema_editor):
+    # El catálogo existente entra al feed como "created", así un consumidor nuevo parte de cero
+    Hotel = apps.get_model('hotels', 'Hotel')
+    Room = apps.get_model('hotels', 'Room')
+    CatalogChange = apps.get_model('hotels', 'CatalogChange')
+    changes = [CatalogChange(kind='hotel', object_id=pk, action='created')
+               for pk in Hotel.objects.order_by('id').values_list('id', flat=True)]
+    changes += [CatalogChange(kind='room', object_id=pk, action='created')
+                for pk in Room.objects.order_by('id').values_list('id', flat=True)]
+    CatalogChange.objects.bulk_create(changes, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotels', '0005_merge_20261018_0642'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=20)),
+                ('object_id', models.IntegerField()),
+                ('action', models.CharField(choices=[('created', 'Creado'), ('updated', 'Actualizado'), ('deleted', 'Eliminado')], max_length=20)),
+                ('updated_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Cambio del catálogo',
+                'verbose_name_plural': 'Cambios del catálogo',
+            },
+        ),
+        migrations.RunPython(backfill_changes, migrations.RunPython.noop),
+    ]
@@ -90,3 +90,26 @@ class Room(BaseModel):
 
     def __str__(self):
         return f"{self.hotel.name} - Hab. {self.room_number}"
+
+
+class ChangeAction(models.TextChoices):
+    CREATED = "created", "Creado"
+    UPDATED = "updated", "Actualizado"
+    DELETED = "deleted", "Eliminado"
+
+
+class CatalogChange(models.Model):
+    # Registro append-only de cambios del catálogo; el id autoincremental sirve de cursor
+    # para los consumidores (p. ej. el reindexado del chat-service). Ver hotels/signals.py.
+    # `manage.py purge_catalog_changes` borra lo más viejo que CATALOG_CHANGE_RETENTION_DAYS.
+    kind = models.CharField(max_length=20)
+    object_id = models.IntegerField()
+    action = models.CharField(max_length=20, choices=ChangeAction.choices)
+    updated_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = "Cambios del catálogo"
+        verbose_name = "Cambio del catálogo"
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id} {self.action}"
@@ -8,12 +8,13 @@ from PIL import Image
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
 # Models
-from .models import Hotel, Review, Room
+from .models import Hotel, Review, Room, RoomType
+from hotelia_common.pagination import SparseFieldsMixin
 
 # User = get_user_model()
 
 
-class HotelSerializer(serializers.ModelSerializer):
+class HotelSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     # total_rooms = serializers.ReadOnlyField()
 
     # def get_total_rooms(self, obj):
@@ -56,7 +57,7 @@ class HotelSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         Hotel.objects.create(**validated_data)
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Review
         fields = "__all__"
@@ -64,7 +65,7 @@ class ReviewSerializer(serializers.ModelSerializer):
             "user_id": {"read_only": True},
         }
 
-class RoomSerializer(serializers.ModelSerializer):
+class RoomSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     hotel_name = serializers.ReadOnlyField(source='hotel.name')
     class Meta:
         model = Room
@@ -77,3 +78,29 @@ class RoomSerializer(serializers.ModelSerializer):
                 message="Esta habitación ya existe en el hotel seleccionado. Por favor, elige un número diferente."
             )
         ]
+
+
+class AvailabilitySearchSerializer(serializers.Serializer):
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    city = serializers.CharField(required=False)
+    capacity = serializers.IntegerField(required=False, min_value=1)
+    room_type = serializers.ChoiceField(choices=RoomType.choices, required=False)
+    max_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    cursor = serializers.IntegerField(required=False, min_value=0)
+    page_size = serializers.IntegerField(required=False, default=20, min_value=1, max_value=100)
+
+    def validate(self, data):
+        days = (data["end_date"] - data["start_date"]).days
+        if days <= 0:
+            raise serializers.ValidationError(
+                "La fecha de salida debe ser posterior a la fecha entrada")
+        if days > 366:
+            raise serializers.ValidationError(
+                "El rango de fechas no puede superar un año")
+        return data
+
+
+class ChangeFeedSerializer(serializers.Serializer):
+    since = serializers.IntegerField(required=False, default=0, min_value=0)
+    limit = serializers.IntegerField(required=False, default=200, min_value=1, max_value=1000)
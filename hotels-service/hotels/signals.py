@@ -0,0 +1,23 @@
+from django.db.models.signals import post_delete, post_save
+
+from .catalog_cache import bump_catalog_version
+from .models import CatalogChange, ChangeAction, Hotel, Review, Room
+
+# Cualquier escritura del catálogo invalida las respuestas cacheadas de list/retrieve
+for model in (Hotel, Room, Review):
+    post_save.connect(bump_catalog_version, sender=model, dispatch_uid=f"catalog_save_{model.__name__}")
+    post_delete.connect(bump_catalog_version, sender=model, dispatch_uid=f"catalog_delete_{model.__name__}")
+
+
+def record_change(sender, instance, created=None, **kwargs):
+    if created is None:
+        action = ChangeAction.DELETED
+    else:
+        action = ChangeAction.CREATED if created else ChangeAction.UPDATED
+    CatalogChange.objects.create(kind=sender.__name__.lower(), object_id=instance.pk, action=action)
+
+
+# Hoteles y habitaciones alimentan el feed de cambios (api/changes/)
+for model in (Hotel, Room):
+    post_save.connect(record_change, sender=model, dispatch_uid=f"change_feed_save_{model.__name__}")
+    post_delete.connect(record_change, sender=model, dispatch_uid=f"change_feed_delete_{model.__name__}")
@@ -1,3 +1,153 @@
-from django.test import TestCase
+import json
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import httpx
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from . import views
+from .catalog_cache import CATALOG_VERSION_KEY
+from .models import CatalogChange, Hotel, Room
+
+
+def hotel(name="Hotel Central", city="Caracas"):
+    return Hotel.objects.create(name=name, city=city, address="Av. Principal", phone="0212",
+                                payment_policy="-", reservation_policy="-")
+
+
+def room(hotel, number, price=50, capacity=2):
+    return Room.objects.create(hotel=hotel, room_number=number, room_type="double",
+                               capacity=capacity, price_per_night=price)
+
+
+class CatalogCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.hotel = hotel()
+
+    def test_answers_conditional_gets_with_304(self):
+        first = self.client.get("/api/hotels/")
+        self.assertEqual(first.status_code, 200)
+        etag = first["ETag"]
+
+        # Solo se lee la versión compartida; el cuerpo sale de la memoria del worker
+        with self.assertNumQueries(1):
+            cached = self.client.get("/api/hotels/", headers={"If-None-Match": etag})
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached["ETag"], etag)
+
+    def test_writes_invalidate_the_cached_pages(self):
+        first = self.client.get("/api/hotels/")
+        hotel("Hotel Playa", city="Margarita")
+
+        second = self.client.get("/api/hotels/", headers={"If-None-Match": first["ETag"]})
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second["ETag"], first["ETag"])
+        self.assertEqual(len(second.json()["results"]), 2)
+
+    def test_the_version_is_shared_by_every_worker(self):
+        self.client.get("/api/hotels/")
+        before = caches["catalog"].get(CATALOG_VERSION_KEY)
+        hotel("Hotel Playa", city="Margarita")
+        # Vive en la caché compartida y no en la memoria del worker que atendió la escritura
+        self.assertGreater(caches["catalog"].get(CATALOG_VERSION_KEY), before)
+        self.assertIsNone(cache.get(CATALOG_VERSION_KEY))
+
+    def test_rooms_page_through_keyset_cursors(self):
+        ids = [room(self.hotel, number).pk for number in range(1, 6)]
+        seen, url = [], "/api/rooms/?page_size=2"
+        while url:
+            page = self.client.get(url).json()
+            seen += [item["id"] for item in page["results"]]
+            url = page["next"] and page["next"].replace("http://testserver", "")
+        self.assertEqual(seen, sorted(ids, reverse=True))
+
+
+class ChangeFeedTests(TestCase):
+    def test_returns_changes_after_the_cursor(self):
+        central = hotel()
+        suite = room(central, 1)
+        central.name = "Hotel Central II"
+        central.save()
+        suite.delete()
+
+        page = self.client.get("/api/changes/?limit=2").json()
+        self.assertTrue(page["has_more"])
+        self.assertEqual([(c["kind"], c["action"]) for c in page["results"]],
+                         [("hotel", "created"), ("room", "created")])
+        self.assertEqual(page["results"][0]["object"]["name"], "Hotel Central II")
+        self.assertIsNone(page["results"][1]["object"])
+
+        page = self.client.get(f"/api/changes/?since={page['cursor']}").json()
+        self.assertFalse(page["has_more"])
+        self.assertEqual([c["action"] for c in page["results"]], ["updated", "deleted"])
+        self.assertEqual(page["cursor"], CatalogChange.objects.latest("id").id)
+
+    def test_purge_keeps_recent_changes_and_the_latest_cursor(self):
+        central = hotel()
+        room(central, 1)
+        central.delete()
+        old = list(CatalogChange.objects.order_by("id").values_list("id", flat=True))
+        CatalogChange.objects.update(updated_at=timezone.now() - timedelta(days=40))
+        recent = room(hotel("Hotel Norte"), 2)
+
+        call_command("purge_catalog_changes", days=30, stdout=mock.Mock())
+        self.assertFalse(CatalogChange.objects.filter(id__in=old).exists())
+        self.assertEqual([c["object_id"] for c in self.client.get("/api/changes/").json()["results"]][-1], recent.id)
+
+        # Sin cambios nuevos se conserva el último, que es el cursor de los consumidores
+        CatalogChange.objects.update(updated_at=timezone.now() - timedelta(days=40))
+        call_command("purge_catalog_changes", days=30, stdout=mock.Mock())
+        self.assertEqual(CatalogChange.objects.get().object_id, recent.id)
+
+
+@override_settings(RESERVATION_TOKEN="reservations-test-token")
+class AvailabilitySearchTests(TestCase):
+    def setUp(self):
+        central = hotel()
+        self.rooms = [room(central, number) for number in range(1, 6)]
+        self.busy = set()
+        self.calls = []
+        patcher = mock.patch.object(views, "get_client", lambda name: httpx.Client(
+            transport=httpx.MockTransport(self.handle)))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def handle(self, request):
+        body = json.loads(request.content)
+        self.calls.append((request.headers["X-Reservation-Gateway-Token"], body["room_ids"]))
+        return httpx.Response(200, json={"occupancy": {
+            str(room_id): "11" if room_id in self.busy else "00" for room_id in body["room_ids"]}})
+
+    def search(self, **params):
+        params = {"start_date": "2026-03-10", "end_date": "2026-03-12", **params}
+        return self.client.get("/api/availability/search/", params).json()
+
+    def test_skips_occupied_rooms_and_checks_each_batch_once(self):
+        self.busy = {self.rooms[0].pk, self.rooms[2].pk}
+        page = self.search(page_size=2)
+
+        self.assertEqual([r["id"] for r in page["results"]], [self.rooms[1].pk, self.rooms[3].pk])
+        self.assertEqual(page["next"], self.rooms[3].pk)
+        self.assertEqual(self.calls, [("reservations-test-token", [r.pk for r in self.rooms[:4]])])
+
+    def test_last_page_has_no_cursor_even_when_it_fills_a_whole_batch(self):
+        # 5 habitaciones, lotes de 4: la segunda vuelta trae justo la última
+        first = self.search(page_size=2)
+        second = self.search(page_size=2, cursor=first["next"])
+        third = self.search(page_size=2, cursor=second["next"])
+
+        self.assertEqual([r["id"] for r in third["results"]], [self.rooms[4].pk])
+        self.assertIsNone(third["next"])
+
+    def test_a_batch_that_ends_the_catalog_needs_no_extra_query(self):
+        # Quedan justo 4 habitaciones (un lote) y solo una libre: no hay que pedir otro lote vacío
+        self.busy = {r.pk for r in self.rooms[1:4]}
+        with self.assertNumQueries(1):
+            page = self.search(page_size=2, cursor=self.rooms[0].pk)
+
+        self.assertEqual([r["id"] for r in page["results"]], [self.rooms[4].pk])
+        self.assertIsNone(page["next"])
@@ -3,11 +3,14 @@ from django.db.models import Q
 from rest_framework import viewsets, permissions, status
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FileUploadParser
+from rest_framework.views import APIView
 from .authentication import UserAuthentication
+from .catalog_cache import CatalogCacheMixin
+from hotelia_common.clients import get_client
 from rest_framework.decorators import action
-from .models import Hotel, Review, Room
+from .models import CatalogChange, ChangeAction, Hotel, Review, Room, RoomStatus
 from django.conf import settings
-from .serializers import HotelSerializer, ReviewSerializer, RoomSerializer
+from .serializers import AvailabilitySearchSerializer, ChangeFeedSerializer, HotelSerializer, ReviewSerializer, RoomSerializer
 # Create your views here.
 RESERVATIONS_SERVICE_URL = settings.RESERVATIONS_SERVICE_URL
 
@@ -17,7 +20,27 @@ def getHeaders(request):
         'Authorization')}
 
 
-class HotelViewSet(viewsets.ModelViewSet):
+def get_popular_rooms(request, path):
+    """
+    Pide al reservations-service el top k de habitaciones (ya precalculado allí) y lo une con
+    las habitaciones y sus hoteles en una sola consulta. Devuelve ([(room, count)], status) o
+    (None, Response) si el servicio rechazó la petición.
+    """
+    headers = {"X-Reservation-Gateway-Token": settings.RESERVATION_TOKEN}
+    if request.headers.get('Authorization') is not None:
+        headers['Authorization'] = request.headers.get('Authorization')
+    response = get_client("reservations").get(
+        f'{RESERVATIONS_SERVICE_URL}{path}', headers=headers, params=request.query_params)
+    data = response.json()
+    if isinstance(data, dict):
+        return None, Response(data.get("detail"), status=status.HTTP_401_UNAUTHORIZED)
+    counts = {item["room_id"]: item["count"] for item in data if "room_id" in item}
+    rooms = Room.objects.filter(id__in=counts).select_related('hotel')
+    return [(room, counts[room.id]) for room in rooms], response.status_code
+
+
+class HotelViewSet(CatalogCacheMixin, viewsets.ModelViewSet):
+    catalog_cache_prefix = "hotels"
     queryset = Hotel.objects.all()
     serializer_class = HotelSerializer
     # authentication_classes = [UserAuthentication]
@@ -45,58 +68,17 @@ class HotelViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=["GET"])
     def top(self, request):
-        headers = {}
-        if request.headers.get('Authorization') is not None:
-            headers['Authorization'] = request.headers.get('Authorization')
-        headers["X-Reservation-Gateway-Token"] = settings.RESERVATION_TOKEN
-        url = f'{RESERVATIONS_SERVICE_URL}reservations/top_hotels/'
         try:
-            response = httpx.get(
-                url, timeout=15, headers=headers, params=request.query_params)
-            data = response.json()
-            print(data)
-            if isinstance(data, dict):
-                return Response(data.get("detail"), status=status.HTTP_401_UNAUTHORIZED)
-            room_ids = []
-
-            for item in data:
-                if 'room_id' in item:
-                    for i in range(item['count']):
-                        room_ids.append(item['room_id'])
-
-            if not room_ids:
-                return Response([], status=status.HTTP_200_OK)
-            room_id_counts = {}
-            for room_id in room_ids:
-                room_id_counts[room_id] = room_id_counts.get(room_id, 0) + 1
-            unique_room_ids = list(room_id_counts.keys())
-            rooms = Room.objects.filter(
-                id__in=unique_room_ids).select_related('hotel')
-
+            popular, result = get_popular_rooms(request, "reservations/top_hotels/")
+            if popular is None:
+                return result
             hotel_counts = {}
-            for room in rooms:
-                
-                count = room_id_counts.get(room.id, 0)
-
-                
-                hotel_id = room.hotel.id
-                hotel_counts[hotel_id] = hotel_counts.get(
-                    hotel_id, {'hotel': room.hotel, 'count': 0})
-                hotel_counts[hotel_id]['count'] += count
-
-            
-            top_hotels_list = []
-            for data in hotel_counts.values():
-                hotel = data['hotel']
-                top_hotels_list.append({
-                    "id": hotel.id,
-                    "name": hotel.name,
-                    "count": data['count']
-                })
-
-            
-            top_hotels_list.sort(key=lambda x: x['count'], reverse=True)
-            return Response(top_hotels_list, status=response.status_code)
+            for room, count in popular:
+                entry = hotel_counts.setdefault(
+                    room.hotel_id, {"id": room.hotel_id, "name": room.hotel.name, "count": 0})
+                entry["count"] += count
+            top_hotels_list = sorted(hotel_counts.values(), key=lambda x: x['count'], reverse=True)
+            return Response(top_hotels_list, status=result)
         except httpx.RequestError as e:
             return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
 
@@ -120,7 +102,8 @@ class ReviewViewSet(viewsets.ModelViewSet):
         serializer.save(user_id=user_id)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-class RoomViewSet(viewsets.ModelViewSet):
+class RoomViewSet(CatalogCacheMixin, viewsets.ModelViewSet):
+    catalog_cache_prefix = "rooms"
     queryset = Room.objects.all()
     serializer_class = RoomSerializer
     # permission_classes = [permissions.IsAuthenticated]
@@ -142,30 +125,131 @@ class RoomViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=["GET"])
     def top_rooms(self, request):
-        headers = {}
-        if request.headers.get('Authorization') is not None:
-            headers['Authorization'] = request.headers.get('Authorization')
-        headers["X-Reservation-Gateway-Token"] = settings.RESERVATION_TOKEN
-        url = f'{RESERVATIONS_SERVICE_URL}reservations/top/'
         try:
-            response = httpx.get(
-                url, timeout=15, headers=headers, params=request.query_params if request.query_params else {})
-            top_rooms = response.json()
-            if isinstance(top_rooms, dict) and top_rooms.get("detail"):
-                return Response(top_rooms.get("detail"), status=status.HTTP_401_UNAUTHORIZED)
-            room_ids = [room["room_id"] for room in top_rooms]
-            room_id_counts = {room["room_id"]: room["count"] for room in top_rooms}
-            rooms = Room.objects.filter(id__in=room_ids)
-            top_rooms = []
-            for room in rooms:
-                top_rooms.append({
-                    "id": room.id,
-                    "hotel": room.hotel.name,
-                    "room_number": room.room_number,
-                    "count": room_id_counts.get(room.id, 0)
-                })
+            popular, result = get_popular_rooms(request, "reservations/top/")
+            if popular is None:
+                return result
+            top_rooms = [{
+                "id": room.id,
+                "hotel": room.hotel.name,
+                "room_number": room.room_number,
+                "count": count
+            } for room, count in popular]
             top_rooms.sort(key=lambda x: x['count'], reverse=True)
-            return Response(top_rooms, status=response.status_code)
+            return Response(top_rooms, status=result)
         except httpx.RequestError as e:
             return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
-        
\ No newline at end of file
+
+
+class AvailabilityViewSet(viewsets.ViewSet):
+    # Búsqueda de habitaciones libres: filtra el catálogo aquí y consulta la ocupación
+    # de todo el lote al reservations-service en una sola petición.
+    permission_classes = [permissions.AllowAny]
+
+    @action(detail=False, methods=["GET"])
+    def search(self, request):
+        params = AvailabilitySearchSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        filters = params.validated_data
+        page_size = filters["page_size"]
+
+        rooms = Room.objects.filter(status=RoomStatus.AVAILABLE).select_related('hotel').order_by('id')
+        if filters.get("city"):
+            rooms = rooms.filter(hotel__city__icontains=filters["city"])
+        if filters.get("capacity"):
+            rooms = rooms.filter(capacity__gte=filters["capacity"])
+        if filters.get("room_type"):
+            rooms = rooms.filter(room_type=filters["room_type"])
+        if filters.get("max_price") is not None:
+            rooms = rooms.filter(price_per_night__lte=filters["max_price"])
+
+        headers = {"X-Reservation-Gateway-Token": settings.RESERVATION_TOKEN}
+        # Se piden lotes mayores a la página porque parte de las habitaciones estarán ocupadas
+        batch_size = page_size * 2
+        results = []
+        last_id = filters.get("cursor") or 0
+        has_more = True
+        while len(results) < page_size and has_more:
+            # Una fila de más indica si quedan habitaciones después del lote
+            batch = list(rooms.filter(id__gt=last_id)[:batch_size + 1])
+            has_more = len(batch) > batch_size
+            batch = batch[:batch_size]
+            if not batch:
+                break
+            try:
+                response = get_client("reservations").post(f'{RESERVATIONS_SERVICE_URL}availability/', headers=headers, json={
+                    "room_ids": [room.id for room in batch],
+                    "start_date": str(filters["start_date"]),
+                    "end_date": str(filters["end_date"]),
+                })
+                response.raise_for_status()
+                occupancy = response.json()["occupancy"]
+            except httpx.RequestError as e:
+                return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+            except httpx.HTTPStatusError as exc:
+                return Response({"error": f"Error en la petición: {exc.response.status_code}"}, status=exc.response.status_code)
+
+            for room in batch:
+                if len(results) == page_size:
+                    has_more = True
+                    break
+                last_id = room.id
+                days = occupancy.get(str(room.id), "")
+                if "1" in days:
+                    continue
+                results.append({
+                    "id": room.id,
+                    "room_number": room.room_number,
+                    "room_type": room.room_type,
+                    "capacity": room.capacity,
+                    "price_per_night": room.price_per_night,
+                    "hotel": room.hotel_id,
+                    "hotel_name": room.hotel.name,
+                    "city": room.hotel.city,
+                    "occupancy": days,
+                })
+
+        return Response({
+            "next": last_id if has_more else None,
+            "results": results,
+        }, status=status.HTTP_200_OK)
+
+
+class ChangeFeedView(APIView):
+    # Cambios del catálogo posteriores al cursor `since`, con el objeto ya serializado para
+    # que el consumidor no tenga que pedirlo aparte. "object" es null si ya no existe.
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        params = ChangeFeedSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        since = params.validated_data["since"]
+        limit = params.validated_data["limit"]
+
+        changes = list(CatalogChange.objects.filter(id__gt=since).order_by("id")[:limit + 1])
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+
+        def live_ids(kind):
+            return {c.object_id for c in changes if c.kind == kind and c.action != ChangeAction.DELETED}
+
+        context = {"request": request}
+        hotels = Hotel.objects.filter(id__in=live_ids("hotel"))
+        rooms = Room.objects.filter(id__in=live_ids("room")).select_related("hotel")
+        objects = {
+            "hotel": {item["id"]: item for item in HotelSerializer(hotels, many=True, context=context).data},
+            "room": {item["id"]: item for item in RoomSerializer(rooms, many=True, context=context).data},
+        }
+        results = [{
+            "id": change.id,
+            "kind": change.kind,
+            "object_id": change.object_id,
+            "action": change.action,
+            "updated_at": change.updated_at,
+            "object": objects.get(change.kind, {}).get(change.object_id),
+        } for change in changes]
+        return Response({
+            "cursor": changes[-1].id if changes else since,
+            "has_more": has_more,
+            "results": results,
+        }, status=status.HTTP_200_OK)
@@ -7,9 +7,17 @@ load_dotenv()
 BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = os.getenv("SECRET_KEY")
 RESERVATION_TOKEN = os.getenv("RESERVATION_TOKEN")
+HOTELS_GATEWAY_TOKEN = os.getenv("HOTEL_SERVICE_TOKEN")
 RESERVATIONS_SERVICE_URL = os.getenv("RESERVATIONS_SERVICE_URL")
 AUTH_SERVICE_TOKEN = os.getenv("AUTH_SERVICE_TOKEN")
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
 AUTH_SERVICE_URL = os.getenv("USERS_SERVICE_URL")
+
+# Clientes HTTP hacia otros servicios (hotelia_common.clients); HTTP_CLIENTS sobrescribe cualquier clave
+HTTP_UPSTREAMS = {
+    "auth": {"timeout": 7.0},
+    "reservations": {"timeout": 15.0},
+}
 DEBUG = True if os.getenv("DEBUG", "False") == "True" else False
 
 ALLOWED_HOSTS = ["*"]
@@ -19,13 +27,18 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.staticfiles',
     'rest_framework',
+    'hotelia_common',
     'hotels',
 ]
 
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", 100))
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
          'hotels.authentication.UserAuthentication',
     ),
+    'DEFAULT_PAGINATION_CLASS': 'hotelia_common.pagination.KeysetPagination',
+    'PAGE_SIZE': int(os.getenv("PAGE_SIZE", 20)),
 }
 
 MIDDLEWARE = [
@@ -72,3 +85,33 @@ STATIC_URL = 'public/'
 MEDIA_URL = '/images/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'images')
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Caché de lecturas del catálogo (ver hotels/catalog_cache.py): las respuestas van en "default",
+# en memoria de cada worker, y la versión del catálogo en "catalog", compartida por todos (una
+# tabla en la base o Redis con CATALOG_CACHE_BACKEND) para que una escritura las invalide en todos.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", "hotels-catalog"),
+    },
+    "catalog": {
+        "BACKEND": os.getenv("CATALOG_CACHE_BACKEND", "django.core.cache.backends.db.DatabaseCache"),
+        "LOCATION": os.getenv("CATALOG_CACHE_LOCATION", "hotelia_catalog"),
+    },
+    # Marcas de revocación de token (hotelia_common.revocation). Las leen todos los workers, así que
+    # van en una caché compartida: por defecto una tabla en la base (la crea `migrate`) o Redis con
+    # REVOCATION_CACHE_BACKEND=django.core.cache.backends.redis.RedisCache. Con LocMemCache solo
+    # funciona con un worker: el aviso del auth-service llega a un único proceso.
+    "revocations": {
+        "BACKEND": os.getenv("REVOCATION_CACHE_BACKEND", "django.core.cache.backends.db.DatabaseCache"),
+        "LOCATION": os.getenv("REVOCATION_CACHE_LOCATION", "hotelia_revocations"),
+    },
+}
+
+# Cada worker guarda las marcas leídas hasta AUTH_REVOCATION_LOCAL_TTL segundos: ahorra la consulta
+# a CACHES["revocations"] en cada petición a costa de ver las revocaciones de otros workers con ese retraso
+AUTH_REVOCATION_LOCAL_TTL = float(os.getenv("AUTH_REVOCATION_LOCAL_TTL", 2.0))
+
+CATALOG_CACHE_TTL = int(os.getenv("CATALOG_CACHE_TTL", 60 * 60))
+# Días que guarda el feed de cambios; los borra `manage.py purge_catalog_changes`
+CATALOG_CHANGE_RETENTION_DAYS = int(os.getenv("CATALOG_CHANGE_RETENTION_DAYS", 30))
@@ -3,15 +3,20 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from hotels.views import HotelViewSet, RoomViewSet, ReviewViewSet
+from hotelia_common.views import HttpClientMetricsView, TokenRevocationView
+from hotels.views import AvailabilityViewSet, HotelViewSet, RoomViewSet, ReviewViewSet, ChangeFeedView
 
 router = DefaultRouter()
 router.register(r'hotels', HotelViewSet, basename="hotel")
 router.register(r"reviews",ReviewViewSet, basename="review")
 router.register(r'rooms', RoomViewSet, basename="room")
+router.register(r'availability', AvailabilityViewSet, basename="availability")
 
 urlpatterns = [
     #path('admin/', admin.site.urls),
+    path('api/changes/', ChangeFeedView.as_view(), name='catalog-changes'),
+    path('api/auth/revoke/', TokenRevocationView.as_view(), name='token-revoke'),
+    path('api/metrics/http/', HttpClientMetricsView.as_view(), name='http-client-metrics'),
     path('api/', include(router.urls)),
 ]
 urlpatterns += static(settings.STATIC_URL, 
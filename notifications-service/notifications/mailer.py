@@ -0,0 +1,84 @@
+import smtplib
+import socket
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+
+from .models import DeliveredEmail
+
+EMAIL_SEND_RETRIES = getattr(settings, "EMAIL_SEND_RETRIES", 3)
+EMAIL_SEND_BACKOFF = getattr(settings, "EMAIL_SEND_BACKOFF", 1.0)  # segundos, se duplica por intento
+# Cuánto se recuerda la clave de un correo entregado; debe cubrir los reintentos del outbox
+EMAIL_DEDUP_TTL = getattr(settings, "EMAIL_DEDUP_TTL", 60 * 60 * 24 * 7)
+
+# Errores por los que vale la pena reconectar y reintentar; el resto (destinatario inválido, etc.) no
+TRANSIENT_ERRORS = (
+    smtplib.SMTPServerDisconnected,
+    smtplib.SMTPConnectError,
+    smtplib.SMTPHeloError,
+    socket.timeout,
+    ConnectionError,
+)
+
+
+def _is_transient(error):
+    if isinstance(error, TRANSIENT_ERRORS):
+        return True
+    # Códigos 4xx de SMTP son temporales (buzón ocupado, límite de envío, ...)
+    code = getattr(error, "smtp_code", None)
+    return code is not None and 400 <= code < 500
+
+
+def send_bulk(messages):
+    """
+    Envía varios correos reutilizando una sola conexión SMTP.
+    `messages` es una lista de dicts con subject, body y destinations (y opcionalmente id y key).
+    Devuelve una lista con {"id", "sent", "error"} por cada mensaje, en el mismo orden.
+    Un mensaje cuya `key` ya se entregó no se reenvía y se informa como enviado.
+    """
+    DeliveredEmail.objects.filter(sent_at__lt=timezone.now() - timedelta(seconds=EMAIL_DEDUP_TTL)).delete()
+    keys = [message["key"] for message in messages if message.get("key")]
+    delivered = set(DeliveredEmail.objects.filter(key__in=keys).values_list("key", flat=True)) if keys else set()
+
+    results = []
+    connection = get_connection(fail_silently=False)
+    try:
+        for message in messages:
+            key = message.get("key")
+            if key and key in delivered:
+                results.append({"id": message.get("id"), "sent": True, "error": None})
+                continue
+            email = EmailMessage(
+                message["subject"], message["body"], None, message["destinations"],
+                connection=connection)
+            error = None
+            for attempt in range(EMAIL_SEND_RETRIES):
+                try:
+                    email.send()
+                    error = None
+                    break
+                except Exception as e:
+                    error = e
+                    if not _is_transient(e) or attempt == EMAIL_SEND_RETRIES - 1:
+                        break
+                    # La conexión puede haber quedado rota: se cierra y se abre en el siguiente envío
+                    connection.close()
+                    time.sleep(EMAIL_SEND_BACKOFF * 2 ** attempt)
+            if error is not None:
+                print(f"No se pudo enviar el correo '{message['subject']}': {error}")
+            elif key:
+                # Se registra apenas sale, no al final del lote: si la petición se corta a la mitad
+                # el reintento solo manda los que faltan
+                DeliveredEmail.objects.get_or_create(key=key)
+                delivered.add(key)
+            results.append({
+                "id": message.get("id"),
+                "sent": error is None,
+                "error": str(error) if error is not None else None,
+            })
+    finally:
+        connection.close()
+    return results
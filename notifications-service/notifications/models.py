@@ -9,4 +9,17 @@ from django.db import models
         
     user_id = models.IntegerField()
     message = models.CharField(max_length=100)
-    timestamp = models.DateTimeField(auto_now_add=True) """
\ No newline at end of file
+    timestamp = models.DateTimeField(auto_now_add=True) """
+
+class DeliveredEmail(models.Model):
+    # Claves de correos ya entregados (ver mailer.send_bulk): si el remitente reintenta un lote
+    # porque no le llegó la respuesta, los que ya salieron no se vuelven a enviar.
+    class Meta:
+        verbose_name_plural = "Correos entregados"
+        verbose_name = "Correo entregado"
+
+    key = models.CharField(max_length=200, unique=True)
+    sent_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return self.key
@@ -5,4 +5,18 @@ class EmailSerializer(serializers.Serializer):
     body = serializers.CharField()
     destinations = serializers.ListField(
         child=serializers.EmailField()
-    )
\ No newline at end of file
+    )
+
+
+class BulkEmailItemSerializer(EmailSerializer):
+    id = serializers.IntegerField(required=False)
+    # Clave de idempotencia del remitente (p. ej. "reservations.notificationoutbox:12:1760000000")
+    key = serializers.CharField(max_length=200, required=False)
+
+
+class BulkEmailSerializer(serializers.Serializer):
+    messages = serializers.ListField(
+        child=BulkEmailItemSerializer(),
+        allow_empty=False,
+        max_length=100
+    )
@@ -1,3 +1,134 @@
-from django.test import TestCase
+import socketserver
+import threading
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+
+from .models import DeliveredEmail
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    # Lo justo del protocolo SMTP para el backend de Django, sin TLS ni autenticación
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self.reply("220 localhost")
+        recipients = []
+        while line := self.rfile.readline():
+            command = line.decode().strip()
+            verb = command[:4].upper()
+            if verb in ("EHLO", "HELO"):
+                self.reply("250 localhost")
+            elif verb in ("MAIL", "RSET"):
+                recipients = []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                address = command.split(":", 1)[1].strip().strip("<>")
+                if address in self.server.rejected:
+                    self.reply("550 Buzón inexistente")
+                else:
+                    recipients.append(address)
+                    self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 Fin con <CR><LF>.<CR><LF>")
+                data = []
+                while (chunk := self.rfile.readline()) not in (b".\r\n", b""):
+                    data.append(chunk)
+                self.server.messages.append((recipients, b"".join(data)))
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("250 OK")
+
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _SMTPHandler)
+        self.messages = []
+        self.rejected = set()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def subjects(self):
+        return [next(line for line in data.decode().splitlines() if line.startswith("Subject:"))[9:]
+                for _, data in self.messages]
+
+
+class BulkEmailViewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.smtp = SMTPStandIn()
+        threading.Thread(target=cls.smtp.serve_forever, daemon=True).start()
+        cls.email_settings = override_settings(
+            EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+            EMAIL_HOST="127.0.0.1", EMAIL_PORT=cls.smtp.port, EMAIL_USE_TLS=False,
+            EMAIL_HOST_USER="", EMAIL_HOST_PASSWORD="", EMAIL_TIMEOUT=5,
+        )
+        cls.email_settings.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.email_settings.disable()
+        cls.smtp.shutdown()
+        cls.smtp.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.smtp.messages.clear()
+        self.smtp.rejected.clear()
+
+    def post_bulk(self, messages):
+        response = self.client.post("/api/email/bulk/", {"messages": messages}, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        return {item["id"]: item for item in response.json()["results"]}
+
+    def message(self, pk, to="cliente@example.com"):
+        return {"id": pk, "key": f"reservations.notificationoutbox:{pk}:1", "subject": f"Reserva {pk}",
+                "body": "Tu reserva fue confirmada.", "destinations": [to]}
+
+    def test_sends_every_message_through_one_connection(self):
+        results = self.post_bulk([self.message(1), self.message(2)])
+
+        self.assertTrue(results[1]["sent"] and results[2]["sent"])
+        self.assertEqual(self.smtp.subjects(), ["Reserva 1", "Reserva 2"])
+        self.assertEqual(DeliveredEmail.objects.count(), 2)
+
+    def test_retrying_a_delivered_batch_does_not_resend(self):
+        # El outbox reintenta el lote entero si la respuesta no le llegó (timeout del cliente)
+        batch = [self.message(1), self.message(2)]
+        self.post_bulk(batch)
+        results = self.post_bulk(batch)
+
+        self.assertTrue(results[1]["sent"] and results[2]["sent"])
+        self.assertEqual(self.smtp.subjects(), ["Reserva 1", "Reserva 2"])
+
+    def test_reports_failures_per_message_and_retries_only_those(self):
+        self.smtp.rejected.add("nadie@example.com")
+        batch = [self.message(1), self.message(2, to="nadie@example.com")]
+
+        results = self.post_bulk(batch)
+        self.assertTrue(results[1]["sent"])
+        self.assertFalse(results[2]["sent"])
+        self.assertTrue(results[2]["error"])
+
+        self.smtp.rejected.clear()
+        results = self.post_bulk(batch)
+        self.assertTrue(results[2]["sent"])
+        self.assertEqual(self.smtp.subjects(), ["Reserva 1", "Reserva 2"])
+
+    def test_messages_without_key_are_always_sent(self):
+        message = self.message(1)
+        del message["key"]
+        self.post_bulk([message])
+        self.post_bulk([message])
+
+        self.assertEqual(self.smtp.subjects(), ["Reserva 1", "Reserva 1"])
+        self.assertFalse(DeliveredEmail.objects.exists())
@@ -1,21 +1,24 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from django.core.mail import send_mail
-from .serializers import EmailSerializer
+from .mailer import send_bulk
+from .serializers import EmailSerializer, BulkEmailSerializer
 
 class SendEmailView(APIView):
     def post(self, request, *args, **kwargs):
         serializer = EmailSerializer(data=request.data)
         if serializer.is_valid():
-            try:
-                subject = serializer.validated_data['subject']
-                body = serializer.validated_data['body']
-                destinations = serializer.validated_data['destinations']
-                
-                send_mail(subject, body, None, destinations)
-                
+            result = send_bulk([serializer.validated_data])[0]
+            if result['sent']:
                 return Response({'mensaje': 'Correo enviado con éxito.'}, status=status.HTTP_200_OK)
-            except Exception as e:
-                return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_ERROR)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+            return Response({'error': result['error']}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class BulkEmailView(APIView):
+    # Recibe un lote de correos (p. ej. el outbox de reservas o de usuarios) y los envía por una sola conexión SMTP
+    def post(self, request, *args, **kwargs):
+        serializer = BulkEmailSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = send_bulk(serializer.validated_data['messages'])
+        return Response({'results': results}, status=status.HTTP_200_OK)
@@ -40,9 +40,14 @@ MIDDLEWARE = [
 ]
 
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
-EMAIL_HOST = 'smtp.gmail.com' # O tu proveedor de correo
-EMAIL_PORT = 587
-EMAIL_USE_TLS = True
+EMAIL_HOST = os.getenv("EMAIL_HOST", 'smtp.gmail.com') # O tu proveedor de correo
+EMAIL_PORT = int(os.getenv("EMAIL_PORT", 587))
+EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS", "True") == "True"
+EMAIL_TIMEOUT = int(os.getenv("EMAIL_TIMEOUT", 20))
+EMAIL_SEND_RETRIES = int(os.getenv("EMAIL_SEND_RETRIES", 3))
+EMAIL_SEND_BACKOFF = float(os.getenv("EMAIL_SEND_BACKOFF", 1.0))
+# Segundos que se recuerdan las claves de correos entregados (reintentos idempotentes del outbox)
+EMAIL_DEDUP_TTL = int(os.getenv("EMAIL_DEDUP_TTL", 60 * 60 * 24 * 7))
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_EMAIL")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
 
@@ -1,8 +1,9 @@
 from django.contrib import admin
 from django.urls import path
-from notifications.views import SendEmailView
+from notifications.views import SendEmailView, BulkEmailView
 
 urlpatterns = [
     #path('admin/', admin.site.urls),
     path('api/email/', SendEmailView.as_view(), name='email-service'),
+    path('api/email/bulk/', BulkEmailView.as_view(), name='email-bulk'),
 ]
\ No newline at end of file
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class ReservationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reservations'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from hotelia_common.outbox import start_dispatcher
+        from hotelia_common.runtime import serves_requests
+
+        # Lo que quedó pendiente antes de un reinicio se envía al arrancar, no con el próximo correo
+        if serves_requests():
+            start_dispatcher()
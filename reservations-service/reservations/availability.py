@@ -0,0 +1,146 @@
+from datetime import date, datetime, timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Reservation, RoomOccupancy, Status
+
+# Estados en los que una reserva ocupa la habitación
+BLOCKING_STATUSES = [Status.PENDING, Status.CONFIRMED,
+                     Status.PREPARING, Status.OCUPPIED]
+
+
+def overlapping_reservations(room_id, start_date, end_date, exclude_pk=None):
+    queryset = Reservation.objects.filter(
+        room_id=room_id,
+        start_date__lt=end_date,
+        end_date__gt=start_date,
+        status__in=BLOCKING_STATUSES,
+    )
+    if exclude_pk is not None:
+        queryset = queryset.exclude(pk=exclude_pk)
+    return queryset
+
+
+def is_room_free(room_id, start_date, end_date, exclude_pk=None):
+    """Indica si la habitación no tiene reservas activas que se crucen con el rango."""
+    return not overlapping_reservations(room_id, start_date, end_date, exclude_pk).exists()
+
+
+def busy_room_ids(room_ids, start_date, end_date):
+    """Habitaciones de `room_ids` con alguna reserva activa en el rango, en una sola consulta."""
+    return set(
+        Reservation.objects.filter(
+            room_id__in=list(room_ids),
+            start_date__lt=end_date,
+            end_date__gt=start_date,
+            status__in=BLOCKING_STATUSES,
+        ).values_list("room_id", flat=True).distinct()
+    )
+
+
+def free_room_ids(room_ids, start_date, end_date):
+    """Habitaciones de `room_ids` libres en el rango, conservando el orden recibido."""
+    room_ids = list(dict.fromkeys(room_ids))
+    busy = busy_room_ids(room_ids, start_date, end_date)
+    return [room_id for room_id in room_ids if room_id not in busy]
+
+
+OCCUPANCY_BYTES = 46  # 366 días
+
+
+def _local_date(value):
+    return timezone.localtime(value).date() if timezone.is_aware(value) else value.date()
+
+
+def _occupied_nights(start_date, end_date):
+    first = _local_date(start_date)
+    last = _local_date(end_date)
+    # Una reserva que entra y sale el mismo día igual bloquea ese día
+    return first, max(last, first + timedelta(days=1))
+
+
+def rebuild_room_occupancy(room_id, years):
+    """Recalcula el mapa de ocupación de la habitación para los años indicados."""
+    for year in set(years):
+        year_start = date(year, 1, 1)
+        year_end = date(year + 1, 1, 1)
+        reservations = Reservation.objects.filter(
+            room_id=room_id,
+            start_date__lt=timezone.make_aware(datetime.combine(year_end, datetime.min.time())),
+            end_date__gt=timezone.make_aware(datetime.combine(year_start, datetime.min.time())),
+            status__in=BLOCKING_STATUSES,
+        ).values_list("start_date", "end_date")
+
+        bits = 0
+        for start_date, end_date in reservations:
+            first, last = _occupied_nights(start_date, end_date)
+            for offset in range((max(first, year_start) - year_start).days,
+                                (min(last, year_end) - year_start).days):
+                bits |= 1 << offset
+
+        if bits:
+            RoomOccupancy.objects.update_or_create(
+                room_id=room_id, year=year,
+                defaults={"bitmap": bits.to_bytes(OCCUPANCY_BYTES, "little")})
+        else:
+            RoomOccupancy.objects.filter(room_id=room_id, year=year).delete()
+
+
+def rebuild_occupancy(room_ids=None):
+    """
+    Recalcula los mapas de ocupación desde las reservas (todas las habitaciones o `room_ids`).
+    Los signals solo ven save() y delete(): después de un queryset.update(), un bulk_create o
+    cambios hechos directo en la base los mapas quedan desactualizados hasta correr esto.
+    """
+    reservations = Reservation.objects.filter(status__in=BLOCKING_STATUSES)
+    occupancy = RoomOccupancy.objects.all()
+    if room_ids is not None:
+        reservations = reservations.filter(room_id__in=room_ids)
+        occupancy = occupancy.filter(room_id__in=room_ids)
+
+    bitmaps = {}
+    for room_id, start_date, end_date in reservations.values_list(
+            "room_id", "start_date", "end_date").iterator(chunk_size=2000):
+        first, last = _occupied_nights(start_date, end_date)
+        day = first
+        while day < last:
+            key = (room_id, day.year)
+            bitmaps[key] = bitmaps.get(key, 0) | 1 << (day - date(day.year, 1, 1)).days
+            day += timedelta(days=1)
+    rows = [
+        RoomOccupancy(room_id=room_id, year=year, bitmap=bits.to_bytes(OCCUPANCY_BYTES, "little"))
+        for (room_id, year), bits in bitmaps.items()
+    ]
+    with transaction.atomic():
+        occupancy.delete()
+        RoomOccupancy.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def reservation_years(start_date, end_date):
+    first, last = _occupied_nights(start_date, end_date)
+    return range(first.year, (last - timedelta(days=1)).year + 1)
+
+
+def occupancy_bitmaps(room_ids, start_date, end_date):
+    """
+    Ocupación día a día de cada habitación en [start_date, end_date) como cadena de '0'/'1'.
+    Lee los mapas precalculados de todas las habitaciones en una sola consulta.
+    """
+    room_ids = list(dict.fromkeys(room_ids))
+    years = range(start_date.year, (end_date - timedelta(days=1)).year + 1)
+    maps = {
+        (room_id, year): int.from_bytes(bytes(bitmap), "little")
+        for room_id, year, bitmap in RoomOccupancy.objects.filter(
+            room_id__in=room_ids, year__in=list(years),
+        ).values_list("room_id", "year", "bitmap")
+    }
+    days = [start_date + timedelta(days=i) for i in range((end_date - start_date).days)]
+    return {
+        room_id: "".join(
+            "1" if maps.get((room_id, day.year), 0) >> (day - date(day.year, 1, 1)).days & 1 else "0"
+            for day in days
+        )
+        for room_id in room_ids
+    }
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from reservations.availability import rebuild_occupancy
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula los mapas de ocupación de habitaciones a partir de las reservas. "
+        "Hace falta después de cambios que no pasan por los signals (update(), bulk_create)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--room", type=int, action="append", dest="rooms",
+                            help="Solo esta habitación (se puede repetir).")
+
+    def handle(self, *args, **options):
+        total = rebuild_occupancy(options["rooms"])
+        self.stdout.write(self.style.SUCCESS(f"Mapas de ocupación recalculados: {total}"))
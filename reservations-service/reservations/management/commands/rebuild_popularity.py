@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from reservations.popularity import rebuild_popularity
+
+
+class Command(BaseCommand):
+    help = "Recalcula la tabla de popularidad de habitaciones a partir de las reservas."
+
+    def handle(self, *args, **options):
+        total = rebuild_popularity()
+        self.stdout.write(self.style.SUCCESS(f"Filas de popularidad recalculadas: {total}"))
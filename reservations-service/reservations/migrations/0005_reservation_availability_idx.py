@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0004_alter_reservation_end_date_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['room_id', 'start_date', 'end_date', 'status'], name='reservation_availability_idx'),
+        ),
+    ]
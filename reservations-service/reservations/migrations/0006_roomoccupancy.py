@@ -0,0 +1,61 @@
+# Generated by Django 5.2.8 on 2026-10-18 10:27
+
+from datetime import date, timedelta
+
+from django.db import migrations, models
+from django.utils import timezone
+
+# Copia de reservations.availability al momento de esta migración: el código de la app puede
+# cambiar después y la migración tiene que seguir dando el mismo resultado
+BLOCKING_STATUSES = ['pending', 'confirmed', 'preparing', 'occupied']
+OCCUPANCY_BYTES = 46
+
+
+def _local_date(value):
+    return timezone.localtime(value).date() if timezone.is_aware(value) else value.date()
+
+
+def backfill_occupancy(apps, schema_editor):
+    Reservation = apps.get_model('reservations', 'Reservation')
+    RoomOccupancy = apps.get_model('reservations', 'RoomOccupancy')
+    bitmaps = {}
+    reservations = Reservation.objects.filter(
+        status__in=BLOCKING_STATUSES).values_list('room_id', 'start_date', 'end_date')
+    for room_id, start_date, end_date in reservations.iterator(chunk_size=2000):
+        first = _local_date(start_date)
+        # Una reserva que entra y sale el mismo día igual bloquea ese día
+        last = max(_local_date(end_date), first + timedelta(days=1))
+        day = first
+        while day < last:
+            key = (room_id, day.year)
+            bitmaps[key] = bitmaps.get(key, 0) | 1 << (day - date(day.year, 1, 1)).days
+            day += timedelta(days=1)
+    RoomOccupancy.objects.bulk_create([
+        RoomOccupancy(room_id=room_id, year=year, bitmap=bits.to_bytes(OCCUPANCY_BYTES, 'little'))
+        for (room_id, year), bits in bitmaps.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0005_reservation_availability_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomOccupancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('room_id', models.IntegerField()),
+                ('year', models.PositiveSmallIntegerField()),
+                ('bitmap', models.BinaryField(max_length=46)),
+            ],
+            options={
+                'verbose_name': 'Ocupación de habitación',
+                'verbose_name_plural': 'Ocupación de habitaciones',
+                'constraints': [models.UniqueConstraint(fields=('room_id', 'year'), name='room_occupancy_unique')],
+            },
+        ),
+        migrations.RunPython(backfill_occupancy, migrations.RunPython.noop),
+    ]
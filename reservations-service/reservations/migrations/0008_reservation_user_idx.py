@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 10:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0007_notificationoutbox'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['user_id', '-id'], name='reservation_user_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.8 on 2026-10-18 10:39
+
+from django.db import migrations, models
+from django.db.models import Count
+
+POPULAR_STATUSES = ('completed', 'preparing', 'occupied', 'confirmed')
+
+
+def backfill_popularity(apps, schema_editor):
+    Reservation = apps.get_model('reservations', 'Reservation')
+    RoomPopularity = apps.get_model('reservations', 'RoomPopularity')
+    popular = Reservation.objects.filter(status__in=POPULAR_STATUSES)
+    rows = [
+        RoomPopularity(room_id=row['room_id'], user_id=None, count=row['count'])
+        for row in popular.values('room_id').annotate(count=Count('id')).order_by()
+    ]
+    rows += [
+        RoomPopularity(room_id=row['room_id'], user_id=row['user_id'], count=row['count'])
+        for row in popular.values('room_id', 'user_id').annotate(count=Count('id')).order_by()
+    ]
+    RoomPopularity.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0008_reservation_user_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomPopularity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('room_id', models.IntegerField()),
+                ('user_id', models.IntegerField(blank=True, null=True)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Popularidad de habitación',
+                'verbose_name_plural': 'Popularidad de habitaciones',
+                'indexes': [models.Index(fields=['user_id', '-count', 'room_id'], name='room_popularity_top_idx')],
+                'constraints': [models.UniqueConstraint(fields=('room_id', 'user_id'), name='room_popularity_unique'), models.UniqueConstraint(condition=models.Q(('user_id__isnull', True)), fields=('room_id',), name='room_popularity_global_unique')],
+            },
+        ),
+        migrations.RunPython(backfill_popularity, migrations.RunPython.noop),
+    ]
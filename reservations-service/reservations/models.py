@@ -1,5 +1,7 @@
 from django.db import models
 
+from hotelia_common.models import NotificationOutboxBase
+
 
 class Status(models.TextChoices):
     PENDING = 'pending', 'Reserva Pendiente'
@@ -47,6 +49,13 @@ class Reservation(BaseModel):
     class Meta:
         verbose_name_plural = "Reservas"
         verbose_name = "Reserva"
+        indexes = [
+            # Cubre las consultas de solapamiento de reservations/availability.py
+            models.Index(fields=["room_id", "start_date", "end_date", "status"],
+                         name="reservation_availability_idx"),
+            # Listado paginado de las reservas de un cliente (keyset sobre id)
+            models.Index(fields=["user_id", "-id"], name="reservation_user_idx"),
+        ]
         
     room_id = models.IntegerField(help_text="ID de la habitación reservada.")
     user_id = models.IntegerField(
@@ -59,3 +68,56 @@ class Reservation(BaseModel):
 
     def __str__(self):
         return f"Reserva de {self.user_id} para la habitación {self.room_id} del {self.start_date} al {self.end_date}, ID: {self.pk}"
+
+
+class RoomOccupancy(models.Model):
+    # Mapa de bits por habitación y año: el bit N indica que la noche del día N del año
+    # está ocupada. Se recalcula desde reservations/signals.py; tras update() o bulk_create
+    # queda desactualizado hasta correr `manage.py rebuild_occupancy`.
+    class Meta:
+        verbose_name_plural = "Ocupación de habitaciones"
+        verbose_name = "Ocupación de habitación"
+        constraints = [
+            models.UniqueConstraint(fields=["room_id", "year"], name="room_occupancy_unique"),
+        ]
+
+    room_id = models.IntegerField()
+    year = models.PositiveSmallIntegerField()
+    bitmap = models.BinaryField(max_length=46)
+
+    def __str__(self):
+        return f"Ocupación de la habitación {self.room_id} en {self.year}"
+
+
+class RoomPopularity(models.Model):
+    # Cantidad de reservas efectivas por habitación: user_id nulo es el conteo global y
+    # con user_id es el de ese usuario. Se mantiene desde reservations/signals.py.
+    class Meta:
+        verbose_name_plural = "Popularidad de habitaciones"
+        verbose_name = "Popularidad de habitación"
+        constraints = [
+            models.UniqueConstraint(fields=["room_id", "user_id"], name="room_popularity_unique"),
+            models.UniqueConstraint(fields=["room_id"], condition=models.Q(user_id__isnull=True),
+                                    name="room_popularity_global_unique"),
+        ]
+        indexes = [
+            # Lectura del top-k: WHERE user_id ... ORDER BY count DESC LIMIT k
+            models.Index(fields=["user_id", "-count", "room_id"], name="room_popularity_top_idx"),
+        ]
+
+    room_id = models.IntegerField()
+    user_id = models.IntegerField(null=True, blank=True)
+    count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Habitación {self.room_id}: {self.count} reservas"
+
+
+class NotificationOutbox(BaseModel, NotificationOutboxBase):
+    # Correos pendientes de entregar al notifications-service (ver hotelia_common/outbox.py)
+    class Meta:
+        verbose_name_plural = "Correos pendientes"
+        verbose_name = "Correo pendiente"
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"], name="outbox_pending_idx"),
+        ]
@@ -0,0 +1,68 @@
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+
+from .models import Reservation, RoomPopularity, Status
+
+# Estados que cuentan como una reserva efectiva para los "top"
+POPULAR_STATUSES = (Status.COMPLETED, Status.PREPARING, Status.OCUPPIED, Status.CONFIRMED)
+
+
+def _popularity_keys(reservation):
+    if reservation is None or reservation.status not in POPULAR_STATUSES:
+        return []
+    return [(reservation.room_id, None), (reservation.room_id, reservation.user_id)]
+
+
+def _bump(room_id, user_id, delta):
+    rows = RoomPopularity.objects.filter(room_id=room_id, user_id=user_id)
+    # Nunca por debajo de 0 (count es positivo), aunque la tabla haya quedado desfasada
+    if rows.update(count=Greatest(F("count") + delta, 0)) or delta < 0:
+        return
+    try:
+        with transaction.atomic():
+            RoomPopularity.objects.create(room_id=room_id, user_id=user_id, count=delta)
+    except IntegrityError:
+        # Otro proceso creó la fila entre el update y el create
+        rows.update(count=F("count") + delta)
+
+
+def apply_popularity_change(previous, current):
+    """
+    Ajusta los contadores según la transición de una reserva. `previous` es el estado
+    anterior (None si es nueva) y `current` el nuevo (None si se borró).
+    """
+    before = Counter(_popularity_keys(previous))
+    after = Counter(_popularity_keys(current))
+    for room_id, user_id in before.keys() | after.keys():
+        delta = after[(room_id, user_id)] - before[(room_id, user_id)]
+        if delta:
+            _bump(room_id, user_id, delta)
+
+
+def top_rooms(user_id=None, limit=5):
+    # Lee las k habitaciones más reservadas directo del índice, sin agregar reservas
+    return list(
+        RoomPopularity.objects.filter(user_id=user_id, count__gt=0)
+        .order_by("-count", "room_id")
+        .values("room_id", "count")[:limit]
+    )
+
+
+def rebuild_popularity():
+    # Recalcula toda la tabla desde las reservas (backfill o reparación manual)
+    popular = Reservation.objects.filter(status__in=POPULAR_STATUSES)
+    rows = [
+        RoomPopularity(room_id=row["room_id"], user_id=None, count=row["count"])
+        for row in popular.values("room_id").annotate(count=Count("id")).order_by()
+    ]
+    rows += [
+        RoomPopularity(room_id=row["room_id"], user_id=row["user_id"], count=row["count"])
+        for row in popular.values("room_id", "user_id").annotate(count=Count("id")).order_by()
+    ]
+    with transaction.atomic():
+        RoomPopularity.objects.all().delete()
+        RoomPopularity.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
@@ -10,6 +10,7 @@ from rest_framework import serializers
 
 # Models
 from .models import Reservation, Payment, PaymentMethod
+from hotelia_common.pagination import SparseFieldsMixin
 
 # User = get_user_model()
 
@@ -18,6 +19,22 @@ class ReservationCountSerializer(serializers.Serializer):
     count = serializers.IntegerField()
     room_id = serializers.IntegerField(read_only=True)
 
+class RoomAvailabilitySerializer(serializers.Serializer):
+    room_ids = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False, max_length=1000)
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+
+    def validate(self, data):
+        days = (data["end_date"] - data["start_date"]).days
+        if days <= 0:
+            raise serializers.ValidationError(
+                "La fecha de salida debe ser posterior a la fecha entrada")
+        if days > 366:
+            raise serializers.ValidationError(
+                "El rango de fechas no puede superar un año")
+        return data
+
 class ExtendReservationSerializer(serializers.ModelSerializer):
     end_date = serializers.DateTimeField(input_formats=['%d/%m/%Y %I:%M %p', 'iso-8601'])
     class Meta:
@@ -35,7 +52,7 @@ class ReservationCancelSerializer(serializers.ModelSerializer):
             "id": {"read_only": True}
         }
 
-class ReservationSerializer(serializers.ModelSerializer):
+class ReservationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     user_id = serializers.IntegerField(required=False, allow_null=True)
     start_date = serializers.DateTimeField(input_formats=['%d/%m/%Y %I:%M %p', 'iso-8601'])
     end_date = serializers.DateTimeField(input_formats=['%d/%m/%Y %I:%M %p', 'iso-8601'])
@@ -89,7 +106,7 @@ class UpdateReservationSerializer(serializers.ModelSerializer):
         return data
 
 
-class PaymentSerializer(serializers.ModelSerializer):
+class PaymentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     payment_method = serializers.ChoiceField(choices=PaymentMethod.choices)
 
     class Meta:
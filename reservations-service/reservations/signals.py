@@ -0,0 +1,51 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .availability import rebuild_room_occupancy, reservation_years
+from .models import Reservation
+from .popularity import apply_popularity_change
+
+
+def _occupancy_key(reservation):
+    return reservation.room_id, set(reservation_years(reservation.start_date, reservation.end_date))
+
+
+# Los mapas de ocupación (RoomOccupancy) y la popularidad se mantienen aquí, así que solo siguen
+# a save() y delete() de a una reserva. Reservation.objects.update(), bulk_create() o cambios
+# hechos directo en la base los dejan desactualizados: después hay que correr
+# `manage.py rebuild_occupancy` y `manage.py rebuild_popularity`.
+
+
+@receiver(pre_save, sender=Reservation)
+def remember_previous_state(sender, instance, **kwargs):
+    # Cuesta un SELECT por cada save() de una reserva existente: hace falta el estado anterior
+    # para saber qué habitación y años recalcular y cómo cambia la popularidad
+    instance._previous_state = None
+    if instance.pk:
+        instance._previous_state = Reservation.objects.filter(pk=instance.pk).first()
+
+
+@receiver(post_save, sender=Reservation)
+def update_occupancy_on_save(sender, instance, **kwargs):
+    room_id, years = _occupancy_key(instance)
+    previous = getattr(instance, "_previous_state", None)
+    if previous is not None and previous.room_id != room_id:
+        rebuild_room_occupancy(*_occupancy_key(previous))
+    elif previous is not None:
+        years |= _occupancy_key(previous)[1]
+    rebuild_room_occupancy(room_id, years)
+
+
+@receiver(post_save, sender=Reservation)
+def update_popularity_on_save(sender, instance, **kwargs):
+    apply_popularity_change(getattr(instance, "_previous_state", None), instance)
+
+
+@receiver(post_delete, sender=Reservation)
+def update_occupancy_on_delete(sender, instance, **kwargs):
+    rebuild_room_occupancy(*_occupancy_key(instance))
+
+
+@receiver(post_delete, sender=Reservation)
+def update_popularity_on_delete(sender, instance, **kwargs):
+    apply_popularity_change(instance, None)
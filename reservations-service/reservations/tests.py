@@ -1,3 +1,306 @@
-from django.test import TestCase
+import base64
+import hashlib
+import hmac
+import json
+import time
+from datetime import date, datetime, timedelta
+from unittest import mock
 
-# Create your tests here.
+import httpx
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+
+from hotelia_common import outbox, revocation
+from hotelia_common.authentication import verify_identity
+from hotelia_common.models import OutboxStatus
+from hotelia_common.revocation import is_revoked, revocation_cache, revoke_session, revoke_user_tokens
+
+from . import views
+from .availability import is_room_free, occupancy_bitmaps, rebuild_occupancy
+from .models import NotificationOutbox, Reservation, RoomOccupancy, RoomPopularity, Status
+from .popularity import _bump, top_rooms
+
+GATEWAY_TOKEN = "reservations-test-token"
+
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def envelope(key=GATEWAY_TOKEN, **identity):
+    # Mismo formato que api-gateway/gateway/identity.py: "<payload>.<firma>"
+    identity = {"id": 1, "email": "cliente@example.com", "groups": [], "is_active": True,
+                "iat": int(time.time()), "sid": "session-1", "exp": int(time.time()) + 60, **identity}
+    payload = _b64(json.dumps(identity, separators=(",", ":"), sort_keys=True).encode())
+    return f"{payload}.{_b64(hmac.new(key.encode(), payload.encode(), hashlib.sha256).digest())}"
+
+
+def at(day, hour=12):
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()) + timedelta(hours=hour))
+
+
+def reservation(room_id=1, start=date(2026, 3, 10), nights=2, status=Status.CONFIRMED, user_id=1):
+    return Reservation.objects.create(
+        room_id=room_id, user_id=user_id, start_date=at(start, 15), end_date=at(start + timedelta(days=nights), 11),
+        status=status, total_price=100)
+
+
+@override_settings(RESERVATIONS_GATEWAY_TOKEN=GATEWAY_TOKEN)
+class ServiceTestCase(TestCase):
+    def setUp(self):
+        # Las marcas que otro test dejó en la copia local del proceso no se deshacen con la transacción
+        revocation.local_markers.clear()
+
+    def get(self, path, **identity):
+        return self.client.get(path, headers={"X-Gateway-Identity": envelope(**identity)})
+
+
+class IdentityEnvelopeTests(TestCase):
+    def setUp(self):
+        revocation.local_markers.clear()
+
+    def test_accepts_an_envelope_signed_with_the_service_token(self):
+        identity = verify_identity(envelope(id=7, groups=["cliente"]), GATEWAY_TOKEN)
+        self.assertEqual(identity["id"], 7)
+        self.assertEqual(identity["groups"], ["cliente"])
+
+    def test_rejects_a_tampered_payload(self):
+        payload, signature = envelope(id=7).split(".")
+        forged = _b64(json.dumps({"id": 1, "is_active": True, "exp": int(time.time()) + 60}).encode())
+        self.assertIsNone(verify_identity(f"{forged}.{signature}", GATEWAY_TOKEN))
+
+    def test_rejects_other_keys_expired_and_malformed_envelopes(self):
+        self.assertIsNone(verify_identity(envelope(), "otro-token"))
+        self.assertIsNone(verify_identity(envelope(exp=int(time.time()) - 1), GATEWAY_TOKEN))
+        self.assertIsNone(verify_identity(envelope(id=None), GATEWAY_TOKEN))
+        self.assertIsNone(verify_identity("sin-firma", GATEWAY_TOKEN))
+        self.assertIsNone(verify_identity(envelope(), None))
+
+    def test_authenticates_requests_without_calling_the_auth_service(self):
+        with override_settings(RESERVATIONS_GATEWAY_TOKEN=GATEWAY_TOKEN):
+            response = self.client.get("/api/reservations/", headers={"X-Gateway-Identity": envelope()})
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(AUTH_SERVICE_TOKEN="auth-test-token")
+class RevocationTests(ServiceTestCase):
+    def revoke(self, data, token="auth-test-token"):
+        return self.client.post("/api/auth/revoke/", data, content_type="application/json",
+                                headers={"X-Auth-Service-Token": token})
+
+    def test_requires_the_auth_service_token(self):
+        self.assertEqual(self.revoke({"session": "session-1"}, token="otro").status_code, 401)
+        self.assertFalse(is_revoked(1, "session-1"))
+
+    def test_logout_revokes_only_that_session(self):
+        self.assertEqual(self.revoke({"session": "session-1"}).status_code, 204)
+
+        response = self.get("/api/reservations/", sid="session-1")
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json()["detail"], "El token fue revocado.")
+        self.assertEqual(self.get("/api/reservations/", sid="session-2").status_code, 200)
+
+    def test_user_revocation_applies_to_tokens_issued_before(self):
+        now = int(time.time())
+        self.assertEqual(self.revoke({"user_id": 1, "issued_before": now}).status_code, 204)
+
+        self.assertTrue(is_revoked(1, issued_at=now - 10))
+        self.assertFalse(is_revoked(1, issued_at=now))
+        self.assertFalse(is_revoked(2, issued_at=now - 10))
+        with self.assertRaises(AuthenticationFailed):
+            verify_identity(envelope(iat=now - 10), GATEWAY_TOKEN)
+
+    def test_helpers_write_the_shared_markers(self):
+        revoke_session("session-9")
+        revoke_user_tokens(3, issued_before=100)
+        self.assertTrue(is_revoked(5, "session-9"))
+        self.assertTrue(is_revoked(3, issued_at=99))
+        self.assertEqual(self.revoke({}).status_code, 400)
+
+    def test_repeated_checks_skip_the_shared_cache_until_the_local_ttl(self):
+        self.assertFalse(is_revoked(4, "session-4"))
+        with self.assertNumQueries(0):
+            self.assertFalse(is_revoked(4, "session-4"))
+
+        # Revocación hecha en otro worker: solo escribe la caché compartida
+        revocation_cache().set(revocation.SESSION_REVOCATION_KEY.format("session-4"), True)
+        self.assertFalse(is_revoked(4, "session-4"))
+        later = time.monotonic() + revocation.REVOCATION_LOCAL_TTL
+        with mock.patch("hotelia_common.cache.time.monotonic", return_value=later):
+            self.assertTrue(is_revoked(4, "session-4"))
+
+
+class KeysetPaginationTests(ServiceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.ids = [reservation(room_id=room_id).pk for room_id in range(1, 8)]
+
+    def test_follows_the_cursors_through_every_page(self):
+        seen, sizes = [], []
+        response = self.get("/api/reservations/?page_size=3", groups=["admin"])
+        while True:
+            self.assertEqual(response.status_code, 200)
+            page = response.json()
+            sizes.append(len(page["results"]))
+            seen += [item["id"] for item in page["results"]]
+            if not page["next"]:
+                break
+            response = self.get(page["next"].replace("http://testserver", ""), groups=["admin"])
+
+        self.assertEqual(sizes, [3, 3, 1])
+        self.assertEqual(seen, sorted(self.ids, reverse=True))
+        self.assertIsNotNone(page["previous"])
+
+    def test_clients_only_page_through_their_own_reservations(self):
+        other = reservation(room_id=20, user_id=2).pk
+        page = self.get("/api/reservations/?page_size=50", id=2, groups=["cliente"]).json()
+        self.assertEqual([item["id"] for item in page["results"]], [other])
+
+    def test_rejects_a_forged_cursor(self):
+        response = self.get("/api/reservations/?cursor=no-es-un-cursor", groups=["admin"])
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(NOTIFICATION_TOKEN="notification-test-token")
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.requests = []
+        self.responder = None
+        url = mock.patch.object(outbox, "NOTIFICATIONS_SERVICE_URL", "http://notifications/api/")
+        client = mock.patch.object(outbox, "get_client", lambda name: httpx.Client(
+            transport=httpx.MockTransport(self.handle)))
+        quiet = mock.patch("builtins.print")
+        for patcher in (url, client, quiet):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def handle(self, request):
+        self.requests.append(json.loads(request.content))
+        return self.responder(json.loads(request.content)["messages"])
+
+    def enqueue(self, count):
+        return [outbox.enqueue_email(f"Asunto {i}", "Cuerpo", [f"cliente{i}@example.com"]) for i in range(count)]
+
+    def test_retries_only_the_messages_that_failed(self):
+        sent, failed = self.enqueue(2)
+        self.responder = lambda messages: httpx.Response(200, json={"results": [
+            {"id": sent.pk, "sent": True, "error": None},
+            {"id": failed.pk, "sent": False, "error": "550 Buzón inexistente"},
+        ]})
+
+        self.assertEqual(outbox.dispatch_pending(), 2)
+        sent.refresh_from_db(), failed.refresh_from_db()
+        self.assertEqual(sent.status, OutboxStatus.SENT)
+        self.assertEqual(failed.status, OutboxStatus.PENDING)
+        self.assertEqual((failed.attempts, failed.last_error), (1, "550 Buzón inexistente"))
+        self.assertGreater(failed.next_attempt_at, timezone.now())
+        # Hasta que venza el backoff no se vuelve a enviar nada
+        self.assertEqual(outbox.dispatch_pending(), 0)
+
+        NotificationOutbox.objects.filter(pk=failed.pk).update(next_attempt_at=timezone.now())
+        self.responder = lambda messages: httpx.Response(200, json={"results": [
+            {"id": message["id"], "sent": True, "error": None} for message in messages]})
+        self.assertEqual(outbox.dispatch_pending(), 1)
+        self.assertEqual([m["id"] for m in self.requests[-1]["messages"]], [failed.pk])
+
+    def test_reservation_emails_skip_users_the_auth_service_cannot_return(self):
+        request = mock.Mock(headers={})
+        with mock.patch.object(views, "get_user", side_effect=httpx.ConnectError("sin red")):
+            views.send_email(1, request, 4, at(date(2026, 3, 10)), at(date(2026, 3, 12)), Status.PENDING)
+        self.assertFalse(NotificationOutbox.objects.exists())
+
+        with mock.patch.object(views, "get_user", return_value={
+                "id": 1, "email": "cliente@example.com", "first_name": "Ana", "last_name": "Pérez"}):
+            views.send_email(1, request, 4, at(date(2026, 3, 10)), at(date(2026, 3, 12)), Status.PENDING)
+        self.assertEqual(NotificationOutbox.objects.get().destinations, ["cliente@example.com"])
+
+    def test_every_message_carries_a_stable_delivery_key(self):
+        message, = self.enqueue(1)
+        self.responder = lambda messages: httpx.Response(503)
+        outbox.dispatch_pending()
+        NotificationOutbox.objects.update(next_attempt_at=timezone.now())
+        outbox.dispatch_pending()
+
+        keys = [request["messages"][0]["key"] for request in self.requests]
+        self.assertEqual(keys, [message.delivery_key] * 2)
+        self.assertTrue(keys[0].startswith(f"reservations.notificationoutbox:{message.pk}:"))
+
+    def test_gives_up_after_the_maximum_attempts(self):
+        message, = self.enqueue(1)
+        self.responder = lambda messages: httpx.Response(503)
+        for _ in range(outbox.OUTBOX_MAX_ATTEMPTS):
+            NotificationOutbox.objects.update(next_attempt_at=timezone.now())
+            outbox.dispatch_pending()
+        message.refresh_from_db()
+        self.assertEqual(message.status, OutboxStatus.FAILED)
+        self.assertEqual(message.attempts, outbox.OUTBOX_MAX_ATTEMPTS)
+
+    def test_a_claimed_message_is_not_claimed_again(self):
+        self.enqueue(1)
+        self.assertEqual(len(outbox._claim(10)), 1)
+        self.assertEqual(outbox._claim(10), [])
+
+    def test_skips_empty_destinations(self):
+        self.assertIsNone(outbox.enqueue_email("Asunto", "Cuerpo", ["", None]))
+        self.assertFalse(NotificationOutbox.objects.exists())
+
+
+@override_settings(RESERVATIONS_GATEWAY_TOKEN=GATEWAY_TOKEN)
+class AvailabilityTests(TestCase):
+    def test_overlapping_reservations_block_the_room(self):
+        reservation(start=date(2026, 3, 10), nights=2)
+        self.assertFalse(is_room_free(1, at(date(2026, 3, 11)), at(date(2026, 3, 13))))
+        self.assertTrue(is_room_free(1, at(date(2026, 3, 12), 12), at(date(2026, 3, 14))))
+        self.assertTrue(is_room_free(2, at(date(2026, 3, 11)), at(date(2026, 3, 13))))
+
+    def test_signals_keep_the_occupancy_bitmaps_current(self):
+        booking = reservation(start=date(2026, 12, 30), nights=3)
+        self.assertEqual(occupancy_bitmaps([1], date(2026, 12, 29), date(2027, 1, 3)), {1: "01110"})
+
+        booking.status = Status.CANCELLED
+        booking.save()
+        self.assertEqual(occupancy_bitmaps([1], date(2026, 12, 29), date(2027, 1, 3)), {1: "00000"})
+        self.assertFalse(RoomOccupancy.objects.exists())
+
+    def test_rebuild_repairs_changes_that_skip_the_signals(self):
+        reservation(room_id=1, start=date(2026, 5, 1))
+        reservation(room_id=2, start=date(2026, 5, 1))
+        Reservation.objects.filter(room_id=1).update(status=Status.CANCELLED)
+        self.assertEqual(occupancy_bitmaps([1], date(2026, 5, 1), date(2026, 5, 3)), {1: "11"})
+
+        self.assertEqual(rebuild_occupancy([1]), 0)
+        self.assertEqual(occupancy_bitmaps([1, 2], date(2026, 5, 1), date(2026, 5, 3)), {1: "00", 2: "11"})
+        call_command("rebuild_occupancy", stdout=mock.Mock())
+        self.assertEqual(RoomOccupancy.objects.count(), 1)
+
+    def test_availability_endpoint_requires_the_service_token(self):
+        reservation(room_id=1, start=date(2026, 3, 10))
+        body = {"room_ids": [1, 2], "start_date": "2026-03-09", "end_date": "2026-03-12"}
+
+        response = self.client.post("/api/availability/", body, content_type="application/json")
+        self.assertEqual(response.status_code, 401)
+        response = self.client.post("/api/availability/", body, content_type="application/json",
+                                    headers={"X-Reservation-Gateway-Token": GATEWAY_TOKEN})
+        self.assertEqual(response.json(), {"free": [2], "occupancy": {"1": "011", "2": "000"}})
+
+
+class PopularityTests(TestCase):
+    def test_counts_follow_status_transitions(self):
+        first = reservation(room_id=1, status=Status.PENDING)
+        reservation(room_id=2, status=Status.CONFIRMED, user_id=2)
+        reservation(room_id=2, status=Status.COMPLETED, start=date(2026, 4, 1))
+        self.assertEqual(top_rooms(), [{"room_id": 2, "count": 2}])
+
+        first.status = Status.CONFIRMED
+        first.save()
+        self.assertEqual(top_rooms(user_id=1), [{"room_id": 1, "count": 1}, {"room_id": 2, "count": 1}])
+
+        first.delete()
+        self.assertEqual(top_rooms(), [{"room_id": 2, "count": 2}])
+
+    def test_decrements_never_go_below_zero(self):
+        RoomPopularity.objects.create(room_id=1, user_id=None, count=0)
+        _bump(1, None, -1)
+        self.assertEqual(RoomPopularity.objects.get(room_id=1, user_id=None).count, 0)
@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from hotelia_common.clients import get_client
+
+AUTH_SERVICE_URL = settings.AUTH_SERVICE_URL
+# Debe coincidir con USER_BATCH_MAX_IDS del auth-service
+USER_LOOKUP_BATCH_SIZE = getattr(settings, "USER_LOOKUP_BATCH_SIZE", 500)
+USER_LOOKUP_CACHE_TTL = getattr(settings, "USER_LOOKUP_CACHE_TTL", 300)
+USER_CACHE_KEY = "users:summary:{}"
+
+
+def _headers(authorization):
+    headers = {}
+    if authorization:
+        headers["Authorization"] = authorization
+    token = getattr(settings, "AUTH_SERVICE_TOKEN", None)
+    if token:
+        headers["X-Auth-Service-Token"] = token
+    return headers
+
+
+def get_users(user_ids, authorization=None):
+    """
+    Devuelve {id: {"id", "email", "first_name", "last_name", "is_active"}} de los usuarios
+    pedidos, leyendo primero la caché y pidiendo el resto a auth/batch/ en lotes. Los ids que
+    no existen no aparecen en el resultado. Los errores de red o HTTP (httpx) se propagan.
+    """
+    ids = {int(user_id) for user_id in user_ids if user_id is not None}
+    cached = cache.get_many([USER_CACHE_KEY.format(user_id) for user_id in ids])
+    users = {user["id"]: user for user in cached.values()}
+
+    pending = sorted(ids - users.keys())
+    for start in range(0, len(pending), USER_LOOKUP_BATCH_SIZE):
+        response = get_client("auth").post(
+            f"{AUTH_SERVICE_URL}auth/batch/", json={"ids": pending[start:start + USER_LOOKUP_BATCH_SIZE]},
+            headers=_headers(authorization))
+        response.raise_for_status()
+        found = {user["id"]: user for user in response.json()["results"]}
+        cache.set_many({USER_CACHE_KEY.format(user_id): user for user_id, user in found.items()},
+                       USER_LOOKUP_CACHE_TTL)
+        users.update(found)
+    return users
+
+
+def get_user(user_id, authorization=None):
+    return get_users([user_id], authorization).get(int(user_id))
+
+
+def full_name(user):
+    return f"{user['first_name']} {user['last_name']}"
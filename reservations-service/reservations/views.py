@@ -2,14 +2,19 @@ from django.db.models import Q, Count
 from rest_framework import viewsets, permissions, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.views import APIView
 from django.conf import settings
 from datetime import datetime
 from dateutil import parser
 import httpx
 # from asgiref.sync import async_to_sync
 from .models import Reservation, Payment, Status, PaymentMethod
-from .serializers import ReservationCountSerializer, ExtendReservationSerializer, ReservationSerializer, UpdateReservationSerializer, PaymentSerializer, ReservationPaymentSerializer
-# from .authentication import UserAuthentication
+from .availability import is_room_free, occupancy_bitmaps
+from .serializers import RoomAvailabilitySerializer, ReservationCountSerializer, ExtendReservationSerializer, ReservationSerializer, UpdateReservationSerializer, PaymentSerializer, ReservationPaymentSerializer
+from hotelia_common.outbox import enqueue_email
+from .popularity import top_rooms
+from hotelia_common.clients import get_client
+from .users import full_name, get_user, get_users
 # Create your views here.
 
 HOTELS_SERVICE_URL = settings.HOTELS_SERVICE_URL
@@ -19,32 +24,27 @@ AUTH_SERVICE_URL = settings.AUTH_SERVICE_URL
 
 
 def send_email(user_id, request, room_id, start_date, end_date, status, fullname=None, email=None):
-    try:
-        user = {}
-        if not fullname and not email:
-            user = httpx.get(f'{AUTH_SERVICE_URL}auth/{user_id}/', headers={
-                'Authorization': request.headers.get('Authorization')}).json()
-            fullname = f"{user['first_name']} {user['last_name']}"
-            email = user['email']
-        msg = f"Hola {fullname}, tu reserva para la habitación #{room_id} del {format_date(start_date)} al {format_date(end_date)}"
-        subject = "Reserva realizada"
-        if status == Status.OCUPPIED:
-            msg = f"{msg} ha sido aprobada y esta esperando por ti."
-            subject = "Reserva Confirmada"
-        else:
-            msg = f"{msg} ha sido realizada y una vez confirmado el pago se le notificara con un correo."
-        json = {
-            "subject": subject,
-            "body": msg,
-            "destinations": [email]
-        }
-        if email:
-            response = httpx.post(
-                f'{NOTIFICATIONS_SERVICE_URL}email/', json=json, headers={'X-Notification-Gateway-Token': settings.NOTIFICATION_TOKEN})
-            response.raise_for_status()
-            print(response.json())
-    except httpx.RequestError as e:
-        print("No se pudo enviar el correo")
+    if not fullname and not email:
+        # Solo la consulta al auth-service puede fallar por red; el outbox es una escritura local
+        try:
+            user = get_user(user_id, request.headers.get('Authorization'))
+        except httpx.HTTPError as e:
+            print(f"No se pudo enviar el correo: {e}")
+            return
+        if user is None:
+            print(f"No se pudo enviar el correo: el usuario {user_id} no existe")
+            return
+        fullname = full_name(user)
+        email = user['email']
+    msg = f"Hola {fullname}, tu reserva para la habitación #{room_id} del {format_date(start_date)} al {format_date(end_date)}"
+    subject = "Reserva realizada"
+    if status == Status.OCUPPIED:
+        msg = f"{msg} ha sido aprobada y esta esperando por ti."
+        subject = "Reserva Confirmada"
+    else:
+        msg = f"{msg} ha sido realizada y una vez confirmado el pago se le notificara con un correo."
+    # El correo queda en el outbox y se envía en segundo plano, fuera del request
+    enqueue_email(subject, msg, [email])
 
 
 def format_date(timedatestamp: datetime):
@@ -60,8 +60,18 @@ class PaymentViewSet(viewsets.ModelViewSet):
     def stats(self, request):
         top_count_method = Payment.objects.values('payment_method').annotate(
             count=Count('payment_method')).order_by('-count')[:5]
-        top_users = Reservation.objects.filter(status=Status.COMPLETED).values(
-            'user_id').annotate(count=Count('user_id')).order_by('-count')
+        top_users = list(Reservation.objects.filter(status=Status.COMPLETED).values(
+            'user_id').annotate(count=Count('user_id')).order_by('-count'))
+        # Nombre y correo de todos los usuarios en una sola consulta al auth-service
+        try:
+            users = get_users([row['user_id'] for row in top_users], request.headers.get('Authorization'))
+        except httpx.HTTPError as e:
+            print(f"No se pudieron obtener los usuarios: {e}")
+            users = {}
+        for row in top_users:
+            user = users.get(row['user_id'])
+            row['fullname'] = full_name(user) if user else None
+            row['email'] = user['email'] if user else None
         return Response({"top_method": top_count_method, "top_users": top_users}, status=status.HTTP_200_OK)
 
     def create(self, request, *args, **kwargs):
@@ -104,61 +114,47 @@ class ReservationViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(status__icontains=status)
 
         if is_cliente:
-            queryset = queryset.filter(user_id=user_id).order_by('-created_at')
+            queryset = queryset.filter(user_id=user_id)
         return queryset
 
-    @action(detail=False, methods=["get"])
-    def top(self, request):
+    def _popular_rooms(self, request, mine, limit):
+        # `top` y `top_hotels` leen el mismo top k de RoomPopularity; solo cambian sus parámetros
         try:
-            is_authenticated = request.user.is_authenticated
-            global_top = request.query_params.get("global", "false")
-            if global_top == "true" or not is_authenticated:
-                top_popular_rooms = Reservation.objects.filter(status__in=[Status.COMPLETED, Status.PREPARING, Status.OCUPPIED, Status.CONFIRMED]).values(
-                    'room_id').annotate(count=Count('room_id')).order_by('-count')[:5]
+            if mine and request.user.is_authenticated:
+                top_popular_rooms = top_rooms(user_id=request.user.id, limit=limit)
             else:
-                user_id = request.user.id
-                top_popular_rooms = Reservation.objects.filter(user_id=user_id, status__in=[Status.COMPLETED, Status.PREPARING, Status.OCUPPIED, Status.CONFIRMED]).values(
-                    'room_id').annotate(count=Count('room_id')).order_by('-count')[:5]
+                top_popular_rooms = top_rooms(limit=limit)
             serializer = ReservationCountSerializer(
                 top_popular_rooms, many=True)
             return Response(serializer.data)
-        except Reservation.DoesNotExist:
-            return Response({"error": "No se encontro habitaciones para dicho usuario", })
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @action(detail=False, methods=["get"])
+    def top(self, request):
+        # Habitaciones más reservadas (rooms/top_rooms/ del hotels-service)
+        return self._popular_rooms(request, request.query_params.get("global", "false") != "true", 5)
+
     @action(detail=False, methods=["get"])
     def top_hotels(self, request):
-        is_authenticated = request.user.is_authenticated
+        # Las mismas habitaciones, que el hotels-service agrupa por hotel (hotels/top/)
         try:
-            me = request.query_params.get("me", "false")
             rows = int(self.request.query_params.get("rows") or 5)
-            if rows < 0:
-                rows = 5
-            if rows > 10:
-                rows = 10
-            top_popular_rooms = []
-            if me == "false" or not is_authenticated:
-                top_popular_rooms = Reservation.objects.filter(status__in=[Status.COMPLETED, Status.PREPARING, Status.OCUPPIED, Status.CONFIRMED]).values(
-                    'room_id').annotate(count=Count('room_id')).order_by('-count')[:rows]
-            else:
-                user_id = request.user.id
-                top_popular_rooms = Reservation.objects.filter(user_id=user_id, status__in=[Status.COMPLETED, Status.PREPARING, Status.OCUPPIED, Status.CONFIRMED]).values(
-                    'room_id').annotate(count=Count('room_id')).order_by('-count')[:rows]
-            serializer = ReservationCountSerializer(
-                top_popular_rooms, many=True)
-            return Response(serializer.data)
-        except Reservation.DoesNotExist:
-            return Response({"error": "No se encontro habitaciones para dicho usuario", })
-        except Exception as e:
-            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        except ValueError:
+            rows = 5
+        if rows < 0:
+            rows = 5
+        if rows > 10:
+            rows = 10
+        return self._popular_rooms(request, request.query_params.get("me", "false") != "false", rows)
 
     @action(detail=False, methods=["get"])
     def user(self, request):
         try:
-            reservations = Reservation.objects.filter(user_id=request.user.id)
-            serializer = ReservationSerializer(reservations, many=True)
-            return Response(serializer.data)
+            # Paginado por cursor sobre el índice (user_id, -id)
+            reservations = self.paginate_queryset(Reservation.objects.filter(user_id=request.user.id))
+            serializer = ReservationSerializer(reservations, many=True, context=self.get_serializer_context())
+            return self.get_paginated_response(serializer.data)
         except Reservation.DoesNotExist:
             return Response({"error": "No se encontro reservaciones para dicho usuario", })
         except Exception as e:
@@ -169,9 +165,9 @@ class ReservationViewSet(viewsets.ModelViewSet):
         if pk is None:
             return Response({"error": "La id del hotel es requerida"}, status=400)
         try:
-            payments = Payment.objects.filter(reservation_id=pk)
+            payments = self.paginate_queryset(Payment.objects.filter(reservation_id=pk))
             serializer = ReservationPaymentSerializer(payments, many=True)
-            return Response(serializer.data)
+            return self.get_paginated_response(serializer.data)
         except Payment.DoesNotExist:
             return Response({"error": "No se encontro pago para dicho hotel", })
         except Exception as e:
@@ -193,20 +189,15 @@ class ReservationViewSet(viewsets.ModelViewSet):
 
         if user_id:
             try:
-                response = httpx.get(
-                    f'{AUTH_SERVICE_URL}auth/{serializer.validated_data["user_id"]}/', headers={'Authorization': request.headers.get(
-                        'Authorization')})
-                response.raise_for_status()
-                json = response.json()
-                email = json.get("email")
-                fullname = f"{json['first_name']} {json['last_name']}"
-                print(email, fullname)
+                user = get_user(serializer.validated_data["user_id"], request.headers.get('Authorization'))
             except httpx.RequestError as e:
                 return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
             except httpx.HTTPStatusError as exc:
-                if exc.response.status_code == 404:
-                    return Response({"error": "El usuario no existe."}, status=status.HTTP_404_NOT_FOUND)
                 return Response({"error": f"Error en la petición: {exc.response.status_code}"})
+            if user is None:
+                return Response({"error": "El usuario no existe."}, status=status.HTTP_404_NOT_FOUND)
+            email = user["email"]
+            fullname = full_name(user)
 
         start_date = serializer.validated_data["start_date"]
         end_date = serializer.validated_data["end_date"]
@@ -214,7 +205,7 @@ class ReservationViewSet(viewsets.ModelViewSet):
         result = {}
         cost_night = 0.0
         try:
-            response = httpx.get(
+            response = get_client("hotels").get(
                 f'{HOTELS_SERVICE_URL}rooms/{room_id}/', headers={'Authorization': request.headers.get(
                     'Authorization')})
             response.raise_for_status()
@@ -232,16 +223,7 @@ class ReservationViewSet(viewsets.ModelViewSet):
         days = int((end_date.date() - start_date.date()).days)
         total: float = days * float(cost_night)
         serializer.validated_data["total_price"] = total
-        overlapping = Reservation.objects.filter(
-            room_id=room_id,
-            start_date__lt=end_date,
-            end_date__gt=start_date,
-        ).filter(
-            status__in=[Status.PENDING, Status.CONFIRMED,
-                        Status.PREPARING, Status.OCUPPIED]
-        )
-
-        if overlapping.exists():
+        if not is_room_free(room_id, start_date, end_date):
             return Response(
                 {"error": "La habitación ya está reservada en este rango de fechas."},
                 status=status.HTTP_400_BAD_REQUEST
@@ -296,18 +278,7 @@ class ReservationViewSet(viewsets.ModelViewSet):
         end_date = serializer.validated_data["end_date"]
         room_id = serializer.validated_data["room_id"]
 
-        overlapping = Reservation.objects.filter(
-            room_id=room_id,
-            start_date__lt=end_date,
-            end_date__gt=start_date,
-        ).exclude(
-            pk=reservation.pk
-        ).filter(
-            status__in=[Status.PENDING, Status.CONFIRMED,
-                        Status.PREPARING, Status.OCUPPIED]
-        )
-
-        if overlapping.exists():
+        if not is_room_free(room_id, start_date, end_date, exclude_pk=reservation.pk):
             return Response(
                 {"error": "La habitación ya está reservada por otra persona en este rango de fechas."},
                 status=status.HTTP_400_BAD_REQUEST
@@ -317,7 +288,7 @@ class ReservationViewSet(viewsets.ModelViewSet):
         if start_date != reservation.start_date or end_date != reservation.end_date or room_id != reservation.room_id:
             cost_night = 0.0
             try:
-                response = httpx.get(
+                response = get_client("hotels").get(
                     f'{HOTELS_SERVICE_URL}rooms/{room_id}/', headers={'Authorization': request.headers.get('Authorization')})
                 response.raise_for_status()
                 result = response.json()
@@ -404,18 +375,7 @@ class ReservationViewSet(viewsets.ModelViewSet):
         current_start_date = reservation.start_date
         room_id = reservation.room_id
 
-        overlapping = Reservation.objects.filter(
-            room_id=room_id,
-            start_date__lt=new_end_date,
-            end_date__gt=current_start_date,
-        ).exclude(
-            pk=reservation.pk
-        ).filter(
-            status__in=[Status.PENDING, Status.CONFIRMED,
-                        Status.PREPARING, Status.OCUPPIED]
-        )
-
-        if overlapping.exists():
+        if not is_room_free(room_id, current_start_date, new_end_date, exclude_pk=reservation.pk):
             return Response(
                 {"error": "No es posible extender la reserva. La habitación ya ha sido reservada por otra persona en el nuevo rango de fechas."},
                 status=status.HTTP_400_BAD_REQUEST
@@ -423,7 +383,7 @@ class ReservationViewSet(viewsets.ModelViewSet):
 
         # 4. Recálculo del precio total
         try:
-            response = httpx.get(
+            response = get_client("hotels").get(
                 f'{HOTELS_SERVICE_URL}rooms/{room_id}/', headers={'Authorization': request.headers.get('Authorization')})
             response.raise_for_status()
             result = response.json()
@@ -440,3 +400,20 @@ class ReservationViewSet(viewsets.ModelViewSet):
         reservation.save()
         formatted_date = format_date(new_end_date)
         return Response({"message": f"Reserva actualizada, la nueva fecha de salida es: {formatted_date}, y el total a pagar es: {new_total_price}"}, status=status.HTTP_200_OK)
+
+
+class RoomAvailabilityView(APIView):
+    # Ocupación de varias habitaciones en un rango, para la búsqueda del hotels-service
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request):
+        # Solo la llama el hotels-service, con el token compartido de reservas
+        token = getattr(settings, "RESERVATIONS_GATEWAY_TOKEN", None)
+        if not token or request.headers.get('X-Reservation-Gateway-Token') != token:
+            return Response({'error': 'No tienes permiso para realizar dicha accion'}, status=status.HTTP_401_UNAUTHORIZED)
+        serializer = RoomAvailabilitySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        occupancy = occupancy_bitmaps(**serializer.validated_data)
+        free = [room_id for room_id, days in occupancy.items() if "1" not in days]
+        return Response({"free": free, "occupancy": occupancy}, status=status.HTTP_200_OK)
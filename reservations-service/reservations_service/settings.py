@@ -17,6 +17,7 @@ RESERVATIONS_GATEWAY_TOKEN = os.getenv("RESERVATION_TOKEN")
 AUTH_SERVICE_TOKEN = os.getenv("AUTH_SERVICE_TOKEN")
 HOTELS_GATEWAY_TOKEN = os.getenv("HOTEL_SERVICE_TOKEN")
 NOTIFICATION_TOKEN = os.getenv("NOTIFICATION_TOKEN")
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
 
 GATEWAY_SERVICE_URL = os.getenv("GATEWAY_SERVICE_URL")
 AUTH_SERVICE_URL = os.getenv("USERS_SERVICE_URL")
@@ -24,6 +25,13 @@ HOTELS_SERVICE_URL = os.getenv("HOTELS_SERVICE_URL")
 RESERVATIONS_SERVICE_URL = os.getenv("RESERVATIONS_SERVICE_URL")
 NOTIFICATIONS_SERVICE_URL = os.getenv("NOTIFICATIONS_SERVICE_URL")
 
+# Clientes HTTP hacia otros servicios (hotelia_common.clients); HTTP_CLIENTS sobrescribe cualquier clave
+HTTP_UPSTREAMS = {
+    "auth": {"timeout": 7.0},
+    "hotels": {"timeout": 10.0},
+    "notifications": {"timeout": 60.0, "max_connections": 5, "max_keepalive": 2},
+}
+
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True if os.getenv("DEBUG", "False") == "True" else False
 
@@ -38,6 +46,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.staticfiles',
     'rest_framework',
+    'hotelia_common',
     'reservations',
 ]
 
@@ -81,13 +90,35 @@ DATABASES = {
     }
 }
 
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", 100))
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
          'reservations.authentication.UserAuthentication',
     ),
     'DATETIME_FORMAT': "%Y-%m-%d %I:%M %p",
+    'DEFAULT_PAGINATION_CLASS': 'hotelia_common.pagination.KeysetPagination',
+    'PAGE_SIZE': int(os.getenv("PAGE_SIZE", 20)),
+}
+
+
+# Marcas de revocación de token (hotelia_common.revocation). Las leen todos los workers, así que
+# van en una caché compartida: por defecto una tabla en la base (la crea `migrate`) o Redis con
+# REVOCATION_CACHE_BACKEND=django.core.cache.backends.redis.RedisCache. Con LocMemCache solo
+# funciona con un worker: el aviso del auth-service llega a un único proceso.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "revocations": {
+        "BACKEND": os.getenv("REVOCATION_CACHE_BACKEND", "django.core.cache.backends.db.DatabaseCache"),
+        "LOCATION": os.getenv("REVOCATION_CACHE_LOCATION", "hotelia_revocations"),
+    },
 }
 
+# Cada worker guarda las marcas leídas hasta AUTH_REVOCATION_LOCAL_TTL segundos: ahorra la consulta
+# a CACHES["revocations"] en cada petición a costa de ver las revocaciones de otros workers con ese retraso
+AUTH_REVOCATION_LOCAL_TTL = float(os.getenv("AUTH_REVOCATION_LOCAL_TTL", 2.0))
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -129,3 +160,14 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Outbox de notificaciones: los correos se guardan en la base y se envían en segundo plano
+OUTBOX_MODEL = "reservations.NotificationOutbox"
+OUTBOX_AUTOSTART = os.getenv("OUTBOX_AUTOSTART", "True") == "True"
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", 50))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 8))
+OUTBOX_POLL_INTERVAL = int(os.getenv("OUTBOX_POLL_INTERVAL", 30))
+
+# Consultas de usuarios al auth-service (reservations/users.py): ids por petición y caché local
+USER_LOOKUP_BATCH_SIZE = int(os.getenv("USER_LOOKUP_BATCH_SIZE", 500))
+USER_LOOKUP_CACHE_TTL = int(os.getenv("USER_LOOKUP_CACHE_TTL", 300))
@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from reservations.views import ReservationViewSet, PaymentViewSet
+from hotelia_common.views import HttpClientMetricsView, TokenRevocationView
+from reservations.views import ReservationViewSet, PaymentViewSet, RoomAvailabilityView
 
 router = DefaultRouter()
 router.register(r'reservations', ReservationViewSet, basename="reservation")
@@ -8,5 +9,8 @@ router.register(r'payments', PaymentViewSet, basename="payment")
 
 
 urlpatterns = [
+    path('api/availability/', RoomAvailabilityView.as_view(), name='room-availability'),
+    path('api/auth/revoke/', TokenRevocationView.as_view(), name='token-revoke'),
+    path('api/metrics/http/', HttpClientMetricsView.as_view(), name='http-client-metrics'),
     path('api/', include(router.urls)),
 ]